@@ -0,0 +1,1151 @@
+"""
+html_to_pptx 性能基准
+
+用合成的 HTML 报告测量转换器各部分的耗时。
+
+Usage:
+    # 分阶段测量整个转换流程, 结果写入 JSON
+    python bench_html_to_pptx.py pipeline --output results.json
+
+    # 对比两次运行的结果
+    python bench_html_to_pptx.py compare baseline.json results.json
+
+    # 一致性检查: 各解析后端提取的内容、各转换模式生成的幻灯片 XML 是否相同 (不同时退出码为 1)
+    python bench_html_to_pptx.py parity [report.html ...]
+
+    # 对比单次遍历与逐项 find_all 两种内容提取实现
+    python bench_html_to_pptx.py extract --slides 50 --items 200 --rows 200
+
+    # 对比串行与多进程并行提取
+    python bench_html_to_pptx.py parallel --slides 400 --workers 4
+
+    # 对比普通建页与模板模式的形状数量和建页耗时
+    python bench_html_to_pptx.py template --slides 200
+
+    # 对比 add_text_box 的 XML 模板实现与 python-pptx 对象层实现
+    python bench_html_to_pptx.py textbox --slides 50 --boxes 40
+
+    # 对比整块生成表格 XML 与逐个单元格设置, 以及大表格的完整转换耗时
+    python bench_html_to_pptx.py table --rows 2000 --cols 5
+
+    # 对比 clean_text 与逐次正则替换的原实现 (表格报表的单元格文本)
+    python bench_html_to_pptx.py text --tables 200 --rows 200
+
+    # 内容缓存: 多份共用样板页 (免责声明、目录等) 的报告, 对比无缓存与有缓存的提取耗时
+    python bench_html_to_pptx.py content --docs 20 --slides 40 --shared 0.5
+
+    # <hr> 分隔的扩展性: body 下 1k / 10k / 100k 个直接子节点
+    python bench_html_to_pptx.py hr --nodes 1000 10000 100000
+
+    # 幻灯片边界查找: 一次遍历的编译规则 vs 逐级 find_all (容器为最后一级 article)
+    python bench_html_to_pptx.py boundaries --slides 500 --filler 50
+
+    # 常驻服务: 每个小报告启动一次命令行 vs 用客户端提交给预热好的服务
+    python bench_html_to_pptx.py server --files 20 --slides 3
+"""
+
+import argparse
+import functools
+import http.server
+import io
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import warnings
+import zipfile
+
+from bs4 import XMLParsedAsHTMLWarning
+from pptx import Presentation
+from pptx.enum.text import PP_ALIGN
+from pptx.util import Emu, Inches, Pt
+
+import html_to_pptx as h2p
+
+
+# ============== 合成 HTML ==============
+
+def make_slide_html(index, items=10, rows=10, cards=4, images=1, filler=0,
+                    image_base="images/"):
+    """生成一页合成幻灯片 HTML"""
+    parts = [
+        '<div class="slide-container">',
+        f'<div class="slide-title">Slide {index} title</div>',
+        f'<div class="slide-subtitle">Subtitle   for slide {index}</div>',
+        '<div class="two-column"><ul class="text-list">',
+    ]
+    for i in range(items):
+        cls = ('strength', 'gap', '')[i % 3]
+        parts.append(f'<li class="{cls}"><strong>Item {i}</strong> description '
+                     f'text for item {i} on slide {index}</li>')
+    parts.append('</ul>')
+    for i in range(images):
+        parts.append(f'<img src="{image_base}img{i}.png" alt="image {i}">')
+    parts.append('</div><div class="tile-grid">')
+    for i in range(cards):
+        parts.append(f'<div class="tile-card"><div class="icon-box"><i class="fas fa-star"></i>'
+                     f'</div><h3>Card {i}</h3><p>Card body {i}</p></div>')
+    parts.append('</div><table><tr><th>Name</th><th>Value</th><th>Note</th></tr>')
+    for i in range(rows):
+        parts.append(f'<tr><td>row {i}</td><td>{i * 7}</td><td> note  {i % 13} </td></tr>')
+    parts.append('</table>')
+    # 不含任何可提取内容的填充元素, 用于放大子树遍历的开销
+    parts.append('<div class="filler"><span>x</span></div>' * filler)
+    parts.append(f'<div class="page-indicator">{index:02d}</div>'
+                 '<div class="footer">BENCHMARK REPORT</div></div>')
+    return ''.join(parts)
+
+
+def make_document(slides=20, **slide_options):
+    """生成包含多页幻灯片的合成 HTML 文档"""
+    body = ''.join(make_slide_html(i, **slide_options) for i in range(slides))
+    return f'<html><head><meta charset="utf-8"></head><body>{body}</body></html>'
+
+
+def make_pipeline_slide_html(index, items=10, rows=10, cards=4, images=1,
+                             image_pool=10, image_base="images/"):
+    """生成一页用于完整流程基准的幻灯片, 按页号轮换双栏、卡片和默认三种布局"""
+    def image_url(i):
+        return f"{image_base}img{(index * images + i) % image_pool}.png"
+
+    parts = [
+        '<div class="slide-container">',
+        f'<div class="slide-title">Slide {index} title</div>',
+        f'<div class="slide-subtitle">Subtitle for slide {index}</div>',
+    ]
+    item_html = ''.join(
+        f'<li class="{("strength", "gap", "")[i % 3]}"><strong>Item {i}</strong> '
+        f'description text for item {i}</li>'
+        for i in range(items)
+    )
+    layout = index % 3
+    if layout == 0:
+        parts.append(f'<div class="two-column"><ul>{item_html}</ul>')
+        parts.extend(f'<img src="{image_url(i)}" alt="image {i}">' for i in range(images))
+        parts.append('</div>')
+    elif layout == 1:
+        parts.append('<div class="tile-grid">')
+        for i in range(cards):
+            img = f'<img src="{image_url(i)}">' if i < images else ''
+            parts.append(f'<div class="tile-card">{img}<i class="fas fa-star"></i>'
+                         f'<h3>Card {i}</h3><p>Card body {i}</p></div>')
+        parts.append('</div>')
+    else:
+        parts.append(f'<ul>{item_html}</ul>')
+        parts.extend(f'<img src="{image_url(i)}" alt="image {i}">' for i in range(images))
+    parts.append('<table><tr><th>Name</th><th>Value</th><th>Note</th></tr>')
+    parts.extend(f'<tr><td>row {i}</td><td>{i * 7}</td><td>note {i % 13}</td></tr>'
+                 for i in range(rows))
+    parts.append(f'</table><div class="page-indicator">{index:02d}</div>'
+                 '<div class="footer">BENCHMARK REPORT</div></div>')
+    return ''.join(parts)
+
+
+def make_pipeline_document(slides=20, **slide_options):
+    """生成用于完整流程基准的合成 HTML 文档"""
+    body = ''.join(make_pipeline_slide_html(i, **slide_options) for i in range(slides))
+    return f'<html><head><meta charset="utf-8"></head><body>{body}</body></html>'
+
+
+# ============== 本地图片服务 ==============
+
+class _ImageHandler(http.server.BaseHTTPRequestHandler):
+    """按路径 /imgN.png 返回确定性的 PNG 图片, 代替真实的远程图床"""
+
+    image_size = (800, 600)
+    _images = {}
+    _lock = threading.Lock()
+
+    def do_GET(self):
+        name = os.path.basename(self.path.split('?')[0])
+        if not (name.startswith('img') and name.endswith('.png')):
+            self.send_error(404)
+            return
+        data = self._render(name)
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    @classmethod
+    def _render(cls, name):
+        with cls._lock:
+            if name not in cls._images:
+                from PIL import Image
+
+                seed = sum(map(ord, name))
+                color = (seed * 37 % 256, seed * 91 % 256, seed * 53 % 256)
+                buffer = io.BytesIO()
+                Image.new('RGB', cls.image_size, color).save(buffer, 'PNG')
+                cls._images[name] = buffer.getvalue()
+            return cls._images[name]
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_image_server(image_size=(800, 600), warm=0):
+    """在后台线程启动本地图片服务, 返回 (server, 基础 URL)
+
+    warm 张图片会预先生成, 避免把生成图片的耗时计入第一次下载。
+    """
+    handler = type('ImageHandler', (_ImageHandler,), {'image_size': image_size, '_images': {}})
+    for i in range(warm):
+        handler._render(f"img{i}.png")
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}/"
+
+
+# ============== 对照实现 ==============
+
+# 转换器各处优化前的原实现, 用于核对优化后结果一致和基准对比
+
+
+def extract_slide_content_reference(container):
+    """逐项 find/find_all 的参考实现, 用于核对 extract_slide_content 的结果和基准对比"""
+    content = h2p._new_slide_content()
+
+    # 提取标题
+    title_elem = (
+        container.find(class_='slide-title') or
+        container.find('h1') or
+        container.find('h2')
+    )
+    if title_elem:
+        content['title'] = h2p.clean_text(title_elem.get_text())
+
+    # 提取副标题
+    subtitle_elem = (
+        container.find(class_='slide-subtitle') or
+        container.find('h3')
+    )
+    if subtitle_elem and subtitle_elem != title_elem:
+        content['subtitle'] = h2p.clean_text(subtitle_elem.get_text())
+
+    # 提取列表项
+    for ul in container.find_all(['ul', 'ol']):
+        for li in ul.find_all('li', recursive=False):
+            content['items'].append(h2p._extract_list_item(li))
+
+    # 提取图片
+    for img in container.find_all('img'):
+        src = img.get('src', '')
+        alt = img.get('alt', '')
+        if src:
+            content['images'].append({'src': src, 'alt': alt})
+
+    # 提取卡片 (tile-card, roadmap-card, card)
+    seen_cards = set()
+    for cls in h2p.CARD_CLASSES:
+        for card in container.find_all('div', class_=cls):
+            # 避免重复处理同一个卡片元素
+            card_id = id(card)
+            if card_id in seen_cards:
+                continue
+            seen_cards.add(card_id)
+            content['cards'].append(h2p._extract_card(card))
+
+    # 提取表格
+    for table in container.find_all('table'):
+        table_data = h2p._extract_table(table)
+        if table_data:
+            content['tables'].append(table_data)
+
+    # 提取页脚
+    page_indicator = container.find(class_='page-indicator')
+    footer = container.find(class_='footer')
+
+    if page_indicator:
+        content['footer_left'] = h2p.clean_text(page_indicator.get_text())
+    if footer:
+        content['footer_right'] = h2p.clean_text(footer.get_text())
+
+    # 检测布局类型
+    content['layout'] = h2p._detect_layout(
+        content, lambda cls: container.find(class_=cls) is not None
+    )
+
+    return content
+
+
+def add_text_box_reference(slide, left, top, width, height, text,
+                           font_size=14, color=None, bold=False, align=PP_ALIGN.LEFT,
+                           theme=h2p.DEFAULT_THEME):
+    """添加文本框 (经 python-pptx 对象层逐项设置格式的原实现, 用于对照测试和基准)"""
+    if color is None:
+        color = theme.text
+
+    shape = slide.shapes.add_textbox(
+        Inches(left), Inches(top), Inches(width), Inches(height)
+    )
+    tf = shape.text_frame
+    tf.word_wrap = True
+
+    p = tf.paragraphs[0]
+    p.text = h2p.clean_text(text)
+    p.font.size = Pt(font_size)
+    p.font.color.rgb = color
+    p.font.bold = bold
+    p.alignment = align
+
+    return shape
+
+
+def add_table_reference(slide, rows, left, top, width, row_heights, font_size=h2p.TABLE_FONT_SIZE,
+                        theme=h2p.DEFAULT_THEME):
+    """添加表格 (经 python-pptx 对象层逐个单元格设置的实现, 用于对照测试和基准)"""
+    heights = [Inches(h) for h in row_heights]
+    shape = slide.shapes.add_table(len(rows), len(rows[0]), Inches(left), Inches(top),
+                                   Inches(width), Emu(sum(heights)))
+    table = shape.table
+    for table_row, height in zip(table.rows, heights):
+        table_row.height = height
+
+    for i, row in enumerate(rows):
+        for j, text in enumerate(row):
+            cell = table.cell(i, j)
+            if text:
+                run = cell.text_frame.paragraphs[0].add_run()
+                run.text = text
+                run.font.size = Pt(font_size)
+                if i == 0:
+                    run.font.bold = True
+                    run.font.color.rgb = theme.white
+            if i == 0:
+                cell.fill.solid()
+                cell.fill.fore_color.rgb = theme.primary
+    return shape
+
+
+def clean_text_reference(text):
+    """清理文本内容 (逐次用正则替换的原实现, 用于对照测试和基准)"""
+    if not text:
+        return ""
+    # 移除多余空白
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def split_on_hr_reference(soup, body):
+    """按 hr 分隔的原实现: 逐个 extract 节点放进新的 div (会改动文档, 用于基准对比)"""
+    hrs = body.find_all('hr')
+    if hrs:
+        slides = []
+        current_content = []
+        for child in body.children:
+            if child.name == 'hr':
+                if current_content:
+                    wrapper = soup.new_tag('div')
+                    for c in current_content:
+                        wrapper.append(c.extract() if hasattr(c, 'extract') else c)
+                    slides.append(wrapper)
+                    current_content = []
+            else:
+                current_content.append(child)
+        if current_content:
+            wrapper = soup.new_tag('div')
+            for c in current_content:
+                if hasattr(c, 'extract'):
+                    wrapper.append(c)
+            slides.append(wrapper)
+        return slides if slides else [body]
+    return [body]
+
+
+def find_slides_reference(soup):
+    """原实现: 每一级候选容器各做一次全文档 find_all (用于基准对比)"""
+    containers = (
+        soup.find_all('div', class_='slide-container') or
+        soup.find_all('div', class_='slide') or
+        soup.find_all('section') or
+        soup.find_all('article')
+    )
+
+    if containers:
+        return containers
+
+    body = soup.find('body') or soup
+    return h2p.split_on_hr(body) or [body]
+
+
+# ============== 基准 ==============
+
+def time_call(func, *args, repeat=3):
+    """返回多次运行中的最短耗时 (秒) 和最后一次的返回值"""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_extract(args):
+    """对比 extract_slide_content 与 extract_slide_content_reference"""
+    html = make_document(args.slides, items=args.items, rows=args.rows,
+                         cards=args.cards, images=args.images, filler=args.filler)
+    soup = h2p.parse_html(html, args.parser)
+    containers = h2p.find_slides(soup)
+
+    def run(extract):
+        return [extract(c) for c in containers]
+
+    single, single_result = time_call(run, h2p.extract_slide_content, repeat=args.repeat)
+    multi, multi_result = time_call(run, extract_slide_content_reference, repeat=args.repeat)
+
+    print(f"{len(containers)} 页, 每页 {args.items} 项列表 / {args.rows} 行表格 / "
+          f"{args.cards} 张卡片 / {args.filler} 个填充元素 (HTML {len(html) / 1e6:.1f} MB)")
+    print(f"  单次遍历:   {single * 1000:8.1f} ms")
+    print(f"  逐项查找:   {multi * 1000:8.1f} ms")
+    print(f"  加速比:     {multi / single:8.2f}x")
+    print(f"  结果一致:   {single_result == multi_result}")
+
+
+def bench_parallel(args):
+    """对比串行与多进程并行的解析 + 内容提取阶段"""
+    html = make_document(args.slides, items=args.items, rows=args.rows,
+                         cards=args.cards, images=args.images, filler=args.filler)
+
+    def run_serial():
+        containers = h2p.find_slides(h2p.parse_html(html, args.parser))
+        return [h2p.extract_slide_content(c) for c in containers]
+
+    def run_parallel():
+        fragments = h2p.find_slide_fragments(html)
+        return h2p.extract_fragments(fragments, args.workers, args.parser)
+
+    serial, serial_result = time_call(run_serial, repeat=args.repeat)
+    parallel, parallel_result = time_call(run_parallel, repeat=args.repeat)
+
+    print(f"{args.slides} 页 (HTML {len(html) / 1e6:.1f} MB), {args.workers} 个进程, "
+          f"本机 {os.cpu_count()} 核")
+    print(f"  串行解析+提取: {serial * 1000:8.1f} ms")
+    print(f"  并行解析+提取: {parallel * 1000:8.1f} ms")
+    print(f"  加速比:        {serial / parallel:8.2f}x")
+    print(f"  结果一致:      {serial_result == parallel_result}")
+
+
+def build_slides(contents, template=None):
+    """只测建页: 把提取好的内容建成演示文稿, 返回 (prs, 形状总数)"""
+    prs = h2p.new_presentation()
+    shapes = 0
+    for content in contents:
+        slide = h2p.create_slide(prs, dict(content, items=[dict(item) for item in content['items']]),
+                                 None, template=template)
+        shapes += len(slide.shapes)
+    return prs, shapes
+
+
+def slide_xml_bytes(prs):
+    """保存后各幻灯片 XML 的总字节数"""
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    with zipfile.ZipFile(buffer) as package:
+        return sum(info.file_size for info in package.infolist()
+                   if info.filename.startswith('ppt/slides/slide'))
+
+
+def bench_template(args):
+    """对比普通建页与模板模式的形状数量、幻灯片 XML 大小和建页耗时"""
+    html = make_pipeline_document(args.slides, items=args.items, rows=0,
+                                  cards=args.cards, images=0)
+    contents, _ = h2p.extract_all_contents(html, args.parser)
+    template = h2p.slide_template(h2p.DEFAULT_THEME)
+    build_slides(contents[:3], template)  # 预先生成版式 XML, 与主题缓存的实际用法一致
+
+    plain, (plain_prs, plain_shapes) = time_call(build_slides, contents, repeat=args.repeat)
+    templated, (templated_prs, templated_shapes) = time_call(
+        build_slides, contents, template, repeat=args.repeat
+    )
+
+    print(f"{len(contents)} 页 (双栏 / 卡片 / 列表轮换, 每页 {args.items} 项列表, "
+          f"{args.cards} 张卡片)")
+    print(f"              {'普通':>10} {'模板':>10}")
+    print(f"  形状数量:   {plain_shapes:>10} {templated_shapes:>10}")
+    print(f"  幻灯片 XML: {slide_xml_bytes(plain_prs) / 1024:>9.0f}K "
+          f"{slide_xml_bytes(templated_prs) / 1024:>9.0f}K")
+    print(f"  建页耗时:   {plain * 1000:>8.1f}ms {templated * 1000:>8.1f}ms")
+    print(f"  加速比:     {plain / templated:8.2f}x")
+
+
+def add_text_boxes(add, slides, boxes):
+    """用指定的 add_text_box 实现建 slides 页, 每页 boxes 个文本框"""
+    theme = h2p.DEFAULT_THEME
+    prs = h2p.new_presentation()
+    styles = [(28, theme.primary, True, h2p.PP_ALIGN.LEFT),
+              (14, theme.text, False, h2p.PP_ALIGN.LEFT),
+              (10, theme.muted, True, h2p.PP_ALIGN.RIGHT)]
+    for s in range(slides):
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        for i in range(boxes):
+            size, color, bold, align = styles[i % len(styles)]
+            add(slide, 0.8, 0.2 + i * 0.15, 10.5, 0.35, f"Slide {s} text box {i} <&>",
+                font_size=size, color=color, bold=bold, align=align)
+    return prs
+
+
+def bench_textbox(args):
+    """对比 add_text_box (XML 模板) 与 add_text_box_reference (python-pptx 对象层)"""
+    total = args.slides * args.boxes
+    reference, reference_prs = time_call(add_text_boxes, add_text_box_reference,
+                                         args.slides, args.boxes, repeat=args.repeat)
+    fast, fast_prs = time_call(add_text_boxes, h2p.add_text_box,
+                               args.slides, args.boxes, repeat=args.repeat)
+
+    def package_xml(prs):
+        buffer = io.BytesIO()
+        prs.save(buffer)
+        with zipfile.ZipFile(buffer) as package:
+            return [(name, package.read(name)) for name in package.namelist()]
+
+    print(f"{args.slides} 页 x {args.boxes} 个文本框 = {total} 个形状")
+    print(f"  对象层:   {reference * 1000:8.1f} ms  {total / reference:10.0f} 形状/秒")
+    print(f"  XML 模板: {fast * 1000:8.1f} ms  {total / fast:10.0f} 形状/秒")
+    print(f"  加速比:   {reference / fast:8.2f}x")
+    print(f"  XML 一致: {package_xml(reference_prs) == package_xml(fast_prs)}")
+
+
+def make_table_rows(rows, cols):
+    """生成表头加 rows 行数据的表格, 单元格长短不一 (部分需要换行)"""
+    table = [[f"Column {c}" for c in range(cols)]]
+    for r in range(rows):
+        table.append([f"r{r}c{c} " + "value " * ((r + c) % 7) for c in range(cols)])
+    return table
+
+
+def add_table_pages(add, table):
+    """用指定的 add_table 实现把表格分页建成演示文稿, 返回 (prs, 页数)"""
+    prs = h2p.new_presentation()
+    cols = len(table[0])
+    heights = h2p.table_row_heights(table, h2p.TABLE_WIDTH / cols)
+    pages = h2p.paginate_table(heights, h2p.TABLE_BOTTOM - 0.8, h2p.TABLE_BOTTOM - 0.8, True)
+    for start, end in pages:
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        add(slide, [table[0]] + table[start:end], h2p.TABLE_LEFT, 0.8, h2p.TABLE_WIDTH,
+            [heights[0]] + heights[start:end])
+    return prs, len(pages)
+
+
+def bench_table(args):
+    """对比 add_table (整块 XML) 与 add_table_reference (逐个单元格), 并测量完整转换"""
+    table = make_table_rows(args.rows, args.cols)
+    cells = len(table) * args.cols
+    reference, (reference_prs, pages) = time_call(add_table_pages, add_table_reference,
+                                                  table, repeat=args.repeat)
+    fast, (fast_prs, _) = time_call(add_table_pages, h2p.add_table, table, repeat=args.repeat)
+
+    def package_xml(prs):
+        buffer = io.BytesIO()
+        prs.save(buffer)
+        with zipfile.ZipFile(buffer) as package:
+            return [(name, package.read(name)) for name in package.namelist()]
+
+    rows_html = ''.join('<tr>' + ''.join(f'<td>{text}</td>' for text in row) + '</tr>'
+                        for row in table)
+    html = (f'<html><body><div class="slide-container"><h1>Table</h1><table>{rows_html}'
+            '</table></div></body></html>')
+    convert, _ = time_call(h2p.convert_html_to_pptx, html, None, repeat=args.repeat)
+
+    print(f"{args.rows} 行 x {args.cols} 列 = {cells} 个单元格, 分 {pages} 页")
+    print(f"  逐个单元格: {reference * 1000:8.1f} ms  {cells / reference:10.0f} 单元格/秒")
+    print(f"  整块 XML:   {fast * 1000:8.1f} ms  {cells / fast:10.0f} 单元格/秒")
+    print(f"  加速比:     {reference / fast:8.2f}x")
+    print(f"  XML 一致:   {package_xml(reference_prs) == package_xml(fast_prs)}")
+    print(f"  完整转换:   {convert * 1000:8.1f} ms")
+
+
+# 表格报表中常见的单元格取值
+TEXT_STATUSES = ('已完成', '进行中', '未开始', 'N/A', 'OK', '—')
+TEXT_REGIONS = ('华东', '华北', '华南', 'North America', 'Europe', 'APAC')
+
+
+def make_report_tables(tables=200, rows=200):
+    """生成带缩进排版的表格报表 HTML, 单元格内容接近导出的业务报表"""
+    parts = ['<html><body>']
+    for t in range(tables):
+        parts.append(f'<div class="slide-container">\n  <h2>  Table {t}\n  </h2>\n  <table>\n'
+                     '    <tr><th> 编号 </th><th>区域</th><th>状态</th><th>金额</th>'
+                     '<th>日期</th><th>备注</th></tr>\n')
+        for r in range(rows):
+            note = ('' if r % 4 else f'\n        第 {r % 17} 项说明,  需要跟进\n      ')
+            parts.append(
+                f'    <tr>\n      <td>{t * rows + r}</td>\n'
+                f'      <td> {TEXT_REGIONS[r % len(TEXT_REGIONS)]} </td>\n'
+                f'      <td>{TEXT_STATUSES[(r * 7) % len(TEXT_STATUSES)]}</td>\n'
+                f'      <td>{(r * 1234.5) % 99999:,.2f}</td>\n'
+                f'      <td>2026-{r % 12 + 1:02d}-{r % 28 + 1:02d}</td>\n'
+                f'      <td>{note}</td>\n    </tr>\n'
+            )
+        parts.append('  </table>\n</div>\n')
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+
+def bench_text(args):
+    """对比 clean_text 与 clean_text_reference, 语料为表格报表中提取出的原始文本"""
+    html = make_report_tables(args.tables, args.rows)
+    soup = h2p.parse_html(html, args.parser)
+    corpus = [elem.get_text() for elem in soup.find_all(['td', 'th', 'h2'])]
+
+    def run(clean):
+        return [clean(text) for text in corpus]
+
+    def run_cold():
+        h2p._collapse_whitespace_cached.cache_clear()
+        return run(h2p.clean_text)
+
+    reference, reference_result = time_call(run, clean_text_reference, repeat=args.repeat)
+    cold, cold_result = time_call(run_cold, repeat=args.repeat)
+    warm, _ = time_call(run, h2p.clean_text, repeat=args.repeat)
+    info = h2p.text_cache_info()
+
+    containers = h2p.find_slides(soup)
+
+    def extract():
+        h2p._collapse_whitespace_cached.cache_clear()
+        return [h2p.extract_slide_content(c) for c in containers]
+
+    extract_seconds, _ = time_call(extract, repeat=args.repeat)
+    h2p_clean = h2p.clean_text
+    h2p.clean_text = clean_text_reference
+    try:
+        extract_reference, _ = time_call(extract, repeat=args.repeat)
+    finally:
+        h2p.clean_text = h2p_clean
+
+    print(f"{len(corpus)} 段文本 ({args.tables} 张表 x {args.rows} 行, "
+          f"{len(set(corpus))} 种不同取值)")
+    print(f"  正则替换:        {reference * 1000:8.1f} ms")
+    print(f"  clean_text 冷:   {cold * 1000:8.1f} ms  ({reference / cold:.2f}x)")
+    print(f"  clean_text 热:   {warm * 1000:8.1f} ms  ({reference / warm:.2f}x)")
+    print(f"  缓存命中:        {info.hits} / {info.hits + info.misses}")
+    print(f"  结果一致:        {reference_result == cold_result}")
+    print(f"  内容提取:        {extract_reference * 1000:8.1f} ms -> {extract_seconds * 1000:.1f} ms")
+
+
+def make_shared_documents(docs=20, slides=40, shared=0.5, **slide_options):
+    """生成 docs 份报告, 每份中约 shared 比例的页是各报告共用的样板页"""
+    boilerplate = [make_pipeline_slide_html(10000 + i, **slide_options) for i in range(8)]
+    documents = []
+    for d in range(docs):
+        body = []
+        for i in range(slides):
+            if (i * 7919 + d) % 100 < shared * 100:
+                body.append(boilerplate[i % len(boilerplate)])
+            else:
+                body.append(make_pipeline_slide_html(d * slides + i, **slide_options))
+        documents.append(f'<html><head><meta charset="utf-8"></head><body>{"".join(body)}</body></html>')
+    return documents
+
+
+def bench_content(args):
+    """对比无内容缓存与有内容缓存 (冷 / 热) 时整批报告的解析 + 提取耗时"""
+    documents = make_shared_documents(args.docs, args.slides, args.shared,
+                                      items=args.items, rows=args.rows, images=0)
+
+    def run(cache_factory):
+        cache = cache_factory()
+        contents = [h2p.extract_all_contents(html, args.parser, content_cache=cache)[0]
+                    for html in documents]
+        return contents, cache
+
+    warm_cache = h2p.ContentCache()
+    plain, (plain_result, _) = time_call(run, lambda: None, repeat=args.repeat)
+    cold, (cold_result, cold_cache) = time_call(run, h2p.ContentCache, repeat=args.repeat)
+    warm, _ = time_call(run, lambda: warm_cache, repeat=args.repeat)
+    stats = cold_cache.stats()
+
+    print(f"{args.docs} 份报告 x {args.slides} 页, 约 {args.shared:.0%} 为共用样板页")
+    print(f"  无缓存:   {plain * 1000:8.1f} ms")
+    print(f"  冷缓存:   {cold * 1000:8.1f} ms  ({plain / cold:.2f}x, 命中率 {stats['hit_rate']:.1%})")
+    print(f"  热缓存:   {warm * 1000:8.1f} ms  ({plain / warm:.2f}x)")
+    print(f"  结果一致: {plain_result == cold_result}")
+
+
+def make_hr_document(nodes, per_slide=20):
+    """生成 body 下有 nodes 个直接子节点、每 per_slide 个用一个 <hr> 分隔的文档"""
+    parts = []
+    for i in range(nodes):
+        position = i % per_slide
+        if position == per_slide - 1:
+            parts.append('<hr>')
+        elif position == 0:
+            parts.append(f'<h1>Slide {i // per_slide}</h1>')
+        elif position % 3:
+            parts.append(f'<p>Paragraph {i} with some text</p>')
+        else:
+            parts.append(f'<ul><li><strong>Point {i}</strong> detail</li></ul>')
+        parts.append('\n')
+    return f'<html><body>{"".join(parts)}</body></html>'
+
+
+def bench_hr(args):
+    """对比 split_on_hr (单次遍历, 不移动节点) 与逐个 extract 的原实现"""
+    print(f"{'节点数':>8} {'页数':>6} {'单次遍历':>10} {'逐个 extract':>14} {'加速比':>8}")
+    for nodes in args.nodes:
+        html = make_hr_document(nodes, args.per_slide)
+        soup = h2p.parse_html(html, args.parser)
+        fast, slices = time_call(h2p.split_on_hr, soup.body, repeat=args.repeat)
+
+        reference = None
+        if nodes <= args.reference_max:
+            # 原实现会改动文档, 每次都重新解析, 只计分隔本身的耗时
+            best = None
+            for _ in range(args.repeat):
+                fresh = h2p.parse_html(html, args.parser)
+                start = time.perf_counter()
+                split_on_hr_reference(fresh, fresh.body)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            reference = best
+
+        reference_text = f"{reference * 1000:12.1f}ms" if reference is not None else f"{'-':>14}"
+        speedup = f"{reference / fast:7.1f}x" if reference is not None else f"{'-':>8}"
+        print(f"{nodes:>8} {len(slices):>6} {fast * 1000:8.1f}ms {reference_text} {speedup}")
+
+
+def bench_boundaries(args):
+    """对比 SlideBoundaries 的一次遍历与原来逐级 find_all 的 find_slides"""
+    filler = ''.join(f'<div class="cell"><span>{i}</span></div>' for i in range(args.filler))
+    html = ''.join(f'<{args.tag}><h1>Slide {i}</h1><p>Text</p>{filler}</{args.tag}>'
+                   for i in range(args.slides))
+    html = f'<html><body>{html}</body></html>'
+    soup = h2p.parse_html(html, args.parser)
+
+    fast, fast_result = time_call(h2p.find_slides, soup, repeat=args.repeat)
+    reference, reference_result = time_call(find_slides_reference, soup,
+                                            repeat=args.repeat)
+
+    print(f"{args.slides} 个 <{args.tag}> 容器, 每个 {args.filler} 个填充元素 "
+          f"(HTML {len(html) / 1e6:.1f} MB)")
+    print(f"  一次遍历:   {fast * 1000:8.1f} ms")
+    print(f"  逐级查找:   {reference * 1000:8.1f} ms")
+    print(f"  加速比:     {reference / fast:8.2f}x")
+    print(f"  结果一致:   {fast_result == reference_result}")
+
+
+def bench_server(args):
+    """对比逐个启动命令行与通过 html_to_pptx_client.py 提交给常驻服务的单文件延迟"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    cli = os.path.join(here, 'html_to_pptx.py')
+    client = os.path.join(here, 'html_to_pptx_client.py')
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        inputs = []
+        for i in range(args.files):
+            path = os.path.join(temp_dir, f'report_{i}.html')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(make_document(args.slides, images=0))
+            inputs.append(path)
+
+        def run_each(command):
+            start = time.perf_counter()
+            for path in inputs:
+                subprocess.run(command(path), check=True, stdout=subprocess.DEVNULL)
+            return (time.perf_counter() - start) / len(inputs)
+
+        cli_seconds = run_each(lambda path: [sys.executable, cli, path,
+                                             path[:-5] + '.cli.pptx'])
+
+        server = h2p.ConversionServer(port=0, max_jobs=args.max_jobs, root=temp_dir)
+        token_file = server.write_token_file(os.path.join(temp_dir, 'token'))
+        warm_seconds = server.warm_up()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            client_seconds = run_each(lambda path: [sys.executable, client, '--no-fallback',
+                                                    '--server', server.url,
+                                                    '--token-file', token_file, path,
+                                                    path[:-5] + '.client.pptx'])
+            # 只算请求本身 (不含客户端解释器启动)
+            start = time.perf_counter()
+            for path in inputs:
+                request = urllib.request.Request(
+                    server.url + '/convert',
+                    data=json.dumps({'input': path, 'output': path[:-5] + '.http.pptx'}).encode(),
+                    headers={'Content-Type': 'application/json',
+                             h2p.SERVER_TOKEN_HEADER: server.token})
+                with urllib.request.urlopen(request) as response:
+                    response.read()
+            http_seconds = (time.perf_counter() - start) / len(inputs)
+        finally:
+            server.shutdown()
+
+    print(f"{args.files} 个文件, 每个 {args.slides} 页; 服务预热 {warm_seconds * 1000:.0f} ms")
+    print(f"  每次启动命令行:   {cli_seconds * 1000:8.1f} ms/文件")
+    print(f"  客户端 + 服务:    {client_seconds * 1000:8.1f} ms/文件 "
+          f"({cli_seconds / client_seconds:.1f}x)")
+    print(f"  直接 HTTP 请求:   {http_seconds * 1000:8.1f} ms/文件 "
+          f"({cli_seconds / http_seconds:.1f}x)")
+
+
+def make_parity_documents():
+    """一致性检查用的文档: 覆盖各种容器、<hr> 分隔、整页、带空格和中文的 URI 属性和带 XML 声明的 XHTML"""
+    sections = ''.join(f'<section><h1>Section {i}</h1><p>Text  {i}</p>'
+                       f'<ul><li><strong>Point</strong> detail {i}</li></ul></section>'
+                       for i in range(4))
+    articles = ''.join(f'<article><h2>Article {i}</h2><h3>Sub {i}</h3>'
+                       f'<table><tr><th>K</th><th>V</th></tr><tr><td>a{i}</td><td>b</td></tr>'
+                       f'</table></article>' for i in range(4))
+    return {
+        'slide-container': make_document(6, items=8, rows=6, cards=4, images=0, filler=5),
+        'section': f'<html><body>{sections}</body></html>',
+        'article': f'<html><body>{articles}</body></html>',
+        'hr': make_hr_document(60, per_slide=10),
+        'body': '<html><body><h1>Only page</h1><p>Body text</p></body></html>',
+        'uri': ('<html><body><div class="slide-container"><div class="slide-title">URI</div>'
+                '<img src="图 片.png" alt="a  b"><img src="%20escaped.png">'
+                '<ul><li><a href="x y.html">link</a></li></ul></div></body></html>'),
+        'xhtml': ('<?xml version="1.0" encoding="utf-8"?>\n'
+                  '<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN" '
+                  '"http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd">\n'
+                  '<html xmlns="http://www.w3.org/1999/xhtml"><head>'
+                  '<meta http-equiv="Content-Type" content="text/html; charset=utf-8"/></head>'
+                  '<body>' + ''.join(make_slide_html(i, items=4, rows=3, cards=2, images=0)
+                                     for i in range(3)) +
+                  '<div class="slide-container"><div class="slide-title">Ünïcode 中文</div>'
+                  '</div></body></html>'),
+    }
+
+
+def slide_xml(data):
+    """PPTX 字节中各幻灯片的 XML"""
+    prs = Presentation(io.BytesIO(data))
+    return [slide._element.xml for slide in prs.slides]
+
+
+def bench_parity(args):
+    """
+    一致性检查
+
+    - 各已安装的解析后端: find_slides + extract_slide_content 的结果与 html.parser 相同
+    - 各转换模式 (默认、stream、extract_workers、content_cache) 与默认模式
+      生成的幻灯片 XML 相同; 没有明确容器的文档不检查 stream (流式模式不支持)
+    """
+    # xhtml 用例故意按 HTML 解析, 与转换器的实际行为一致
+    warnings.filterwarnings('ignore', category=XMLParsedAsHTMLWarning)
+    documents = make_parity_documents()
+    for path in args.files:
+        with open(path, 'r', encoding='utf-8') as f:
+            documents[os.path.basename(path)] = f.read()
+
+    backends = [name for name in h2p.PARSER_BACKENDS
+                if h2p.builder_registry.lookup(name) is not None]
+    modes = {
+        'stream': {'stream': True},
+        'extract_workers': {'extract_workers': args.workers},
+        'content_cache': {'content_cache': h2p.ContentCache()},
+    }
+    columns = [f"{name}" for name in backends if name != 'html.parser'] + list(modes)
+    print(f"{'文档':<18}" + ''.join(f"{name:>16}" for name in columns))
+
+    def contents_with(html, backend):
+        soup = h2p.parse_html(html, backend)
+        return [h2p.extract_slide_content(container) for container in h2p.find_slides(soup)]
+
+    def same(name, label, func, expected):
+        """运行 func 并与 expected 比较; 出错也算不一致"""
+        try:
+            return func() == expected
+        except Exception as e:
+            print(f"  {name} / {label}: {type(e).__name__}: {e}")
+            return False
+
+    mismatches = 0
+    for name, html in documents.items():
+        cells = []
+        expected = contents_with(html, 'html.parser')
+        for backend in backends:
+            if backend != 'html.parser':
+                cells.append(same(name, backend, lambda: contents_with(html, backend), expected))
+
+        baseline = slide_xml(h2p.convert_html_to_pptx(html, None, parser=args.parser))
+        has_containers = bool(h2p.slide_boundaries().find(h2p.parse_html(html, 'html.parser')))
+        for mode, options in modes.items():
+            if mode == 'stream' and not has_containers:
+                cells.append(None)
+                continue
+            cells.append(same(name, mode, lambda: slide_xml(h2p.convert_html_to_pptx(
+                html, None, parser=args.parser, **options)), baseline))
+
+        mismatches += cells.count(False)
+        print(f"{name:<18}" + ''.join(
+            f"{'-' if ok is None else ('一致' if ok else '不同'):>16}" for ok in cells))
+
+    print(f"\n内容对比基准为 html.parser, 幻灯片 XML 对比基准为默认模式 ({h2p.resolve_parser(args.parser)})")
+    if mismatches:
+        print(f"{mismatches} 项不一致")
+        return 1
+    print("全部一致")
+    return 0
+
+
+# 默认的完整流程基准场景: 依次放大一个维度
+PIPELINE_SCENARIOS = [
+    {'name': 'baseline', 'slides': 20, 'items': 5, 'rows': 5, 'cards': 4, 'images': 1},
+    {'name': 'many-slides', 'slides': 200, 'items': 5, 'rows': 5, 'cards': 4, 'images': 1},
+    {'name': 'long-lists', 'slides': 20, 'items': 60, 'rows': 5, 'cards': 4, 'images': 1},
+    {'name': 'big-tables', 'slides': 20, 'items': 5, 'rows': 500, 'cards': 4, 'images': 1},
+    {'name': 'many-cards', 'slides': 20, 'items': 5, 'rows': 5, 'cards': 40, 'images': 1},
+    {'name': 'many-images', 'slides': 20, 'items': 5, 'rows': 5, 'cards': 4, 'images': 4},
+]
+
+PIPELINE_PHASES = ('read', 'parse', 'find_slides', 'extract_slide_content',
+                   'images', 'create_slide', 'save')
+
+
+def run_pipeline(html_path, parser=None, image_workers=8):
+    """分阶段执行一次完整转换, 返回 {阶段: 秒} 和统计信息"""
+    timings = {}
+
+    def timed(phase, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[phase] = time.perf_counter() - start
+        return result
+
+    def read():
+        with open(html_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    html = timed('read', read)
+    soup = timed('parse', h2p.parse_html, html, parser)
+    containers = timed('find_slides', h2p.find_slides, soup)
+    contents = timed('extract_slide_content',
+                     lambda: [h2p.extract_slide_content(c) for c in containers])
+
+    prs = h2p.new_presentation()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        images = h2p.ImageRegistry(temp_dir)
+        sources = [src for content in contents for src in h2p.slide_image_sources(content)]
+        timed('images', images.prefetch, sources, image_workers)
+
+        def build():
+            for content in contents:
+                h2p.create_slide(prs, content, temp_dir, theme=h2p.DEFAULT_THEME,
+                                 images=images)
+        timed('create_slide', build)
+
+        output = os.path.join(temp_dir, 'out.pptx')
+        timed('save', prs.save, output)
+        pptx_bytes = os.path.getsize(output)
+
+    stats = {
+        'slides': len(contents),
+        'shapes': sum(len(slide.shapes) for slide in prs.slides),
+        'html_bytes': len(html.encode('utf-8')),
+        'pptx_bytes': pptx_bytes,
+    }
+    return timings, stats
+
+
+def bench_pipeline(args):
+    """按场景分阶段测量完整转换流程, 可写出 JSON 结果"""
+    server, image_base = start_image_server((args.image_width, args.image_height),
+                                            warm=args.image_pool)
+    scenarios = PIPELINE_SCENARIOS
+    if args.scenario:
+        scenarios = [sc for sc in scenarios if sc['name'] in args.scenario]
+
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for scenario in scenarios:
+                params = {k: v for k, v in scenario.items() if k != 'name'}
+                html = make_pipeline_document(image_base=image_base,
+                                              image_pool=args.image_pool, **params)
+                html_path = os.path.join(temp_dir, scenario['name'] + '.html')
+                with open(html_path, 'w', encoding='utf-8') as f:
+                    f.write(html)
+
+                runs = [run_pipeline(html_path, args.parser) for _ in range(args.repeat)]
+                # 每个阶段取多次运行中的最短耗时
+                phases = {phase: min(timings[phase] for timings, _ in runs)
+                          for phase in PIPELINE_PHASES}
+                stats = runs[-1][1]
+                results.append({'name': scenario['name'], 'params': params,
+                                'phases': phases, 'total': sum(phases.values()), **stats})
+
+                print(f"{scenario['name']:<12} {stats['slides']:>4} 页 "
+                      f"{stats['shapes']:>6} 形状  总计 {sum(phases.values()) * 1000:8.1f} ms")
+                print("    " + "  ".join(f"{phase}={phases[phase] * 1000:.1f}"
+                                         for phase in PIPELINE_PHASES))
+    finally:
+        server.shutdown()
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parser': h2p.resolve_parser(args.parser),
+            'repeat': args.repeat,
+        },
+        'scenarios': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.output}")
+    return report
+
+
+def bench_compare(args):
+    """对比两份 pipeline 结果, 标出变慢超过阈值的阶段"""
+    def load(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return {sc['name']: {**sc['phases'], 'total': sc['total']}
+                    for sc in json.load(f)['scenarios']}
+
+    baseline = load(args.baseline)
+    current = load(args.current)
+
+    regressions = 0
+    for name, phases in current.items():
+        if name not in baseline:
+            continue
+        print(name)
+        for phase in PIPELINE_PHASES + ('total',):
+            old = baseline[name].get(phase)
+            new = phases.get(phase)
+            if old is None or new is None:
+                continue
+            ratio = new / old if old > 0 else float('inf')
+            flag = ''
+            # 小于 1 ms 的阶段噪声太大, 不判断回退
+            if ratio > 1 + args.threshold and new - old > 0.001:
+                flag = '  <-- 变慢'
+                regressions += 1
+            print(f"    {phase:<22} {old * 1000:9.1f} ms -> {new * 1000:9.1f} ms "
+                  f"({ratio:5.2f}x){flag}")
+    return 1 if regressions else 0
+
+
+def add_document_arguments(parser, slides=50):
+    """合成文档的公共参数"""
+    parser.add_argument('--slides', type=int, default=slides)
+    parser.add_argument('--items', type=int, default=50)
+    parser.add_argument('--rows', type=int, default=50)
+    parser.add_argument('--cards', type=int, default=4)
+    parser.add_argument('--images', type=int, default=1)
+    parser.add_argument('--filler', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--parser', default='auto')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="html_to_pptx 性能基准")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    extract = subparsers.add_parser('extract', help="对比两种内容提取实现")
+    add_document_arguments(extract)
+    extract.set_defaults(func=bench_extract)
+
+    parallel = subparsers.add_parser('parallel', help="对比串行与多进程并行提取")
+    add_document_arguments(parallel, slides=400)
+    parallel.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parallel.set_defaults(func=bench_parallel)
+
+    template = subparsers.add_parser('template', help="对比普通建页与模板模式")
+    template.add_argument('--slides', type=int, default=120)
+    template.add_argument('--items', type=int, default=6)
+    template.add_argument('--cards', type=int, default=4)
+    template.add_argument('--repeat', type=int, default=3)
+    template.add_argument('--parser', default='auto')
+    template.set_defaults(func=bench_template)
+
+    textbox = subparsers.add_parser('textbox', help="对比 add_text_box 的两种实现")
+    textbox.add_argument('--slides', type=int, default=50)
+    textbox.add_argument('--boxes', type=int, default=40)
+    textbox.add_argument('--repeat', type=int, default=3)
+    textbox.set_defaults(func=bench_textbox)
+
+    table = subparsers.add_parser('table', help="对比表格的两种生成方式")
+    table.add_argument('--rows', type=int, default=2000)
+    table.add_argument('--cols', type=int, default=5)
+    table.add_argument('--repeat', type=int, default=3)
+    table.set_defaults(func=bench_table)
+
+    text = subparsers.add_parser('text', help="对比 clean_text 的两种实现")
+    text.add_argument('--tables', type=int, default=200)
+    text.add_argument('--rows', type=int, default=200)
+    text.add_argument('--repeat', type=int, default=3)
+    text.add_argument('--parser', default='auto')
+    text.set_defaults(func=bench_text)
+
+    content = subparsers.add_parser('content', help="对比有无内容缓存的提取耗时")
+    content.add_argument('--docs', type=int, default=20)
+    content.add_argument('--slides', type=int, default=40)
+    content.add_argument('--shared', type=float, default=0.5, help="共用样板页的比例")
+    content.add_argument('--items', type=int, default=10)
+    content.add_argument('--rows', type=int, default=10)
+    content.add_argument('--repeat', type=int, default=3)
+    content.add_argument('--parser', default='auto')
+    content.set_defaults(func=bench_content)
+
+    boundaries = subparsers.add_parser('boundaries', help="幻灯片边界查找")
+    boundaries.add_argument('--slides', type=int, default=500)
+    boundaries.add_argument('--filler', type=int, default=50)
+    boundaries.add_argument('--tag', default='article',
+                            help="容器标签 (article 为默认规则的最后一级, 逐级查找最慢)")
+    boundaries.add_argument('--repeat', type=int, default=3)
+    boundaries.add_argument('--parser', default='auto')
+    boundaries.set_defaults(func=bench_boundaries)
+
+    server = subparsers.add_parser('server', help="常驻服务与逐次启动命令行的单文件延迟")
+    server.add_argument('--files', type=int, default=20)
+    server.add_argument('--slides', type=int, default=3)
+    server.add_argument('--max-jobs', type=int, default=h2p.SERVER_MAX_JOBS)
+    server.set_defaults(func=bench_server)
+
+    hr = subparsers.add_parser('hr', help="<hr> 分隔的扩展性")
+    hr.add_argument('--nodes', type=int, nargs='+', default=[1000, 10000, 100000])
+    hr.add_argument('--per-slide', type=int, default=20)
+    hr.add_argument('--reference-max', type=int, default=20000,
+                    help="原实现只测到这么多节点 (太大时很慢)")
+    hr.add_argument('--repeat', type=int, default=3)
+    hr.add_argument('--parser', default='auto')
+    hr.set_defaults(func=bench_hr)
+
+    pipeline = subparsers.add_parser('pipeline', help="分阶段测量完整转换流程")
+    pipeline.add_argument('--scenario', action='append',
+                          help="只运行指定场景 (可重复): " +
+                               ", ".join(sc['name'] for sc in PIPELINE_SCENARIOS))
+    pipeline.add_argument('--image-pool', type=int, default=10, help="不同图片的数量")
+    pipeline.add_argument('--image-width', type=int, default=800)
+    pipeline.add_argument('--image-height', type=int, default=600)
+    pipeline.add_argument('--repeat', type=int, default=3)
+    pipeline.add_argument('--parser', default='auto')
+    pipeline.add_argument('--output', help="结果 JSON 文件")
+    pipeline.set_defaults(func=bench_pipeline)
+
+    parity = subparsers.add_parser('parity', help="各解析后端和转换模式的结果一致性检查")
+    parity.add_argument('files', nargs='*', help="额外检查的 HTML 文件")
+    parity.add_argument('--workers', type=int, default=2, help="extract_workers 模式的进程数")
+    parity.add_argument('--parser', default='auto')
+    parity.set_defaults(func=bench_parity)
+
+    compare = subparsers.add_parser('compare', help="对比两份 pipeline 结果")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=0.10,
+                         help="判定为变慢的相对阈值 (默认 0.10 即 10%%)")
+    compare.set_defaults(func=bench_compare)
+
+    args = parser.parse_args()
+    status = args.func(args)
+    if isinstance(status, int):
+        raise SystemExit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,17 +19,48 @@ Usage:
     python html_to_pptx.py input.html output.pptx
 """
 
+import io
 import os
 import re
+import sys
+import base64
+import asyncio
+import glob
+import json
+import functools
+import time
+import random
+import hashlib
+import hmac
+import secrets
+import shutil
 import tempfile
+import threading
+import copy
+import weakref
+from collections import OrderedDict
 import requests
-from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+import urllib3
+from requests.adapters import HTTPAdapter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from pathlib import Path
+from urllib.parse import urljoin, urlparse, urlsplit, unquote_to_bytes
+from urllib.request import url2pathname
+from bs4 import BeautifulSoup, Comment, Tag
+from bs4.builder import builder_registry
+import pptx
 from pptx import Presentation
 from pptx.util import Inches, Pt, Emu
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.enum.shapes import MSO_SHAPE
+from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls
+from pptx.parts.slide import SlideLayoutPart
+from lxml import etree
 
 
 # ============== 配置常量 ==============
@@ -72,30 +103,975 @@ class ThemeColors:
 # 默认主题
 DEFAULT_THEME = ThemeColors()
 
+# 图片缓存默认位置和容量
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "html_to_pptx", "images")
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# HTML 解析后端, 按速度从快到慢排列
+PARSER_BACKENDS = ('lxml', 'html5lib', 'html.parser')
+
+EMU_PER_INCH = 914400
+
+# data: URL 内嵌图片的解码上限和分块大小
+DATA_URL_MAX_BYTES = 64 * 1024 * 1024
+DATA_URL_CHUNK_SIZE = 1024 * 1024
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# 图片下载的超时、重试和熔断默认值
+HTTP_TIMEOUT = 10.0
+HTTP_DEADLINE = 30.0
+HTTP_RETRIES = 3
+HTTP_PER_HOST_LIMIT = 4
+HTTP_POOL_SIZE = 16
+
+
+# ============== 图片下载 HTTP 客户端 ==============
+
+class CircuitOpenError(requests.RequestException):
+    """主机处于熔断期, 请求未发出即被拒绝"""
+
+
+class ImageHttpClient:
+    """
+    图片下载共用的 HTTP 客户端
+
+    - 共享一个带连接池的 requests.Session, 同一主机的 TCP/TLS 连接跨图片复用
+    - 每个主机同时进行的请求不超过 per_host_limit 个
+    - timeout 为单次请求的时限, deadline 为单张图片 (含重试和退避等待) 的总时限;
+      get 还可传入绝对截止时间 (time.monotonic), 用于限制整次转换的下载总时长
+    - 5xx、429、超时和连接错误按指数退避加随机抖动重试, 最多 retries 次
+    - 某主机连续 breaker_threshold 张图片下载失败后熔断 breaker_cooldown 秒,
+      期间对该主机的请求立即失败; 冷却结束后放行一个试探请求, 成功则恢复
+    """
+
+    RETRY_STATUS = frozenset((429, 500, 502, 503, 504))
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, timeout=HTTP_TIMEOUT, deadline=HTTP_DEADLINE, retries=HTTP_RETRIES,
+                 backoff=0.5, max_backoff=8.0, per_host_limit=HTTP_PER_HOST_LIMIT,
+                 pool_size=HTTP_POOL_SIZE, breaker_threshold=5, breaker_cooldown=60.0):
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.per_host_limit = per_host_limit
+        self.pool_size = pool_size
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._init_runtime_state()
+
+    def _init_runtime_state(self):
+        self._session = None
+        self._lock = threading.Lock()
+        self._host_slots = {}
+        self._breakers = {}
+        self._stats = {'requests': 0, 'retries': 0, 'failures': 0, 'rejected': 0}
+
+    # 进程池 (批量模式) 中传递时只保留配置, 连接池在各进程中重新建立
+    def __getstate__(self):
+        return {key: value for key, value in self.__dict__.items()
+                if not key.startswith('_')}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_runtime_state()
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_size,
+                                      pool_maxsize=self.pool_size, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers['User-Agent'] = USER_AGENT
+                self._session = session
+            return self._session
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['open_circuits'] = sorted(
+                host for host, (failures, _, _) in self._breakers.items()
+                if failures >= self.breaker_threshold
+            )
+        return stats
+
+    def _host_slot(self, host):
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return slot
+
+    def _enter_breaker(self, host):
+        """熔断中的主机直接拒绝; 冷却结束后只放行一个试探请求"""
+        if not self.breaker_threshold:
+            return
+        with self._lock:
+            state = self._breakers.get(host)
+            if state is None or state[0] < self.breaker_threshold:
+                return
+            if time.monotonic() - state[1] < self.breaker_cooldown or state[2]:
+                self._stats['rejected'] += 1
+                raise CircuitOpenError(f"主机 {host} 连续 {state[0]} 次下载失败, 已熔断")
+            state[2] = True
+
+    def _record(self, host, ok):
+        with self._lock:
+            if ok:
+                self._breakers.pop(host, None)
+                return
+            self._stats['failures'] += 1
+            # [连续失败次数, 熔断开始时间, 是否有试探请求进行中]
+            state = self._breakers.setdefault(host, [0, 0.0, False])
+            state[0] += 1
+            state[2] = False
+            if self.breaker_threshold and state[0] >= self.breaker_threshold:
+                state[1] = time.monotonic()
+
+    def _retry_delay(self, attempt, response):
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        retry_after = response.headers.get('Retry-After', '') if response is not None else ''
+        if retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), self.max_backoff))
+        return delay
+
+    def _request(self, url, headers, host, end):
+        """发出一次请求并在时限内读完响应体"""
+        timeout = self.timeout
+        if end is not None:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                raise requests.Timeout(f"超过下载时限: {url}")
+            timeout = min(timeout, remaining) if timeout else remaining
+
+        slot = self._host_slot(host)
+        if not slot.acquire(timeout=timeout):
+            raise requests.Timeout(f"等待主机 {host} 的空闲连接超时")
+        try:
+            with self._lock:
+                self._stats['requests'] += 1
+            response = self.session.get(url, headers=headers, timeout=timeout, stream=True)
+            try:
+                response._content = self._read_body(response, url, end)
+            except Exception:
+                response.close()
+                raise
+            return response
+        finally:
+            slot.release()
+
+    def _read_body(self, response, url, end):
+        """读取响应体; requests 的 timeout 只限制单次读取, 这里逐块检查总时限"""
+        read1 = getattr(response.raw, 'read1', None)
+        if end is None or read1 is None:
+            return response.content
+
+        # read1 有多少数据就返回多少, 慢速发送的服务器也能及时检查时限
+        chunks = []
+        try:
+            while True:
+                chunk = read1(self.CHUNK_SIZE, decode_content=True)
+                if not chunk:
+                    return b''.join(chunks)
+                chunks.append(chunk)
+                if time.monotonic() > end:
+                    raise requests.Timeout(f"超过下载时限: {url}")
+        except urllib3.exceptions.ReadTimeoutError as e:
+            raise requests.Timeout(e)
+        except (urllib3.exceptions.ProtocolError, urllib3.exceptions.DecodeError) as e:
+            raise requests.ConnectionError(e)
+
+    def get(self, url, headers=None, deadline=None):
+        """
+        GET 请求, 按配置重试; 返回 requests.Response (含已读完的响应体)
+
+        deadline: 绝对截止时间 (time.monotonic), 与单张图片的总时限取较早者
+        重试用尽后返回最后一次的 5xx/429 响应, 或抛出最后一次的超时/连接错误。
+        """
+        host = urlparse(url).netloc
+        self._enter_breaker(host)
+
+        end = time.monotonic() + self.deadline if self.deadline else None
+        if deadline is not None:
+            end = deadline if end is None else min(end, deadline)
+
+        attempt = 0
+        while True:
+            response = error = None
+            try:
+                response = self._request(url, headers, host, end)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                error = e
+            except Exception:
+                self._record(host, False)
+                raise
+
+            if response is not None and response.status_code not in self.RETRY_STATUS:
+                self._record(host, True)
+                return response
+
+            delay = self._retry_delay(attempt, response)
+            if attempt >= self.retries or (end is not None and time.monotonic() + delay >= end):
+                self._record(host, False)
+                if response is not None:
+                    return response
+                raise error
+
+            attempt += 1
+            with self._lock:
+                self._stats['retries'] += 1
+            time.sleep(delay)
+
+
+_default_http_client = None
+_default_http_client_lock = threading.Lock()
+
+
+def default_http_client():
+    """进程内共享的默认图片下载客户端 (首次使用时创建)"""
+    global _default_http_client
+    with _default_http_client_lock:
+        if _default_http_client is None:
+            _default_http_client = ImageHttpClient()
+        return _default_http_client
+
+
+# ============== 图片缓存 ==============
+
+class ImageCache:
+    """跨运行、跨进程共享的图片磁盘缓存
+
+    - 以 URL 为键, 图片内容按 SHA-256 寻址存储 (相同内容只存一份)
+    - 通过 ETag / Last-Modified 条件请求重新验证
+    - 总大小超过 max_bytes 时按最近使用时间 (LRU) 淘汰, 同时删除指向被淘汰对象的索引
+    - max_age 秒内验证过的条目直接使用, 不再发请求 (默认每次都验证)
+    - 转换时用 checkout 把对象硬链接到本次转换的临时目录, 其他进程随后淘汰该对象
+      也不影响尚未嵌入的图片
+
+    目录结构:
+        <cache_dir>/index/<sha256(url)>.json   URL 索引 (验证信息 + 对象名)
+        <cache_dir>/objects/<sha256(内容)><ext> 图片内容
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_CACHE_MAX_BYTES, max_age=0):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.index_dir = os.path.join(self.cache_dir, "index")
+        self.objects_dir = os.path.join(self.cache_dir, "objects")
+        os.makedirs(self.index_dir, exist_ok=True)
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0, 'misses': 0, 'revalidated': 0, 'evictions': 0,
+            'bytes_saved': 0, 'bytes_downloaded': 0,
+        }
+        self._total_bytes = self._scan_total_bytes()
+
+    # ----- 内部工具 -----
+
+    def _index_path(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.index_dir, key + ".json")
+
+    def _scan_total_bytes(self):
+        total = 0
+        for entry in os.scandir(self.objects_dir):
+            try:
+                total += entry.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def _atomic_write(self, path, data):
+        """先写临时文件再替换, 保证其他进程不会读到半个文件"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _write_entry(self, url, entry):
+        data = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+        self._atomic_write(self._index_path(url), data)
+
+    def _count(self, **deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self._stats[key] += value
+
+    # ----- 公开接口 -----
+
+    def lookup(self, url):
+        """返回 URL 的缓存条目; 不存在或对象已被淘汰时返回 None"""
+        try:
+            with open(self._index_path(url), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        entry['path'] = os.path.join(self.objects_dir, entry['object'])
+        if not os.path.exists(entry['path']):
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        """条目是否在 max_age 内验证过, 可以不发请求直接使用"""
+        return self.max_age > 0 and time.time() - entry.get('checked_at', 0) < self.max_age
+
+    def validators(self, entry):
+        """构造条件请求头"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def hit(self, url, entry, revalidated=False, headers=None):
+        """
+        记录一次命中并刷新 LRU 时间, 返回本地路径
+
+        revalidated 表示经条件请求确认 (304); headers 为 304 响应头,
+        其中的新 ETag / Last-Modified 用于以后的条件请求。
+        """
+        now = time.time()
+        try:
+            os.utime(entry['path'], (now, now))
+        except OSError:
+            pass
+        if revalidated:
+            entry = {k: v for k, v in entry.items() if k != 'path'}
+            entry['checked_at'] = now
+            headers = headers or {}
+            if headers.get('ETag'):
+                entry['etag'] = headers['ETag']
+            if headers.get('Last-Modified'):
+                entry['last_modified'] = headers['Last-Modified']
+            self._write_entry(url, entry)
+        self._count(hits=1, revalidated=int(revalidated), bytes_saved=entry['size'])
+        return os.path.join(self.objects_dir, entry['object'])
+
+    def store(self, url, content, headers=None, ext=".jpg"):
+        """保存下载到的图片, 返回本地路径"""
+        headers = headers or {}
+        digest = hashlib.sha256(content).hexdigest()
+        object_name = digest + ext
+        object_path = os.path.join(self.objects_dir, object_name)
+
+        added_bytes = 0
+        if not os.path.exists(object_path):
+            self._atomic_write(object_path, content)
+            added_bytes = len(content)
+
+        self._write_entry(url, {
+            'url': url,
+            'object': object_name,
+            'size': len(content),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'checked_at': time.time(),
+        })
+
+        with self._lock:
+            self._stats['misses'] += 1
+            self._stats['bytes_downloaded'] += len(content)
+            self._total_bytes += added_bytes
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self.evict(keep=object_path)
+        return object_path
+
+    def checkout(self, path, temp_dir):
+        """
+        把缓存对象硬链接 (不支持时复制) 到 temp_dir, 返回新路径
+
+        之后其他进程淘汰该对象只删除缓存中的链接, 本次转换仍可读取;
+        对象在此之前已被淘汰时返回 None。
+        """
+        target = os.path.join(temp_dir, os.path.basename(path))
+        if os.path.exists(target):
+            return target
+        try:
+            os.link(path, target)
+        except FileExistsError:
+            pass
+        except FileNotFoundError:
+            return None
+        except OSError:
+            # 跨文件系统或不支持硬链接: 复制到临时文件再改名, 其他线程不会读到半个文件
+            fd, tmp_path = tempfile.mkstemp(dir=temp_dir, suffix=".tmp")
+            os.close(fd)
+            try:
+                shutil.copyfile(path, tmp_path)
+            except FileNotFoundError:
+                os.remove(tmp_path)
+                return None
+            os.replace(tmp_path, target)
+        return target
+
+    def evict(self, keep=None):
+        """按最近使用时间淘汰对象, 直到总大小不超过 max_bytes; 同时删除失效的索引"""
+        objects = []
+        for entry in os.scandir(self.objects_dir):
+            if entry.name.endswith(".tmp"):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            objects.append((st.st_mtime, st.st_size, entry.path))
+
+        total = sum(size for _, size, _ in objects)
+        evicted = 0
+        for _, size, path in sorted(objects):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        if evicted:
+            self._prune_index()
+
+        with self._lock:
+            self._total_bytes = total
+            self._stats['evictions'] += evicted
+
+    def _prune_index(self):
+        """删除对象已不存在的 URL 索引 (store 先写对象再写索引, 所以这些对象确已淘汰)"""
+        for entry in os.scandir(self.index_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                with open(entry.path, 'r', encoding='utf-8') as f:
+                    object_name = json.load(f)['object']
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            if not os.path.exists(os.path.join(self.objects_dir, object_name)):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def stats(self):
+        """返回本实例的统计信息 (hits, misses, bytes_saved 等)"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+# ============== 图片优化 ==============
+
+class ImageOptimizer:
+    """
+    嵌入前按显示尺寸缩小并重新压缩图片
+
+    - 按图片在幻灯片上的显示框 (英寸) 和 dpi 计算所需像素, 只缩小不放大,
+      保持宽高比 (缩放后两个方向都不低于所需像素)
+    - 无透明通道的图片重新编码为 JPEG (jpeg_quality), 有透明通道的保存为优化的 PNG
+    - 结果按 "源图片摘要 + 目标像素尺寸 + 编码参数" 缓存; 提供 cache_dir 时
+      缓存跨运行保留, 否则写入本次转换的临时目录
+    - 优化后不比原图小时直接使用原图
+    """
+
+    def __init__(self, dpi=150, jpeg_quality=85, cache_dir=None):
+        self.dpi = dpi
+        self.jpeg_quality = jpeg_quality
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._init_runtime_state()
+
+    def _init_runtime_state(self):
+        self._lock = threading.Lock()
+        self._results = {}
+        self._digests = {}
+        self._stats = {'images': 0, 'optimized': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    # 进程池 (批量模式) 中传递时只保留配置
+    def __getstate__(self):
+        return {'dpi': self.dpi, 'jpeg_quality': self.jpeg_quality,
+                'cache_dir': self.cache_dir}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_runtime_state()
+
+    def _source_digest(self, path):
+        st = os.stat(path)
+        key = (path, st.st_mtime_ns, st.st_size)
+        digest = self._digests.get(key)
+        if digest is None:
+            digest = file_digest(path)
+            self._digests[key] = digest
+        return digest
+
+    def target_pixels(self, size, box):
+        """根据原始像素尺寸和显示框 (英寸, 高度可为 None) 计算目标像素尺寸"""
+        width_px, height_px = size
+        box_width, box_height = box
+        scale = box_width * self.dpi / width_px
+        if box_height:
+            scale = max(scale, box_height * self.dpi / height_px)
+        if scale >= 1:
+            return size
+        return max(1, round(width_px * scale)), max(1, round(height_px * scale))
+
+    def optimize(self, path, box_width, box_height=None, out_dir=None):
+        """
+        返回适合在 (box_width x box_height) 英寸框中显示的图片
+
+        path 可以是本地路径或 InlineImage; 内存图片在没有 cache_dir 时
+        优化结果也保留在内存中 (InlineImage), 不写临时文件。
+
+        Returns:
+            (图片路径或 InlineImage, 原始字节数, 优化后字节数)
+        """
+        from PIL import Image
+
+        inline = isinstance(path, InlineImage)
+        original_size = path.size if inline else os.path.getsize(path)
+        digest = path.digest if inline else self._source_digest(path)
+        params = (self.dpi, self.jpeg_quality, round(box_width, 3),
+                  round(box_height, 3) if box_height else None)
+        key = (digest,) + params
+
+        with self._lock:
+            cached = self._results.get(key)
+        if cached and (isinstance(cached[0], InlineImage) or os.path.exists(cached[0])):
+            return cached
+
+        result = (path, original_size, original_size)
+        try:
+            with Image.open(path.open() if inline else path) as img:
+                if getattr(img, 'is_animated', False) or img.format not in ('JPEG', 'PNG', 'BMP', 'TIFF', 'WEBP'):
+                    raise ValueError(f"不处理的图片格式: {img.format}")
+
+                target = self.target_pixels(img.size, (box_width, box_height))
+                has_alpha = img.mode in ('RGBA', 'LA', 'PA') or (
+                    img.mode == 'P' and 'transparency' in img.info)
+                ext = '.png' if has_alpha else '.jpg'
+
+                def encode(target_file):
+                    resized = img.resize(target, Image.LANCZOS) if target != img.size else img
+                    if has_alpha:
+                        resized.convert('RGBA').save(target_file, 'PNG', optimize=True)
+                    else:
+                        resized.convert('RGB').save(target_file, 'JPEG', quality=self.jpeg_quality,
+                                                    optimize=True, progressive=True)
+
+                if inline and not self.cache_dir:
+                    buffer = io.BytesIO()
+                    encode(buffer)
+                    optimized = InlineImage(buffer.getvalue())
+                    optimized_size = optimized.size
+                else:
+                    name = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()[:32] + ext
+                    target_dir = self.cache_dir or out_dir or tempfile.gettempdir()
+                    optimized = os.path.join(target_dir, name)
+                    if not os.path.exists(optimized):
+                        tmp_path = optimized + f".{os.getpid()}.{threading.get_ident()}.tmp"
+                        encode(tmp_path)
+                        os.replace(tmp_path, optimized)
+                    optimized_size = os.path.getsize(optimized)
+
+                if optimized_size < original_size:
+                    result = (optimized, original_size, optimized_size)
+        except Exception as e:
+            print(f"警告: 无法优化图片 {path}: {e}")
+
+        with self._lock:
+            self._results[key] = result
+            self._stats['images'] += 1
+            self._stats['optimized'] += int(result[0] is not path)
+            self._stats['bytes_in'] += result[1]
+            self._stats['bytes_out'] += result[2]
+        return result
+
+    def stats(self):
+        """累计统计: 处理图片数、实际优化数、原始/优化后字节数、节省字节数"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['bytes_saved'] = stats['bytes_in'] - stats['bytes_out']
+        return stats
+
+
+# ============== 性能埋点 ==============
+
+def peak_rss_bytes():
+    """当前进程的峰值常驻内存 (字节); 无法获取时返回 None"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss)
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB, macOS 为字节
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class JsonLinesSink:
+    """把埋点事件逐行写成 JSON (JSON Lines), 可写入文件路径或已打开的文本流"""
+
+    def __init__(self, target):
+        if hasattr(target, 'write'):
+            self._stream, self._owns_stream = target, False
+        else:
+            self._stream, self._owns_stream = open(target, 'a', encoding='utf-8'), True
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+    def close(self):
+        if self._owns_stream:
+            self._stream.close()
+
+
+class EventCollector:
+    """在进程内收集埋点事件, 便于测试或在调用方做汇总"""
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            self.events.append(event)
+
+    def of_type(self, event_type):
+        """返回指定类型的事件列表"""
+        return [e for e in self.events if e['event'] == event_type]
+
+    def phases(self):
+        """返回 {阶段名: 累计秒数}"""
+        totals = {}
+        for e in self.of_type('phase'):
+            totals[e['phase']] = totals.get(e['phase'], 0.0) + e['seconds']
+        return totals
+
+
+class Instrumentation:
+    """
+    转换过程的结构化埋点
+
+    sink 是接收事件字典的可调用对象 (如 JsonLinesSink、EventCollector);
+    为 None 时所有埋点都是空操作。每个事件都带有 event 类型、时间戳
+    和构造时传入的上下文字段 (如输入文件名)。
+
+    事件类型:
+        phase  各阶段耗时 (read, parse, find_slides, extract, images, build, save)
+        image  单张图片的下载耗时、字节数和结果
+        slide  单页的提取耗时、建页耗时和形状数量
+        run    整次转换的总耗时、页数和峰值内存
+        content_cache  本次转换中内容缓存的命中数、未命中数和命中率
+    """
+
+    def __init__(self, sink=None, **context):
+        self.sink = sink
+        self.context = context
+
+    @property
+    def enabled(self):
+        return self.sink is not None
+
+    def emit(self, event_type, **fields):
+        if self.sink is None:
+            return
+        event = {'event': event_type, 'time': time.time()}
+        event.update(self.context)
+        event.update(fields)
+        self.sink(event)
+
+    @contextmanager
+    def phase(self, name, **fields):
+        """统计 with 语句块的耗时并发出 phase 事件"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.emit('phase', phase=name, seconds=time.perf_counter() - start, **fields)
+
+
+# 不做任何记录的默认埋点
+NO_INSTRUMENTATION = Instrumentation()
+
+
+# ============== 单次转换的图片登记表 ==============
+
+class ImageRegistry:
+    """单次转换内的图片登记表
+
+    - 解析后的 URL -> 本地路径: 同一张图片只下载一次
+    - 本地路径 -> ImagePart: 同一张图片在 PPTX 包中只嵌入一份,
+      后续幻灯片直接引用已有的图片部件, 不再重复读取和计算摘要
+    - data: URL 在内存中解码为 InlineImage, 不写临时文件;
+      内容相同的载荷按摘要合并为同一个对象
+    - 远程图片经 http_client (默认共享的 ImageHttpClient) 下载;
+      deadline 为本次转换下载图片的绝对截止时间 (time.monotonic)
+    - image_root 为目录时只读取该目录下的本地图片, 为 False 时不读取任何本地图片
+      (常驻服务用), 默认 None 不限制
+    """
+
+    def __init__(self, temp_dir, base_url=None, cache=None, instrumentation=None,
+                 optimizer=None, http_client=None, deadline=None, image_root=None):
+        self.temp_dir = temp_dir
+        self.base_url = base_url
+        self.image_root = image_root
+        self.cache = cache
+        self.http_client = http_client
+        self.deadline = deadline
+        self.instrumentation = instrumentation or NO_INSTRUMENTATION
+        self.optimizer = optimizer
+        self._paths = {}
+        self._parts = {}
+        self._optimized = {}
+        self._inline = {}
+        self._lock = threading.Lock()
+        # get_path 持有 _lock 时会调用 _fetch, 合并内嵌图片需另用一把锁
+        self._inline_lock = threading.Lock()
+
+    def resolve(self, src):
+        """把相对路径解析为绝对 URL"""
+        if self.base_url and url_scheme(src) not in ('http', 'https', 'data'):
+            return urljoin(self.base_url, src)
+        return src
+
+    def _fetch(self, url):
+        if self.image_root is not None and url_scheme(url) not in ('http', 'https', 'data'):
+            path = local_image_path(url)
+            if not self.image_root or path is None or not is_within(path, self.image_root):
+                print(f"警告: 不允许读取本地图片 {url}")
+                return None
+        if url_scheme(url) != 'data':
+            return download_image(url, self.temp_dir, cache=self.cache,
+                                  client=self.http_client, deadline=self.deadline)
+
+        image = decode_data_url(url)
+        if image is None:
+            return None
+        with self._inline_lock:
+            return self._inline.setdefault(image.digest, image)
+
+    def _download(self, url):
+        if not self.instrumentation.enabled:
+            return self._fetch(url)
+
+        start = time.perf_counter()
+        path = self._fetch(url)
+        if isinstance(path, InlineImage):
+            size = path.size
+        else:
+            size = os.path.getsize(path) if path else 0
+        self.instrumentation.emit(
+            'image', url=url[:200], seconds=time.perf_counter() - start,
+            bytes=size, status='ok' if path else 'failed',
+        )
+        return path
+
+    def prefetch(self, sources, max_workers=8):
+        """用线程池并发下载尚未登记的图片"""
+        urls = [self.resolve(src) for src in sources if src]
+        pending = [url for url in dict.fromkeys(urls) if url not in self._paths]
+        if not pending:
+            return
+
+        workers = max(1, min(max_workers, len(pending)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for url, path in zip(pending, executor.map(self._download, pending)):
+                self._paths[url] = path
+
+    async def prefetch_async(self, sources, max_concurrency=8, executor=None):
+        """prefetch 的 asyncio 版本: 下载在 executor 中进行, 最多同时 max_concurrency 个"""
+        urls = [self.resolve(src) for src in sources if src]
+        pending = [url for url in dict.fromkeys(urls) if url not in self._paths]
+        if not pending:
+            return
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def fetch(url):
+            async with semaphore:
+                self._paths[url] = await loop.run_in_executor(executor, self._download, url)
+
+        await asyncio.gather(*(fetch(url) for url in pending))
+
+    def get_path(self, src):
+        """返回图片的本地路径; 未预下载的图片在此按需下载一次"""
+        if not src:
+            return None
+        url = self.resolve(src)
+        with self._lock:
+            if url not in self._paths:
+                self._paths[url] = self._download(url)
+            return self._paths[url]
+
+    def optimized_bytes(self):
+        """本次转换中图片优化前后的字节数 (每个不同的图片和尺寸只计一次)"""
+        bytes_in = sum(original for _, original, _ in self._optimized.values())
+        bytes_out = sum(optimized for _, _, optimized in self._optimized.values())
+        return bytes_in, bytes_out
+
+    def add_picture(self, slide, img_path, left, top, width=None, height=None):
+        """向幻灯片添加图片, 复用已嵌入包中的图片部件"""
+        if self.optimizer is not None and width:
+            key = (img_path.key if isinstance(img_path, InlineImage) else img_path,
+                   width, height)
+            if key not in self._optimized:
+                self._optimized[key] = self.optimizer.optimize(
+                    img_path, width / EMU_PER_INCH,
+                    height / EMU_PER_INCH if height else None, self.temp_dir
+                )
+            img_path = self._optimized[key][0]
+
+        inline = isinstance(img_path, InlineImage)
+        part_key = img_path.key if inline else img_path
+        image_part = self._parts.get(part_key)
+        if image_part is None:
+            image_file = img_path.open() if inline else img_path
+            picture = slide.shapes.add_picture(image_file, left, top, width, height)
+            self._parts[part_key] = slide.part.related_part(picture._pic.blip_rId)
+            return picture
+
+        return add_picture_from_part(slide, image_part, left, top, width, height)
+
 
 # ============== 工具函数 ==============
 
-def download_image(url, temp_dir, base_url=None):
-    """下载图片到临时目录"""
+def file_base_url(html_path):
+    """HTML 文件所在目录的 file:// URL, 用于解析其中的相对图片路径"""
+    return Path(os.path.abspath(html_path)).parent.as_uri() + '/'
+
+
+def is_within(path, root):
+    """path (解析符号链接后) 是否位于 root 目录之内"""
+    root = os.path.realpath(root)
+    try:
+        return os.path.commonpath([os.path.realpath(path), root]) == root
+    except ValueError:
+        # Windows 上不同盘符的路径
+        return False
+
+
+def url_scheme(url):
+    """
+    URL 的 scheme (小写, scheme 不区分大小写), 没有时为 ''
+
+    只把第一个冒号之前的部分交给 urlsplit, 不会为很大的 data: URL 复制整个字符串。
+    """
+    return urlsplit(url[:url.find(':') + 1]).scheme.lower()
+
+
+def local_image_path(url):
+    """
+    把本地图片地址映射为磁盘路径; 不是本地地址时返回 None
+
+    支持 file:// URL, 以及没有 scheme 的路径 (相对路径相对于当前目录)。
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == 'file':
+        path = url2pathname(parsed.path)
+        if parsed.netloc and parsed.netloc != 'localhost' and os.name == 'nt':
+            # Windows UNC 路径: file://server/share/...
+            path = f"\\\\{parsed.netloc}{path}"
+        return path
+    if not parsed.scheme or (len(parsed.scheme) == 1 and os.name == 'nt'):
+        # 无 scheme 的路径 (Windows 盘符会被解析成单字母 scheme)
+        return url
+    return None
+
+
+def download_image(url, temp_dir, base_url=None, cache=None, client=None, deadline=None):
+    """
+    下载图片到临时目录 (提供 cache 时使用 ImageCache 磁盘缓存)
+
+    本地图片 (相对路径、file:// URL) 直接返回磁盘路径, 不复制也不经过 HTTP。
+    远程图片经 client (默认为 default_http_client()) 下载,
+    deadline 为绝对截止时间 (time.monotonic), 见 ImageHttpClient.get。
+    """
     try:
         # 处理相对路径
-        if base_url and not url.startswith(('http://', 'https://', 'data:')):
+        if base_url and url_scheme(url) not in ('http', 'https', 'data'):
             url = urljoin(base_url, url)
 
-        # 跳过 data URL
-        if url.startswith('data:'):
+        # data URL 不落盘, 由 ImageRegistry 用 decode_data_url 在内存中解码
+        if url_scheme(url) == 'data':
             return None
 
-        response = requests.get(url, timeout=30, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        # 本地文件直接使用原路径
+        if url_scheme(url) not in ('http', 'https'):
+            path = local_image_path(url)
+            if path is None:
+                raise ValueError("不支持的图片地址")
+            if not os.path.isfile(path):
+                raise FileNotFoundError(f"找不到本地图片 {path}")
+            return path
+
+        # 缓存中的对象都先 checkout 到 temp_dir; 对象恰好被其他进程淘汰时重新下载
+        client = client or default_http_client()
+        headers = {}
+        entry = cache.lookup(url) if cache else None
+        if entry and cache.is_fresh(entry):
+            path = cache.checkout(cache.hit(url, entry), temp_dir)
+            if path:
+                return path
+            entry = None
+        if entry:
+            headers.update(cache.validators(entry))
+
+        response = client.get(url, headers, deadline)
+        if entry and response.status_code == 304:
+            path = cache.checkout(cache.hit(url, entry, revalidated=True,
+                                            headers=response.headers), temp_dir)
+            if path:
+                return path
+            response = client.get(url, None, deadline)
         response.raise_for_status()
 
-        # 生成文件名
+        # 生成文件名 (加 URL 摘要前缀, 避免不同目录下的同名图片互相覆盖)
         parsed = urlparse(url)
-        filename = os.path.basename(parsed.path) or f"image_{hash(url) % 10000}.jpg"
+        url_digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+        filename = os.path.basename(parsed.path) or "image.jpg"
         if '.' not in filename:
             filename += '.jpg'
+        filename = f"{url_digest}_{filename}"
+
+        if cache:
+            path = cache.checkout(cache.store(url, response.content, response.headers,
+                                              os.path.splitext(filename)[1]), temp_dir)
+            if path:
+                return path
 
         filepath = os.path.join(temp_dir, filename)
         with open(filepath, 'wb') as f:
@@ -106,9 +1082,86 @@ def download_image(url, temp_dir, base_url=None):
         return None
 
 
+class InlineImage:
+    """从 data: URL 解码出的内存图片, 按内容摘要标识"""
+
+    __slots__ = ('data', 'digest')
+
+    def __init__(self, data, digest=None):
+        self.data = data
+        self.digest = digest or hashlib.sha256(data).hexdigest()
+
+    @property
+    def key(self):
+        return "data:sha256:" + self.digest
+
+    @property
+    def size(self):
+        return len(self.data)
+
+    def open(self):
+        """返回可供 add_picture / PIL 读取的内存流"""
+        return io.BytesIO(self.data)
+
+
+def decode_data_url(url, max_bytes=DATA_URL_MAX_BYTES, chunk_size=DATA_URL_CHUNK_SIZE):
+    """
+    解码 data: URL 为 InlineImage; 格式错误或超过 max_bytes 时返回 None
+
+    base64 内容分块解码并同时计算摘要, 不会为整个载荷生成去空白后的副本。
+    """
+    try:
+        header, sep, payload = url.partition(',')
+        # 媒体类型和 base64 标记不区分大小写 (RFC 2397)
+        header = header.lower()
+        if not sep or not header.startswith('data:'):
+            raise ValueError("不是有效的 data URL")
+
+        if not header.endswith(';base64'):
+            data = unquote_to_bytes(payload)
+            if len(data) > max_bytes:
+                raise ValueError(f"内嵌图片超过 {max_bytes} 字节")
+            return InlineImage(data)
+
+        buffer = io.BytesIO()
+        digest = hashlib.sha256()
+        remainder = ''
+        for start in range(0, len(payload), chunk_size):
+            chunk = remainder + ''.join(payload[start:start + chunk_size].split())
+            usable = len(chunk) - len(chunk) % 4
+            remainder = chunk[usable:]
+            decoded = base64.b64decode(chunk[:usable], validate=True)
+            digest.update(decoded)
+            buffer.write(decoded)
+            if buffer.tell() > max_bytes:
+                raise ValueError(f"内嵌图片超过 {max_bytes} 字节")
+        if remainder:
+            # 补齐缺失的填充字符
+            decoded = base64.b64decode(remainder + '=' * (-len(remainder) % 4), validate=True)
+            digest.update(decoded)
+            buffer.write(decoded)
+        if not buffer.tell():
+            raise ValueError("内嵌图片为空")
+        return InlineImage(buffer.getvalue(), digest.hexdigest())
+    except Exception as e:
+        print(f"警告: 无法解码内嵌图片 {url[:40]}...: {e}")
+        return None
+
+
+# ============== 文本规范化 ==============
+
+# 预编译的正则表达式
+_ICON_CLASS_RE = re.compile(r'fa')
+_STYLE_COLOR_RE = re.compile(r'color:\s*([#\w]+)')
+
+# 短文本 (表格单元格、标题、页脚等) 的规范化结果缓存; 长文本很少重复, 不缓存
+TEXT_CACHE_SIZE = 65536
+TEXT_CACHE_MAX_LEN = 256
+
+
 def get_icon_unicode(element):
     """从元素中提取 FontAwesome 图标并转换为 Unicode"""
-    icon_elem = element.find('i', class_=re.compile(r'fa'))
+    icon_elem = element.find('i', class_=_ICON_CLASS_RE)
     if icon_elem:
         for cls in icon_elem.get('class', []):
             if cls.startswith('fa-') and cls in ICON_MAP:
@@ -116,20 +1169,42 @@ def get_icon_unicode(element):
     return "•"
 
 
+def _collapse_whitespace(text):
+    # str.split() 与正则的 \s 认定的空白字符完全相同
+    return ' '.join(text.split())
+
+
+_collapse_whitespace_cached = functools.lru_cache(maxsize=TEXT_CACHE_SIZE)(_collapse_whitespace)
+
+
 def clean_text(text):
-    """清理文本内容"""
+    """
+    清理文本内容: 连续空白合并为一个空格, 去掉首尾空白
+
+    结果与 bench_html_to_pptx.py 中的 clean_text_reference 相同。除空格外的空白字符
+    都不可打印, 所以可打印且没有连续、首尾空格的文本已经是干净的, 直接返回;
+    其余的短文本按内容缓存结果。
+    """
     if not text:
         return ""
-    # 移除多余空白
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+    if text.isprintable() and '  ' not in text and text[0] != ' ' and text[-1] != ' ':
+        return text
+    if len(text) <= TEXT_CACHE_MAX_LEN:
+        return _collapse_whitespace_cached(text)
+    return _collapse_whitespace(text)
+
 
+def text_cache_info():
+    """clean_text 缓存的命中统计 (functools 的 CacheInfo)"""
+    return _collapse_whitespace_cached.cache_info()
 
+
+@functools.lru_cache(maxsize=1024)
 def extract_color_from_style(style_str):
-    """从 style 属性中提取颜色"""
+    """从 style 属性中提取颜色 (同样的 style 字符串只解析一次)"""
     if not style_str:
         return None
-    match = re.search(r'color:\s*([#\w]+)', style_str)
+    match = _STYLE_COLOR_RE.search(style_str)
     if match:
         color = match.group(1)
         if color.startswith('#') and len(color) == 7:
@@ -141,29 +1216,93 @@ def extract_color_from_style(style_str):
     return None
 
 
+# ============== python-pptx 内部接口 ==============
+
+# 直接生成形状 XML、复用图片部件、模板版式和增量模式的幻灯片重排都用到了
+# python-pptx 的内部接口 (_spTree、_shape_factory、_sldIdLst 等), 只在 1.0.x 上验证过;
+# 形状相关的调用集中在下面几个函数中
+PPTX_SUPPORTED_VERSION = '1.0'
+
+
+def check_pptx_version():
+    """python-pptx 不是已验证的版本时给出警告, 返回是否受支持"""
+    version = getattr(pptx, '__version__', '')
+    if version.split('.')[:2] == PPTX_SUPPORTED_VERSION.split('.'):
+        return True
+    print(f"警告: 本程序使用了 python-pptx {PPTX_SUPPORTED_VERSION}.x 的内部接口, "
+          f"当前版本为 {version or '未知'}, 可能无法正常转换; "
+          f"请安装 python-pptx=={PPTX_SUPPORTED_VERSION}.*")
+    return False
+
+
+PPTX_VERSION_SUPPORTED = check_pptx_version()
+
+
+def next_shape_id(shapes):
+    """幻灯片上下一个可用的形状 id"""
+    return shapes._next_shape_id
+
+
+def insert_shape(shapes, element):
+    """把预先生成的形状元素插入形状树 (p:extLst 之前), 返回对应的形状对象"""
+    shapes._spTree.insert_element_before(element, 'p:extLst')
+    return shapes._shape_factory(element)
+
+
+def add_picture_from_part(slide, image_part, left, top, width=None, height=None):
+    """用包中已有的图片部件添加图片, 不再读取文件和计算摘要"""
+    shapes = slide.shapes
+    rId = slide.part.relate_to(image_part, RT.IMAGE)
+    pic = shapes._add_pic_from_image_part(image_part, rId, left, top, width, height)
+    shapes._recalculate_extents()
+    return shapes._shape_factory(pic)
+
+
 # ============== 幻灯片创建函数 ==============
 
+# 与 python-pptx add_textbox + 逐项设置格式得到的 XML 完全相同的文本框模板
+_TEXT_BOX_XML = (
+    '<p:sp %s><p:nvSpPr><p:cNvPr id="{id}" name="TextBox {index}"/>'
+    '<p:cNvSpPr txBox="1"/><p:nvPr/></p:nvSpPr>'
+    '<p:spPr><a:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+    '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom><a:noFill/></p:spPr>'
+    '<p:txBody><a:bodyPr wrap="square"><a:spAutoFit/></a:bodyPr><a:lstStyle/>'
+    '<a:p><a:pPr{align}><a:defRPr sz="{size}" b="{bold}"><a:solidFill>'
+    '<a:srgbClr val="{color}"/></a:solidFill></a:defRPr></a:pPr>{run}</a:p>'
+    '</p:txBody></p:sp>' % nsdecls('a', 'p')
+)
+
+# 文本中的控制字符按 python-pptx 的方式转义为 _xHHHH_
+_CONTROL_CHARS = re.compile(r'[\x00-\x08\x0B-\x1F]')
+
+
+def _escape_text(text):
+    text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    return _CONTROL_CHARS.sub(lambda m: '_x%04X_' % ord(m.group()), text)
+
+
 def add_text_box(slide, left, top, width, height, text,
                  font_size=14, color=None, bold=False, align=PP_ALIGN.LEFT,
                  theme=DEFAULT_THEME):
-    """添加文本框"""
+    """添加文本框
+
+    直接由 _TEXT_BOX_XML 生成整个 p:sp 元素, 结果与 bench_html_to_pptx.py 中的
+    add_text_box_reference 相同, 省去 python-pptx 对象层逐项设置格式时的反复查找和插入。
+    """
     if color is None:
         color = theme.text
 
-    shape = slide.shapes.add_textbox(
-        Inches(left), Inches(top), Inches(width), Inches(height)
-    )
-    tf = shape.text_frame
-    tf.word_wrap = True
-
-    p = tf.paragraphs[0]
-    p.text = clean_text(text)
-    p.font.size = Pt(font_size)
-    p.font.color.rgb = color
-    p.font.bold = bold
-    p.alignment = align
-
-    return shape
+    text = clean_text(text)
+    shapes = slide.shapes
+    shape_id = next_shape_id(shapes)
+    sp = parse_xml(_TEXT_BOX_XML.format(
+        id=shape_id, index=shape_id - 1,
+        x=Inches(left), y=Inches(top), cx=Inches(width), cy=Inches(height),
+        align=f' algn="{align.xml_value}"' if align is not None else '',
+        size=Pt(font_size).centipoints, bold=int(bool(bold)), color=str(color),
+        run=f'<a:r><a:t>{_escape_text(text)}</a:t></a:r>' if text else '',
+    ))
+    return insert_shape(shapes, sp)
 
 
 def add_title_subtitle(slide, title, subtitle, theme=DEFAULT_THEME):
@@ -177,15 +1316,18 @@ def add_title_subtitle(slide, title, subtitle, theme=DEFAULT_THEME):
     if subtitle:
         add_text_box(slide, 0.8, 1.15, 11.7, 0.5, subtitle,
                      font_size=18, color=theme.muted, theme=theme)
+        add_title_rule(slide, theme)
 
-        # 添加装饰线
-        line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0.8), Inches(1.7), Inches(11.7), Inches(0.03)
-        )
-        line.fill.solid()
-        line.fill.fore_color.rgb = theme.accent
-        line.line.fill.background()
+
+def add_title_rule(slide, theme=DEFAULT_THEME):
+    """添加副标题下方的装饰线"""
+    line = slide.shapes.add_shape(
+        MSO_SHAPE.RECTANGLE,
+        Inches(0.8), Inches(1.7), Inches(11.7), Inches(0.03)
+    )
+    line.fill.solid()
+    line.fill.fore_color.rgb = theme.accent
+    line.line.fill.background()
 
 
 def add_bullet_list(slide, items, start_y, theme=DEFAULT_THEME):
@@ -218,18 +1360,21 @@ def add_bullet_list(slide, items, start_y, theme=DEFAULT_THEME):
     return y_pos
 
 
-def add_image(slide, img_path, left, top, width=None, height=None):
-    """添加图片"""
-    if img_path and os.path.exists(img_path):
+def add_image(slide, img_path, left, top, width=None, height=None, images=None):
+    """添加图片 (提供 images 时复用同一次转换中已嵌入的图片)
+
+    img_path 可以是本地路径或 InlineImage (data: URL 解码结果)
+    """
+    inline = isinstance(img_path, InlineImage)
+    if img_path and (inline or os.path.exists(img_path)):
         try:
-            if width and height:
-                slide.shapes.add_picture(img_path, Inches(left), Inches(top),
-                                        width=Inches(width), height=Inches(height))
-            elif width:
-                slide.shapes.add_picture(img_path, Inches(left), Inches(top),
-                                        width=Inches(width))
+            width = Inches(width) if width else None
+            height = Inches(height) if width and height else None
+            if images is not None:
+                images.add_picture(slide, img_path, Inches(left), Inches(top), width, height)
             else:
-                slide.shapes.add_picture(img_path, Inches(left), Inches(top))
+                image_file = img_path.open() if inline else img_path
+                slide.shapes.add_picture(image_file, Inches(left), Inches(top), width, height)
             return True
         except Exception as e:
             print(f"警告: 无法添加图片: {e}")
@@ -238,6 +1383,23 @@ def add_image(slide, img_path, left, top, width=None, height=None):
 
 def add_card(slide, x, y, width, height, title, text, icon="•", theme=DEFAULT_THEME):
     """添加卡片样式内容"""
+    add_card_frame(slide, x, y, height, theme)
+
+    # 图标文字
+    add_text_box(slide, x + 0.15, y + 0.22, 0.5, 0.4, icon,
+                 font_size=16, color=theme.white, align=PP_ALIGN.CENTER, theme=theme)
+
+    # 标题
+    add_text_box(slide, x + 0.75, y + 0.2, width - 0.9, 0.4, title,
+                 font_size=15, color=theme.primary, bold=True, theme=theme)
+
+    # 内容
+    add_text_box(slide, x + 0.15, y + 0.7, width - 0.3, height - 0.9, text,
+                 font_size=12, color=theme.muted, theme=theme)
+
+
+def add_card_frame(slide, x, y, height, theme=DEFAULT_THEME):
+    """添加卡片的装饰条和图标框"""
     # 左侧装饰条
     bar = slide.shapes.add_shape(
         MSO_SHAPE.RECTANGLE,
@@ -256,18 +1418,6 @@ def add_card(slide, x, y, width, height, title, text, icon="•", theme=DEFAULT_
     icon_box.fill.fore_color.rgb = theme.primary
     icon_box.line.fill.background()
 
-    # 图标文字
-    add_text_box(slide, x + 0.15, y + 0.22, 0.5, 0.4, icon,
-                 font_size=16, color=theme.white, align=PP_ALIGN.CENTER, theme=theme)
-
-    # 标题
-    add_text_box(slide, x + 0.75, y + 0.2, width - 0.9, 0.4, title,
-                 font_size=15, color=theme.primary, bold=True, theme=theme)
-
-    # 内容
-    add_text_box(slide, x + 0.15, y + 0.7, width - 0.3, height - 0.9, text,
-                 font_size=12, color=theme.muted, theme=theme)
-
 
 def add_footer(slide, left_text, right_text, theme=DEFAULT_THEME):
     """添加页脚"""
@@ -281,54 +1431,855 @@ def add_footer(slide, left_text, right_text, theme=DEFAULT_THEME):
                      align=PP_ALIGN.RIGHT, theme=theme)
 
 
-# ============== HTML 解析函数 ==============
+# ============== 表格 ==============
+
+# 表格区域: 左边距、宽度、下边界 (页脚之上) 和表格之间的间距 (英寸)
+TABLE_LEFT = 0.8
+TABLE_WIDTH = 11.7
+TABLE_BOTTOM = 6.8
+TABLE_GAP = 0.3
+TABLE_FONT_SIZE = 11
+
+# 估算行高: 每行文字的高度和单元格上下边距之和 (英寸); 字符宽度按字号的一半估算,
+# 全角字符按两个字符计
+TABLE_LINE_HEIGHT = 0.19
+TABLE_CELL_PADDING = 0.1
+TABLE_CELL_MARGIN_X = 0.2
+
+# 当前页放不下表头和这么多数据行时, 表格从下一张续页开始
+TABLE_MIN_ROWS = 3
 
-def find_slides(soup):
-    """查找 HTML 中的幻灯片分隔"""
-    # 尝试不同的幻灯片容器
-    containers = (
-        soup.find_all('div', class_='slide-container') or
-        soup.find_all('div', class_='slide') or
-        soup.find_all('section') or
-        soup.find_all('article')
+TABLE_STYLE_ID = '{5C22544A-7EE6-4342-B048-85BDC9FD1C3A}'
+
+# 与 python-pptx add_table + 逐个单元格设置文字得到的 XML 完全相同的表格模板
+_TABLE_XML = (
+    '<p:graphicFrame %s><p:nvGraphicFramePr><p:cNvPr id="{id}" name="Table {index}"/>'
+    '<p:cNvGraphicFramePr><a:graphicFrameLocks noGrp="1"/></p:cNvGraphicFramePr><p:nvPr/>'
+    '</p:nvGraphicFramePr><p:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{cx}" cy="{cy}"/></p:xfrm>'
+    '<a:graphic><a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/table">'
+    '<a:tbl><a:tblPr firstRow="1" bandRow="1"><a:tableStyleId>{style}</a:tableStyleId></a:tblPr>'
+    '<a:tblGrid>{grid}</a:tblGrid>{rows}</a:tbl></a:graphicData></a:graphic></p:graphicFrame>'
+    % nsdecls('a', 'p', 'r')
+)
+_TABLE_CELL_START = '<a:tc><a:txBody><a:bodyPr/><a:lstStyle/>'
+
+
+def _text_units(text):
+    """文字宽度 (半角字符数), 全角字符按 2 计"""
+    if text.isascii():
+        return len(text)
+    return sum(2 if ord(ch) >= 0x1100 else 1 for ch in text)
+
+
+def table_row_heights(rows, col_width, font_size=TABLE_FONT_SIZE):
+    """按每列宽度 (英寸) 估算各行自动换行后的高度 (英寸)"""
+    units_per_line = max(1, int((col_width - TABLE_CELL_MARGIN_X) * 72 / (font_size * 0.5)))
+    heights = []
+    for row in rows:
+        lines = max([-(-_text_units(text) // units_per_line) for text in row] + [1])
+        heights.append(lines * TABLE_LINE_HEIGHT + TABLE_CELL_PADDING)
+    return heights
+
+
+def _table_grid(width, cols):
+    """各列宽度 (EMU), 与 python-pptx 相同: 均分, 最后一列吸收余数"""
+    total = Inches(width)
+    col_width = total // cols
+    return [col_width] * (cols - 1) + [total - col_width * (cols - 1)]
+
+
+def add_table(slide, rows, left, top, width, row_heights, font_size=TABLE_FONT_SIZE,
+              theme=DEFAULT_THEME):
+    """添加表格, 第一行为表头
+
+    整个 graphicFrame 由 _TABLE_XML 一次生成, 结果与 bench_html_to_pptx.py 中的
+    add_table_reference 相同, 单元格数量很多时省去 python-pptx 逐个单元格查找和设置格式的开销。
+    rows 中各行的单元格数必须相同; row_heights 为各行高度 (英寸)。
+    """
+    grid = _table_grid(width, len(rows[0]))
+    heights = [Inches(h) for h in row_heights]
+    size = Pt(font_size).centipoints
+
+    header_run = (f'<a:p><a:r><a:rPr sz="{size}" b="1"><a:solidFill><a:srgbClr val="{theme.white}"/>'
+                  f'</a:solidFill></a:rPr><a:t>')
+    header_end = (f'</a:t></a:r></a:p></a:txBody><a:tcPr><a:solidFill>'
+                  f'<a:srgbClr val="{theme.primary}"/></a:solidFill></a:tcPr></a:tc>')
+    header_empty = _TABLE_CELL_START + '<a:p/>' + header_end[len('</a:t></a:r></a:p>'):]
+    body_run = f'<a:p><a:r><a:rPr sz="{size}"/><a:t>'
+    body_end = '</a:t></a:r></a:p></a:txBody><a:tcPr/></a:tc>'
+    body_empty = _TABLE_CELL_START + '<a:p/></a:txBody><a:tcPr/></a:tc>'
+
+    parts = []
+    for i, (row, height) in enumerate(zip(rows, heights)):
+        run, end, empty = ((header_run, header_end, header_empty) if i == 0
+                           else (body_run, body_end, body_empty))
+        parts.append(f'<a:tr h="{height}">')
+        for text in row:
+            if text:
+                parts.append(_TABLE_CELL_START + run + _escape_text(text) + end)
+            else:
+                parts.append(empty)
+        parts.append('</a:tr>')
+
+    shapes = slide.shapes
+    shape_id = next_shape_id(shapes)
+    frame = parse_xml(_TABLE_XML.format(
+        id=shape_id, index=shape_id - 1, x=Inches(left), y=Inches(top),
+        cx=Inches(width), cy=sum(heights), style=TABLE_STYLE_ID,
+        grid=''.join(f'<a:gridCol w="{w}"/>' for w in grid), rows=''.join(parts),
+    ))
+    return insert_shape(shapes, frame)
+
+
+def paginate_table(row_heights, first_space, page_space, fresh=False,
+                   min_rows=TABLE_MIN_ROWS):
+    """
+    按可用高度 (英寸) 把表格的数据行分页, 每页都重复表头 (第 0 行)
+
+    first_space 为当前页剩余高度, page_space 为一张续页的可用高度;
+    fresh 表示当前页上还没有表格。
+    Returns:
+        [(起始行, 结束行), ...]; 当前页放不下表头和 min_rows 行数据 (数据不足
+        min_rows 行时为全部数据) 时第一项为 None, 表示表格从续页开始
+    """
+    total = len(row_heights)
+    header = row_heights[0]
+    pages = []
+    start, space = 1, first_space
+    while True:
+        end, used = start, header
+        while end < total and used + row_heights[end] <= space:
+            used += row_heights[end]
+            end += 1
+        if not fresh and (used > space or end - start < min(min_rows, total - start)):
+            pages.append(None)
+        else:
+            # 至少放一行, 避免超高的单行导致死循环
+            end = max(end, min(start + 1, total))
+            pages.append((start, end))
+            start = end
+            if start >= total:
+                return pages
+        space, fresh = page_space, True
+
+
+def _continuation_top(content):
+    """续页上表格的起始位置 (续页只有标题)"""
+    return 1.4 if content['title'] else 0.8
+
+
+def _add_continuation_slide(prs, content, theme=DEFAULT_THEME, template=None):
+    """表格续页: 标题加 "(续)", 无副标题, 页脚与原页相同"""
+    title = f"{content['title']} (续)" if content['title'] else ''
+    if template is None:
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        add_title_subtitle(slide, title, '', theme)
+        add_footer(slide, content['footer_left'], content['footer_right'], theme)
+    else:
+        slide = template.add_slide(prs, False)
+        template.fill(slide, template.header_texts(dict(content, title=title, subtitle='')))
+    return slide
+
+
+def add_tables(prs, slide, content, top, theme=DEFAULT_THEME, template=None):
+    """
+    添加内容中的全部表格, 放不下的行分页到后续的续页 (续页重复表头)
+
+    slide 为 None 时第一张表格直接从续页开始。
+    Returns:
+        新增的续页列表
+    """
+    continuation = []
+    page_top = _continuation_top(content)
+    fresh = False
+
+    if slide is None:
+        slide = _add_continuation_slide(prs, content, theme, template)
+        continuation.append(slide)
+        top, fresh = page_top, True
+
+    for rows in content['tables']:
+        cols = max(len(row) for row in rows)
+        rows = [row + [''] * (cols - len(row)) for row in rows]
+        heights = table_row_heights(rows, TABLE_WIDTH / cols)
+        pages = paginate_table(heights, TABLE_BOTTOM - top, TABLE_BOTTOM - page_top, fresh)
+        for n, page in enumerate(pages):
+            if n:
+                slide = _add_continuation_slide(prs, content, theme, template)
+                continuation.append(slide)
+                top = page_top
+            if page is None:
+                continue
+            start, end = page
+            add_table(slide, [rows[0]] + rows[start:end], TABLE_LEFT, top, TABLE_WIDTH,
+                      [heights[0]] + heights[start:end], theme=theme)
+            top += heights[0] + sum(heights[start:end]) + TABLE_GAP
+            fresh = False
+    return continuation
+
+
+# ============== 模板模式 ==============
+
+# 模板版式上的文字占位符: 名称 -> (占位符编号, (左, 上, 宽, 高, 字号, 主题颜色, 加粗, 对齐)),
+# 位置和字体与 add_title_subtitle / add_footer 一致
+TEMPLATE_HEADER_TEXT = {
+    'title': (10, (0.8, 0.5, 11.7, 0.7, 28, 'primary', True, PP_ALIGN.LEFT)),
+    'subtitle': (11, (0.8, 1.15, 11.7, 0.5, 18, 'muted', False, PP_ALIGN.LEFT)),
+    'footer_left': (12, (0.8, 7.0, 2.0, 0.3, 10, 'muted', False, PP_ALIGN.LEFT)),
+    'footer_right': (13, (9.5, 7.0, 3.0, 0.3, 10, 'muted', True, PP_ALIGN.RIGHT)),
+}
+
+# 第 n 个卡片框的占位符编号从 TEMPLATE_CARD_IDX + 3n 开始 (图标、标题、内容)
+TEMPLATE_CARD_IDX = 20
+
+_ALIGN_XML = {PP_ALIGN.LEFT: 'l', PP_ALIGN.CENTER: 'ctr', PP_ALIGN.RIGHT: 'r'}
+
+_LAYOUT_XML = (
+    '<p:sldLayout %s preserve="1"><p:cSld name="{name}"><p:spTree>'
+    '<p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr>'
+    '<p:grpSpPr/></p:spTree></p:cSld>'
+    '<p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sldLayout>' % nsdecls('a', 'p', 'r')
+)
+
+# 与 add_text_box 生成的文本框外观一致: 自动换行、高度随文字、无项目符号和段前距
+_PLACEHOLDER_XML = (
+    '<p:sp %s><p:nvSpPr><p:cNvPr id="0" name="{name}"/>'
+    '<p:cNvSpPr><a:spLocks noGrp="1"/></p:cNvSpPr>'
+    '<p:nvPr><p:ph type="body" sz="quarter" idx="{idx}"/></p:nvPr></p:nvSpPr>'
+    '<p:spPr><a:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+    '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></p:spPr>'
+    '<p:txBody><a:bodyPr wrap="square" lIns="91440" tIns="45720" rIns="91440" bIns="45720" '
+    'rtlCol="0" anchor="t"><a:spAutoFit/></a:bodyPr>'
+    '<a:lstStyle><a:lvl1pPr marL="0" indent="0" algn="{align}">'
+    '<a:spcBef><a:spcPts val="0"/></a:spcBef><a:buNone/>'
+    '<a:defRPr sz="{size}" b="{bold}"><a:solidFill><a:srgbClr val="{color}"/></a:solidFill>'
+    '</a:defRPr></a:lvl1pPr></a:lstStyle><a:p><a:endParaRPr lang="zh-CN"/></a:p></p:txBody>'
+    '</p:sp>' % nsdecls('a', 'p')
+)
+
+# 幻灯片上的占位符只引用版式, 位置和字体都继承自版式
+_SLIDE_PLACEHOLDER_XML = (
+    '<p:sp %s><p:nvSpPr><p:cNvPr id="{id}" name="Placeholder {idx}"/>'
+    '<p:cNvSpPr><a:spLocks noGrp="1"/></p:cNvSpPr>'
+    '<p:nvPr><p:ph type="body" sz="quarter" idx="{idx}"/></p:nvPr></p:nvSpPr>'
+    '<p:spPr/><p:txBody><a:bodyPr/><a:lstStyle/><a:p/></p:txBody></p:sp>' % nsdecls('a', 'p')
+)
+
+
+def _card_text_specs(x, y, width, height):
+    """卡片框内的图标、标题、内容占位符, 与 add_card 一致"""
+    return (
+        (x + 0.15, y + 0.22, 0.5, 0.4, 16, 'white', False, PP_ALIGN.CENTER),
+        (x + 0.75, y + 0.2, width - 0.9, 0.4, 15, 'primary', True, PP_ALIGN.LEFT),
+        (x + 0.15, y + 0.7, width - 0.3, height - 0.9, 12, 'muted', False, PP_ALIGN.LEFT),
     )
 
+
+class SlideTemplate:
+    """
+    模板模式: 按 ThemeColors 构建一次的幻灯片版式
+
+    - 固定装饰 (副标题下的装饰线、卡片的装饰条和图标框) 画在版式上
+    - 标题、副标题、页脚和卡片文字是版式上已设好位置和字体的占位符,
+      每页只为有文字的占位符写一个引用并填入文字, 幻灯片 XML 中不再重复位置、填充和字体
+    - 版式按 (是否有副标题, 带装饰的卡片框) 区分, XML 在本对象中只生成一次;
+      加入演示文稿的版式按演示文稿缓存, 名称由版式和主题确定 (增量转换重新打开
+      上次的输出时复用其中的版式)
+    """
+
+    def __init__(self, theme=DEFAULT_THEME):
+        self.theme = theme
+        self._lock = threading.Lock()
+        self._xml = {}
+        self._layouts = weakref.WeakKeyDictionary()
+        self._scratch = None
+
+    def _placeholder(self, idx, name, spec):
+        left, top, width, height, size, color, bold, align = spec
+        return parse_xml(_PLACEHOLDER_XML.format(
+            name=name, idx=idx, x=Inches(left), y=Inches(top),
+            cx=Inches(width), cy=Inches(height), align=_ALIGN_XML[align],
+            size=size * 100, bold=int(bold), color=str(getattr(self.theme, color)),
+        ))
+
+    def _layout_xml(self, key):
+        """生成版式 XML; 装饰形状用 add_title_rule / add_card_frame 画在草稿页上再移过来"""
+        has_subtitle, card_boxes = key
+        if self._scratch is None:
+            self._scratch = new_presentation()
+        slide = self._scratch.slides.add_slide(self._scratch.slide_layouts[6])
+        if has_subtitle:
+            add_title_rule(slide, self.theme)
+        for x, y, width, height in card_boxes:
+            add_card_frame(slide, x, y, height, self.theme)
+
+        layout = parse_xml(_LAYOUT_XML.format(name=self._layout_name(key)))
+        sp_tree = layout.cSld.spTree
+        sp_tree.extend(list(slide.shapes._spTree.iter_shape_elms()))
+        for name, (idx, spec) in TEMPLATE_HEADER_TEXT.items():
+            sp_tree.append(self._placeholder(idx, name, spec))
+        for n, box in enumerate(card_boxes):
+            for i, spec in enumerate(_card_text_specs(*box)):
+                idx = TEMPLATE_CARD_IDX + 3 * n + i
+                sp_tree.append(self._placeholder(idx, f"card {n + 1} text {i + 1}", spec))
+
+        for shape_id, element in enumerate(sp_tree.iter_shape_elms(), start=2):
+            element.xpath('./*[1]/p:cNvPr')[0].set('id', str(shape_id))
+        return etree.tostring(layout)
+
+    def add_slide(self, prs, has_subtitle, card_boxes=()):
+        """用对应版式新建幻灯片; 不复制版式上的占位符, 由 fill 按需添加"""
+        rId, slide = prs.slides.part.add_slide(self.layout(prs, has_subtitle, card_boxes))
+        prs.slides._sldIdLst.add_sldId(rId)
+        return slide
+
+    def _layout_name(self, key):
+        """版式名称, 由版式键和主题颜色确定, 重新打开的演示文稿中可按名称找回版式"""
+        colors = sorted((name, str(color)) for name, color in vars(self.theme).items())
+        return "html_to_pptx " + hashlib.sha1(repr((key, colors)).encode('utf-8')).hexdigest()[:12]
+
+    def layout(self, prs, has_subtitle, card_boxes=()):
+        """返回 prs 中对应的版式, 首次使用时加入演示文稿 (已有同名版式时直接使用)"""
+        key = (bool(has_subtitle), tuple(card_boxes))
+        with self._lock:
+            layouts = self._layouts.setdefault(prs.part, {})
+            if key not in layouts:
+                name = self._layout_name(key)
+                existing = [layout for layout in prs.slide_layouts if layout.name == name]
+                if existing:
+                    layouts[key] = existing[0]
+                else:
+                    if key not in self._xml:
+                        self._xml[key] = self._layout_xml(key)
+                    layouts[key] = self._add_layout(prs, self._xml[key])
+            return layouts[key]
+
+    @staticmethod
+    def _add_layout(prs, xml):
+        master = prs.slide_master
+        package = master.part.package
+        part = SlideLayoutPart(package.next_partname('/ppt/slideLayouts/slideLayout%d.xml'),
+                               CT.PML_SLIDE_LAYOUT, package, parse_xml(xml))
+        part.relate_to(master.part, RT.SLIDE_MASTER)
+        rId = master.part.relate_to(part, RT.SLIDE_LAYOUT)
+
+        # 母版和版式的 id 互不重复且不小于 2^31
+        ids = [int(i) for i in prs.part._element.xpath('//p:sldMasterId/@id')]
+        ids += [int(i) for i in master._element.xpath('//p:sldLayoutId/@id')]
+        entry = master._element.get_or_add_sldLayoutIdLst()._add_sldLayoutId()
+        entry.set('id', str(max(ids + [2147483647]) + 1))
+        entry.rId = rId
+        return part.slide_layout
+
+    @staticmethod
+    def header_texts(content):
+        """标题、副标题和页脚占位符的文字 {占位符编号: 文字}"""
+        return {idx: content[name] for name, (idx, _) in TEMPLATE_HEADER_TEXT.items()}
+
+    @staticmethod
+    def card_texts(n, card):
+        """第 n 个卡片框占位符的文字 {占位符编号: 文字}"""
+        idx = TEMPLATE_CARD_IDX + 3 * n
+        return {idx: card['icon'], idx + 1: card['title'], idx + 2: card['text']}
+
+    @staticmethod
+    def fill(slide, texts):
+        """为有文字的占位符添加引用并填入文字 (texts: {占位符编号: 文字})"""
+        shapes = slide.shapes
+        shape_id = next_shape_id(shapes)
+        for idx, text in texts.items():
+            if not text:
+                continue
+            sp = parse_xml(_SLIDE_PLACEHOLDER_XML.format(id=shape_id, idx=idx))
+            insert_shape(shapes, sp).text_frame.paragraphs[0].text = clean_text(text)
+            shape_id += 1
+
+
+_slide_templates = weakref.WeakKeyDictionary()
+_slide_templates_lock = threading.Lock()
+
+
+def slide_template(theme=DEFAULT_THEME):
+    """返回该主题共用的 SlideTemplate (每个 ThemeColors 只构建一次)"""
+    with _slide_templates_lock:
+        template = _slide_templates.get(theme)
+        if template is None:
+            template = _slide_templates[theme] = SlideTemplate(theme)
+        return template
+
+
+# ============== 幻灯片边界 ==============
+
+# 默认的幻灯片容器选择器, 按优先级排列 (文档中有 div.slide-container 时只取它们, 依此类推)
+DEFAULT_SLIDE_SELECTORS = ('div.slide-container', 'div.slide', 'section', 'article')
+
+_SELECTOR_TOKEN_RE = re.compile(r'''
+    (?P<tag>\*|[a-zA-Z][\w-]*)
+  | \.(?P<cls>[\w-]+)
+  | \#(?P<id>[\w-]+)
+  | \[\s*(?P<attr>[\w:-]+)\s*
+      (?:(?P<op>[~^$*]?=)\s*(?P<value>"[^"]*"|'[^']*'|[^\]\s"']+)\s*)?\]
+''', re.VERBOSE)
+
+
+def _split_selector_group(group):
+    """按顶层逗号拆分选择器组; [属性] 和引号内的逗号 (如 [data-kind="a,b"]) 不拆分"""
+    parts, start, quote, depth = [], 0, None, 0
+    for i, char in enumerate(group):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '[':
+            depth += 1
+        elif char == ']':
+            depth = max(depth - 1, 0)
+        elif char == ',' and not depth:
+            parts.append(group[start:i])
+            start = i + 1
+    parts.append(group[start:])
+    return parts
+
+
+def _compile_selector(selector):
+    """把简单复合选择器 (如 div.page[data-kind=cover]) 编译为 (标签名, 类名集合, 属性条件)"""
+    tag, classes, attrs = None, set(), []
+    pos = 0
+    while pos < len(selector):
+        match = _SELECTOR_TOKEN_RE.match(selector, pos)
+        if match is None or (match.group('tag') and pos):
+            raise ValueError(f"不支持的幻灯片选择器: {selector!r} "
+                             f"(只支持 标签、.类名、#id 和 [属性] 的组合)")
+        if match.group('tag'):
+            tag = None if match.group('tag') == '*' else match.group('tag').lower()
+        elif match.group('cls'):
+            classes.add(match.group('cls'))
+        elif match.group('id'):
+            attrs.append(('id', '=', match.group('id')))
+        else:
+            value = match.group('value')
+            if value and value[0] in '"\'':
+                value = value[1:-1]
+            attrs.append((match.group('attr').lower(), match.group('op'), value))
+        pos = match.end()
+    if pos == 0:
+        raise ValueError("幻灯片选择器不能为空")
+    return tag, frozenset(classes), tuple(attrs)
+
+
+def _attr_matches(actual, op, expected):
+    if actual is None:
+        return False
+    if not isinstance(actual, str):
+        # BeautifulSoup 中 class、rel 等多值属性是列表
+        actual = ' '.join(actual)
+    if op is None:
+        return True
+    if op == '=':
+        return actual == expected
+    if op == '~=':
+        return expected in actual.split()
+    if op == '^=':
+        return bool(expected) and actual.startswith(expected)
+    if op == '$=':
+        return bool(expected) and actual.endswith(expected)
+    return bool(expected) and expected in actual
+
+
+class SlideBoundaries:
+    """
+    幻灯片容器的查找规则: 按优先级排列的一组 CSS 选择器
+
+    每个选择器字符串是一级, 其中用逗号分隔的选择器属于同一级 (如 "div.page, div.sheet")。
+    查找时返回文档中有匹配的最高一级的全部元素 (按文档顺序), 与依次 find_all
+    每一级的结果相同, 但规则预先编译并按标签名索引, 只需遍历文档一次。
+    支持标签名 (或 *)、.类名、#id 与 [属性]、[属性=值] (以及 ~= ^= $= *=) 的组合,
+    不支持后代等组合器和伪类。
+    """
+
+    def __init__(self, selectors=DEFAULT_SLIDE_SELECTORS):
+        if isinstance(selectors, str):
+            selectors = [selectors]
+        self.selectors = tuple(selector.strip() for selector in selectors)
+        if not self.selectors:
+            raise ValueError("至少需要一个幻灯片选择器")
+
+        by_tag, any_tag = {}, []
+        for level, group in enumerate(self.selectors):
+            for selector in _split_selector_group(group):
+                tag, classes, attrs = _compile_selector(selector.strip())
+                rule = (level, classes, attrs)
+                if tag is None:
+                    any_tag.append(rule)
+                else:
+                    by_tag.setdefault(tag, []).append(rule)
+        # 每个标签名的候选规则 (含通配规则) 按优先级排好, 匹配到第一条即可停止
+        self._rules = {tag: sorted(rules + any_tag, key=lambda rule: rule[0])
+                       for tag, rules in by_tag.items()}
+        self._any_tag = sorted(any_tag, key=lambda rule: rule[0])
+
+    @classmethod
+    def from_file(cls, path):
+        """从配置文件读取选择器: 每行一级, 空行和 # 开头的行忽略"""
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = [line.strip() for line in f]
+        return cls([line for line in lines if line and not line.startswith('#')])
+
+    # 进程池 (批量模式) 中传递时只带选择器, 在工作进程中重新编译
+    def __reduce__(self):
+        return (SlideBoundaries, (self.selectors,))
+
+    def __repr__(self):
+        return f"SlideBoundaries({list(self.selectors)!r})"
+
+    def level(self, name, attrs, limit=None):
+        """
+        元素匹配的最高一级 (数字越小优先级越高), 不匹配时返回 None
+
+        name 为标签名, attrs 为属性字典 (BeautifulSoup 的 tag.attrs 或 lxml 的
+        elem.attrib); limit 给出时只检查优先级不低于它的规则。
+        """
+        for level, classes, conditions in self._rules.get(name, self._any_tag):
+            if limit is not None and level > limit:
+                return None
+            if classes:
+                actual = attrs.get('class')
+                if actual is None:
+                    continue
+                if isinstance(actual, str):
+                    actual = actual.split()
+                if not classes.issubset(actual):
+                    continue
+            if all(_attr_matches(attrs.get(attr), op, value) for attr, op, value in conditions):
+                return level
+        return None
+
+    def _select(self, elements):
+        """在 (元素, 标签名, 属性) 序列中选出最高一级的全部匹配"""
+        best = None
+        matches = []
+        for elem, name, attrs in elements:
+            level = self.level(name, attrs, best)
+            if level is None:
+                continue
+            if best is None or level < best:
+                best = level
+                matches = []
+            matches.append(elem)
+        return matches
+
+    def find(self, soup):
+        """在 BeautifulSoup 文档中查找幻灯片容器 (一次遍历), 没有时返回空列表"""
+        return self._select((node, node.name, node.attrs) for node in soup.descendants
+                            if isinstance(node, Tag))
+
+    def find_lxml(self, root):
+        """在 lxml 文档树中查找幻灯片容器 (一次遍历), 没有时返回空列表"""
+        return self._select((elem, elem.tag, elem.attrib) for elem in root.iter()
+                            if isinstance(elem.tag, str))
+
+    def is_container(self, elem):
+        """lxml 元素是否匹配任意一级 (流式模式直接取最外层的匹配元素)"""
+        tag = elem.tag
+        return isinstance(tag, str) and self.level(tag, elem.attrib) is not None
+
+
+DEFAULT_SLIDE_BOUNDARIES = SlideBoundaries()
+
+
+def slide_boundaries(selectors=None):
+    """
+    把选择器列表、SlideBoundaries 或 None (默认规则) 统一为 SlideBoundaries
+
+    相同的选择器列表只编译一次。
+    """
+    if selectors is None:
+        return DEFAULT_SLIDE_BOUNDARIES
+    if isinstance(selectors, SlideBoundaries):
+        return selectors
+    if isinstance(selectors, str):
+        selectors = [selectors]
+    return _compiled_boundaries(tuple(selectors))
+
+
+@functools.lru_cache(maxsize=64)
+def _compiled_boundaries(selectors):
+    return SlideBoundaries(selectors)
+
+
+# ============== HTML 解析函数 ==============
+
+def resolve_parser(parser=None):
+    """
+    选择 BeautifulSoup 解析后端
+
+    parser 为 None 或 'auto' 时按 PARSER_BACKENDS 顺序选择已安装的最快后端;
+    指定的后端未安装时给出警告并回退到自动选择。
+    """
+    if parser and parser != 'auto':
+        if builder_registry.lookup(parser) is not None:
+            return parser
+        print(f"警告: 解析后端 {parser} 未安装, 改为自动选择")
+
+    for name in PARSER_BACKENDS:
+        if builder_registry.lookup(name) is not None:
+            return name
+    return 'html.parser'
+
+
+def parse_html(html_content, parser=None):
+    """用选定的后端解析 HTML"""
+    backend = resolve_parser(parser)
+    if backend == 'lxml':
+        # 打开 huge_tree, 否则 lxml 会丢弃超过 10 MB 的属性值 (如大的 data: URL 图片)
+        try:
+            from bs4.builder import LXMLTreeBuilder
+            builder = LXMLTreeBuilder(huge_tree=True)
+        except TypeError:
+            # 较老的 BeautifulSoup 不支持 huge_tree 参数
+            builder = None
+        if builder is not None:
+            return BeautifulSoup(html_content, builder=builder)
+    return BeautifulSoup(html_content, backend)
+
+
+def find_slides(soup, boundaries=None):
+    """
+    查找 HTML 中的幻灯片分隔
+
+    boundaries 为幻灯片容器的选择器规则 (SlideBoundaries 或选择器列表, 见
+    slide_boundaries), 默认依次为 div.slide-container、div.slide、section、article。
+    """
+    containers = slide_boundaries(boundaries).find(soup)
     if containers:
         return containers
 
-    # 如果没有明确的容器，尝试用 hr 分隔
+    # 如果没有明确的容器，尝试用 body 下的 hr 分隔; 没有分隔时整个 body 作为一个幻灯片
     body = soup.find('body') or soup
+    return split_on_hr(body) or [body]
 
-    # 检查是否有 hr 分隔
-    hrs = body.find_all('hr')
-    if hrs:
-        slides = []
-        current_content = []
-        for child in body.children:
-            if child.name == 'hr':
-                if current_content:
-                    wrapper = soup.new_tag('div')
-                    for c in current_content:
-                        wrapper.append(c.extract() if hasattr(c, 'extract') else c)
-                    slides.append(wrapper)
-                    current_content = []
-            else:
-                current_content.append(child)
-        if current_content:
-            wrapper = soup.new_tag('div')
-            for c in current_content:
-                if hasattr(c, 'extract'):
-                    wrapper.append(c)
-            slides.append(wrapper)
-        return slides if slides else [body]
 
-    # 没有分隔，整个 body 作为一个幻灯片
-    return [body]
+class NodeSlice:
+    """
+    父节点中一段连续子节点 contents[start:end] 的只读视图
 
+    代替把节点移进新建的 div: 不改动文档树, 创建只需 O(1)。提供幻灯片容器
+    所需的接口 (descendants、字符串化、get_text); find / find_all 先复制出一个
+    独立的 div 再查找, 只用于参考实现等不在热路径上的场合。
+    """
 
-def extract_slide_content(container):
-    """从容器中提取幻灯片内容"""
-    content = {
+    __slots__ = ('parent', 'start', 'end')
+    name = 'div'
+
+    def __init__(self, parent, start, end):
+        self.parent = parent
+        self.start = start
+        self.end = end
+
+    @property
+    def contents(self):
+        return self.parent.contents[self.start:self.end]
+
+    @property
+    def children(self):
+        contents = self.parent.contents
+        return (contents[i] for i in range(self.start, self.end))
+
+    @property
+    def descendants(self):
+        for node in self.children:
+            yield node
+            if hasattr(node, 'descendants'):
+                yield from node.descendants
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __str__(self):
+        return ''.join(str(node) for node in self.children)
+
+    decode = __str__
+
+    def get_text(self, separator='', strip=False):
+        return self.as_tag().get_text(separator, strip)
+
+    def as_tag(self):
+        """复制出包含这些节点的独立 div (原文档不变)"""
+        soup = BeautifulSoup('', 'html.parser')
+        wrapper = soup.new_tag('div')
+        for node in self.children:
+            wrapper.append(copy.copy(node))
+        return wrapper
+
+    def find(self, *args, **kwargs):
+        return self.as_tag().find(*args, **kwargs)
+
+    def find_all(self, *args, **kwargs):
+        return self.as_tag().find_all(*args, **kwargs)
+
+
+def _has_content(nodes):
+    """节点中是否有元素或非空白文字 (只有空白和注释的片段不作为幻灯片)"""
+    for node in nodes:
+        if isinstance(node, Tag):
+            return True
+        if not isinstance(node, Comment) and node.strip():
+            return True
+    return False
+
+
+def split_on_hr(body):
+    """
+    按 body 的直接子节点 <hr> 分隔幻灯片, 返回 NodeSlice 列表
+
+    只遍历一次 body.contents, 不移动任何节点。每段 (包括最后一段) 都按同样的
+    规则处理: 只有空白文字和注释的段落被跳过。没有直接子节点 hr 时返回空列表。
+    """
+    contents = body.contents
+    slices = []
+    start = 0
+    found = False
+    for i, node in enumerate(contents):
+        if node.name == 'hr':
+            found = True
+            if _has_content(contents[start:i]):
+                slices.append(NodeSlice(body, start, i))
+            start = i + 1
+    if not found:
+        return []
+    if _has_content(contents[start:]):
+        slices.append(NodeSlice(body, start, len(contents)))
+    return slices
+
+
+# libxml2 序列化 HTML 时会对这些属性 (以及 <a name>) 中的空格和非 ASCII 字符做百分号编码
+_URI_ATTRS = frozenset(('href', 'src', 'action'))
+_URI_ESCAPED_RE = re.compile(r"[^A-Za-z0-9\-._~!*'()@/:=?;#%&,+$]")
+
+
+def fragment_html(elem):
+    """
+    把 lxml 元素序列化为 HTML 片段, 属性值与 BeautifulSoup 解析得到的相同
+
+    会被 libxml2 改写的 URI 属性先换成占位符, 序列化后再换回 (按 HTML 转义的) 原值,
+    否则 src="图 片.png" 会变成 src="%E5%9B%BE%20%E7%89%87.png"。
+    """
+    saved = []
+    for node in elem.iter():
+        if not isinstance(node.tag, str):
+            continue
+        for name, value in node.attrib.items():
+            lower = name.lower()
+            if ((lower in _URI_ATTRS or (lower == 'name' and node.tag == 'a')) and
+                    _URI_ESCAPED_RE.search(value)):
+                saved.append((node, name, value))
+    if not saved:
+        return etree.tostring(elem, encoding='unicode', method='html', with_tail=False)
+
+    prefix = 'h2p-' + secrets.token_hex(8)
+    for n, (node, name, _) in enumerate(saved):
+        node.set(name, f"{prefix}-{n}")
+    html = etree.tostring(elem, encoding='unicode', method='html', with_tail=False)
+    for n, (node, name, value) in enumerate(saved):
+        node.set(name, value)
+        escaped = (value.replace('&', '&amp;').replace('"', '&quot;')
+                   .replace('<', '&lt;').replace('>', '&gt;'))
+        html = html.replace(f'"{prefix}-{n}"', f'"{escaped}"', 1)
+    return html
+
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def iter_slide_fragments(source, chunk_size=STREAM_CHUNK_SIZE, progress_callback=None,
+                         boundaries=None):
+    """
+    流式解析 HTML, 逐个产出幻灯片容器的 (标签名, 容器 HTML)
+
+    用 lxml 的 HTMLPullParser 分块读取, 每遇到一个完整的最外层容器
+    (默认为 div.slide-container / div.slide / section / article) 就把它序列化后产出;
+    调用方处理完成后该容器在 lxml 树中被清空, 因此内存占用只与最大的单页有关。
+
+    与 find_slides 不同, 这里无法预先知道文档中用的是哪一级容器,
+    所以直接取最外层的匹配任意一级的元素; 不支持 <hr> 分隔。
+
+    Args:
+        source: HTML 文件路径、HTML 字符串或二进制文件对象
+        progress_callback: 读取进度回调 (已读字节数, 总字节数)
+        boundaries: 幻灯片容器的选择器规则, 见 slide_boundaries
+    """
+    if hasattr(source, 'read'):
+        stream, total_bytes, owns_stream = source, 0, False
+    elif os.path.isfile(source):
+        stream, total_bytes, owns_stream = open(source, 'rb'), os.path.getsize(source), True
+    else:
+        data = source.encode('utf-8')
+        stream, total_bytes, owns_stream = io.BytesIO(data), len(data), True
+
+    boundaries = slide_boundaries(boundaries)
+    pull_parser = etree.HTMLPullParser(events=('start', 'end'), encoding='utf-8',
+                                       huge_tree=True)
+    open_container = None
+    bytes_read = 0
+
+    def drain():
+        nonlocal open_container
+        for event, elem in pull_parser.read_events():
+            if event == 'start':
+                if open_container is None and boundaries.is_container(elem):
+                    open_container = elem
+                continue
+
+            if elem is open_container:
+                yield elem.tag, fragment_html(elem)
+                open_container = None
+
+            if open_container is None:
+                # 容器之外 (或容器本身) 已结束的元素不再需要, 释放它和之前的兄弟节点
+                elem.clear(keep_tail=False)
+                parent = elem.getparent()
+                if parent is not None:
+                    while elem.getprevious() is not None:
+                        del parent[0]
+
+    try:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            bytes_read += len(chunk)
+            if progress_callback:
+                progress_callback(bytes_read, total_bytes)
+            pull_parser.feed(chunk)
+            yield from drain()
+        pull_parser.close()
+        yield from drain()
+    finally:
+        if owns_stream:
+            stream.close()
+
+
+def iter_slide_containers(source, parser=None, chunk_size=STREAM_CHUNK_SIZE,
+                          progress_callback=None, boundaries=None):
+    """
+    流式解析 HTML, 逐个产出幻灯片容器
+
+    每个容器片段 (见 iter_slide_fragments) 单独交给 BeautifulSoup 解析后产出,
+    parser 为容器片段使用的 BeautifulSoup 后端; 其他参数同 iter_slide_fragments。
+    """
+    parser = resolve_parser(parser)
+    for name, fragment in iter_slide_fragments(source, chunk_size, progress_callback,
+                                               boundaries):
+        soup = parse_html(fragment, parser)
+        yield soup.find(name) or soup
+
+
+def _new_slide_content():
+    """空的幻灯片内容字典"""
+    return {
         'title': '',
         'subtitle': '',
         'items': [],
@@ -340,121 +2291,193 @@ def extract_slide_content(container):
         'layout': 'auto'
     }
 
+
+def _extract_list_item(li):
+    """提取单个列表项"""
+    item = {'icon': '•', 'title': '', 'text': '', 'icon_color': None}
+
+    # 检查类名以确定图标类型
+    li_classes = li.get('class', [])
+    if 'strength' in li_classes or 'success' in li_classes:
+        item['icon'] = '✓'
+        item['icon_color'] = 'success'
+    elif 'gap' in li_classes or 'warning' in li_classes:
+        item['icon'] = '⚠'
+        item['icon_color'] = 'warning'
+    else:
+        item['icon'] = get_icon_unicode(li)
+
+    # 提取标题和文本
+    strong = li.find(['strong', 'b'])
+    if strong:
+        item['title'] = clean_text(strong.get_text())
+        # 获取 strong 标签之后的所有文本内容
+        remaining_text = []
+        for sibling in strong.next_siblings:
+            if hasattr(sibling, 'get_text'):
+                remaining_text.append(sibling.get_text())
+            elif isinstance(sibling, str):
+                remaining_text.append(sibling)
+        item['text'] = clean_text(' '.join(remaining_text))
+    else:
+        item['text'] = clean_text(li.get_text())
+
+    return item
+
+
+def _extract_card(card):
+    """提取单个卡片"""
+    card_data = {
+        'title': '',
+        'text': '',
+        'icon': '•',
+        'image': None
+    }
+
+    # 卡片标题
+    card_title = card.find(['h3', 'h4', 'h5'])
+    if card_title:
+        card_data['title'] = clean_text(card_title.get_text())
+
+    # 卡片内容
+    card_text = card.find('p')
+    if card_text:
+        card_data['text'] = clean_text(card_text.get_text())
+
+    # 卡片图标
+    card_data['icon'] = get_icon_unicode(card)
+
+    # 卡片图片
+    card_img = card.find('img')
+    if card_img and card_img.get('src'):
+        card_data['image'] = card_img['src']
+
+    return card_data
+
+
+def _extract_table(table):
+    """提取单个表格的单元格文本"""
+    table_data = []
+    for row in table.find_all('tr'):
+        row_data = []
+        for cell in row.find_all(['th', 'td']):
+            row_data.append(clean_text(cell.get_text()))
+        if row_data:
+            table_data.append(row_data)
+    return table_data
+
+
+def _detect_layout(content, has_class):
+    """根据布局类名和已提取的内容确定布局类型"""
+    if has_class('two-column'):
+        return 'two-column'
+    elif has_class('tile-grid'):
+        return 'tile-grid'
+    elif has_class('roadmap-grid'):
+        return 'roadmap-grid'
+    elif content['cards']:
+        return 'cards'
+    elif content['images'] and content['items']:
+        return 'two-column'
+    return 'auto'
+
+
+# 卡片类名, 按优先顺序排列 (只匹配 div)
+CARD_CLASSES = ('tile-card', 'roadmap-card', 'card')
+
+# 单次遍历时需要记录第一个匹配元素的类名
+_FIRST_CLASSES = ('slide-title', 'slide-subtitle', 'page-indicator', 'footer')
+_LAYOUT_CLASSES = ('two-column', 'tile-grid', 'roadmap-grid')
+
+
+def extract_slide_content(container):
+    """
+    从容器中提取幻灯片内容
+
+    只遍历一次容器子树, 按标签和类名把元素分桶, 再由各个桶生成内容字典;
+    结果与 bench_html_to_pptx.py 中逐项 find/find_all 的 extract_slide_content_reference
+    完全一致。
+    """
+    content = _new_slide_content()
+
+    first_by_class = {}
+    first_by_tag = {}
+    layout_classes = set()
+    lists, images, tables = [], [], []
+    cards_by_class = {cls: [] for cls in CARD_CLASSES}
+
+    for elem in container.descendants:
+        name = elem.name
+        if name is None:
+            continue
+
+        if name in ('h1', 'h2', 'h3'):
+            first_by_tag.setdefault(name, elem)
+        elif name in ('ul', 'ol'):
+            lists.append(elem)
+        elif name == 'img':
+            images.append(elem)
+        elif name == 'table':
+            tables.append(elem)
+
+        classes = elem.get('class')
+        if not classes:
+            continue
+        for cls in classes:
+            if cls in _FIRST_CLASSES:
+                first_by_class.setdefault(cls, elem)
+            elif cls in _LAYOUT_CLASSES:
+                layout_classes.add(cls)
+            if name == 'div' and cls in cards_by_class:
+                cards_by_class[cls].append(elem)
+
     # 提取标题
     title_elem = (
-        container.find(class_='slide-title') or
-        container.find('h1') or
-        container.find('h2')
+        first_by_class.get('slide-title') or
+        first_by_tag.get('h1') or
+        first_by_tag.get('h2')
     )
     if title_elem:
         content['title'] = clean_text(title_elem.get_text())
 
     # 提取副标题
     subtitle_elem = (
-        container.find(class_='slide-subtitle') or
-        container.find('h3')
+        first_by_class.get('slide-subtitle') or
+        first_by_tag.get('h3')
     )
     if subtitle_elem and subtitle_elem != title_elem:
         content['subtitle'] = clean_text(subtitle_elem.get_text())
 
-    # 提取列表项
-    for ul in container.find_all(['ul', 'ol']):
-        for li in ul.find_all('li', recursive=False):
-            item = {'icon': '•', 'title': '', 'text': '', 'icon_color': None}
-
-            # 检查类名以确定图标类型
-            li_classes = li.get('class', [])
-            if 'strength' in li_classes or 'success' in li_classes:
-                item['icon'] = '✓'
-                item['icon_color'] = 'success'
-            elif 'gap' in li_classes or 'warning' in li_classes:
-                item['icon'] = '⚠'
-                item['icon_color'] = 'warning'
-            else:
-                item['icon'] = get_icon_unicode(li)
-
-            # 提取标题和文本
-            strong = li.find(['strong', 'b'])
-            if strong:
-                item['title'] = clean_text(strong.get_text())
-                # 获取 strong 标签之后的所有文本内容
-                remaining_text = []
-                for sibling in strong.next_siblings:
-                    if hasattr(sibling, 'get_text'):
-                        remaining_text.append(sibling.get_text())
-                    elif isinstance(sibling, str):
-                        remaining_text.append(sibling)
-                item['text'] = clean_text(' '.join(remaining_text))
-            else:
-                item['text'] = clean_text(li.get_text())
-
-            content['items'].append(item)
+    # 提取列表项 (只取列表的直接子元素 li)
+    for ul in lists:
+        for li in ul.children:
+            if li.name == 'li':
+                content['items'].append(_extract_list_item(li))
 
     # 提取图片
-    for img in container.find_all('img'):
+    for img in images:
         src = img.get('src', '')
-        alt = img.get('alt', '')
         if src:
-            content['images'].append({'src': src, 'alt': alt})
-
-    # 提取卡片 (tile-card, roadmap-card, card)
-    # 使用更精确的匹配，只匹配顶级卡片类，避免匹配子元素
-    card_selectors = [
-        ('div', 'tile-card'),
-        ('div', 'roadmap-card'),
-        ('div', 'card'),
-    ]
+            content['images'].append({'src': src, 'alt': img.get('alt', '')})
+
+    # 提取卡片, 同一元素带多个卡片类时只处理一次
     seen_cards = set()
-    for tag, cls in card_selectors:
-        for card in container.find_all(tag, class_=cls):
-            # 避免重复处理同一个卡片元素
-            card_id = id(card)
-            if card_id in seen_cards:
+    for cls in CARD_CLASSES:
+        for card in cards_by_class[cls]:
+            if id(card) in seen_cards:
                 continue
-            seen_cards.add(card_id)
-
-            card_data = {
-                'title': '',
-                'text': '',
-                'icon': '•',
-                'image': None
-            }
-
-            # 卡片标题
-            card_title = card.find(['h3', 'h4', 'h5'])
-            if card_title:
-                card_data['title'] = clean_text(card_title.get_text())
-
-            # 卡片内容
-            card_text = card.find('p')
-            if card_text:
-                card_data['text'] = clean_text(card_text.get_text())
-
-            # 卡片图标
-            card_data['icon'] = get_icon_unicode(card)
-
-            # 卡片图片
-            card_img = card.find('img')
-            if card_img and card_img.get('src'):
-                card_data['image'] = card_img['src']
-
-            content['cards'].append(card_data)
+            seen_cards.add(id(card))
+            content['cards'].append(_extract_card(card))
 
     # 提取表格
-    for table in container.find_all('table'):
-        table_data = []
-        for row in table.find_all('tr'):
-            row_data = []
-            for cell in row.find_all(['th', 'td']):
-                row_data.append(clean_text(cell.get_text()))
-            if row_data:
-                table_data.append(row_data)
+    for table in tables:
+        table_data = _extract_table(table)
         if table_data:
             content['tables'].append(table_data)
 
     # 提取页脚
-    page_indicator = container.find(class_='page-indicator')
-    footer = container.find(class_='footer')
+    page_indicator = first_by_class.get('page-indicator')
+    footer = first_by_class.get('footer')
 
     if page_indicator:
         content['footer_left'] = clean_text(page_indicator.get_text())
@@ -462,31 +2485,365 @@ def extract_slide_content(container):
         content['footer_right'] = clean_text(footer.get_text())
 
     # 检测布局类型
-    if container.find(class_='two-column'):
-        content['layout'] = 'two-column'
-    elif container.find(class_='tile-grid'):
-        content['layout'] = 'tile-grid'
-    elif container.find(class_='roadmap-grid'):
-        content['layout'] = 'roadmap-grid'
-    elif content['cards']:
-        content['layout'] = 'cards'
-    elif content['images'] and content['items']:
-        content['layout'] = 'two-column'
+    content['layout'] = _detect_layout(content, layout_classes.__contains__)
 
     return content
 
 
-# ============== 主转换函数 ==============
+def find_slide_fragments(html_content, boundaries=None):
+    """
+    用 lxml 快速切分幻灯片容器, 返回 [(标签名, 容器 HTML), ...]
+
+    容器的查找规则与 find_slides 相同 (boundaries, 默认 div.slide-container →
+    div.slide → section → article); 都没有时返回 None, 由调用方回退到 find_slides
+    (处理 <hr> 分隔和整页作为一张幻灯片的情况)。
+    """
+    from lxml import html as lxml_html
+
+    # 与流式模式相同按 UTF-8 字节交给 lxml: lxml 不接受带 <?xml ... encoding?> 声明的
+    # str (XHTML 文档), 且显式指定编码后不会被文档中的 charset 声明误导
+    if isinstance(html_content, str):
+        html_content = html_content.encode('utf-8')
+    root = lxml_html.document_fromstring(
+        html_content, parser=lxml_html.HTMLParser(encoding='utf-8', huge_tree=True)
+    )
+    elements = slide_boundaries(boundaries).find_lxml(root)
+    if not elements:
+        return None
+    return [(elem.tag, fragment_html(elem)) for elem in elements]
+
+
+def _extract_from_html(args):
+    """工作进程中: 解析单个容器的 HTML 并提取内容"""
+    name, fragment, parser = args
+    soup = parse_html(fragment, parser)
+    return extract_slide_content(soup.find(name) or soup)
+
+
+def extract_fragments(fragments, workers, parser=None):
+    """在进程池中并行解析和提取各容器片段, 结果与 fragments 顺序一致"""
+    parser = resolve_parser(parser)
+    tasks = [(name, fragment, parser) for name, fragment in fragments]
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_extract_from_html, tasks, chunksize=chunksize))
+
+
+def extract_fragment_contents(fragments, parser=None, workers=None, content_cache=None):
+    """
+    解析并提取各容器片段的内容, 结果与 fragments 顺序一致
+
+    提供 content_cache 时先按片段查缓存, 只有未命中的片段才解析和提取;
+    workers 大于 1 时未命中的片段在进程池中并行处理。
+
+    Returns:
+        (contents, extract_seconds); 并行提取时 extract_seconds 为 None
+    """
+    parser = resolve_parser(parser)
+    contents = [None] * len(fragments)
+    keys = None
+    repeats = []
+    if content_cache is None:
+        misses = list(range(len(fragments)))
+    else:
+        # 同一次转换中重复出现的容器只提取第一个, 其余在提取后从缓存取
+        keys = [content_cache.key(fragment, parser) for _, fragment in fragments]
+        misses, first_miss = [], {}
+        for i, key in enumerate(keys):
+            if key in first_miss:
+                repeats.append(i)
+                continue
+            contents[i] = content_cache.get(key)
+            if contents[i] is None:
+                first_miss[key] = i
+                misses.append(i)
+
+    extract_seconds = [0.0] * len(fragments)
+    if workers and workers > 1:
+        extracted = (extract_fragments([fragments[i] for i in misses], workers, parser)
+                     if misses else [])
+        extract_seconds = None
+    else:
+        extracted = []
+        for i in misses:
+            start = time.perf_counter()
+            extracted.append(_extract_from_html(fragments[i] + (parser,)))
+            extract_seconds[i] = time.perf_counter() - start
+
+    for i, content in zip(misses, extracted):
+        contents[i] = content
+        if content_cache is not None:
+            content_cache.put(keys[i], content)
+    for i in repeats:
+        contents[i] = content_cache.get(keys[i])
+        if contents[i] is None:
+            # 缓存容量太小, 条目已被淘汰
+            contents[i] = json.loads(json.dumps(contents[first_miss[keys[i]]]))
+    return contents, extract_seconds
+
+
+# ============== 内容缓存 ==============
+
+# 提取逻辑或缓存键变化时递增, 使旧的缓存条目失效
+CONTENT_CACHE_VERSION = 2
+DEFAULT_CONTENT_CACHE_ENTRIES = 4096
+DEFAULT_CONTENT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# 缓存键只规范化标签之间的空白
+_INTER_TAG_SPACE_RE = re.compile(r'>\s+<')
+
+
+class ContentCache:
+    """
+    extract_slide_content 结果的缓存, 以容器 HTML (由所选解析后端序列化,
+    只合并标签之间的空白) 的摘要为键
+
+    - 内存中按 LRU 保留最多 max_entries 条; 条目以 JSON 文本保存,
+      每次命中返回新的内容字典, create_slide 修改内容不会影响缓存
+    - 提供 cache_dir 时增加磁盘层, 跨运行、跨进程共享;
+      总大小超过 max_bytes 时按最近使用时间淘汰
+    - 命中时既不用 BeautifulSoup 解析容器, 也不调用 extract_slide_content
+    """
+
+    def __init__(self, max_entries=DEFAULT_CONTENT_CACHE_ENTRIES, cache_dir=None,
+                 max_bytes=DEFAULT_CONTENT_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._init_runtime_state()
+
+    def _init_runtime_state(self):
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._disk_bytes = None
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0,
+                       'disk_evictions': 0}
+
+    # 进程池 (批量模式) 中传递时只保留配置, 内存层在各进程中重新建立
+    def __getstate__(self):
+        return {key: value for key, value in self.__dict__.items()
+                if not key.startswith('_')}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_runtime_state()
+
+    @staticmethod
+    def key(html, parser=''):
+        """
+        缓存键: 提取逻辑版本、解析后端和容器 HTML 的 SHA-256
+
+        只把标签之间的连续空白合并为一个空格 (缩进不同的相同容器共用条目);
+        文字和属性值中的空白保持原样, 序列化后属性值和文字中的 < > 都已转义。
+        """
+        normalized = _INTER_TAG_SPACE_RE.sub('> <', html)
+        data = f"{CONTENT_CACHE_VERSION}\0{parser}\0{normalized}"
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def _remember(self, key, data):
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def get(self, key):
+        """返回缓存的内容字典 (新的副本); 未命中时返回 None"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._stats['hits'] += 1
+
+        if data is None and self.cache_dir:
+            path = self._disk_path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = f.read()
+                now = time.time()
+                os.utime(path, (now, now))
+            except OSError:
+                data = None
+            if data is not None:
+                self._remember(key, data)
+                with self._lock:
+                    self._stats['hits'] += 1
+                    self._stats['disk_hits'] += 1
+
+        if data is None:
+            with self._lock:
+                self._stats['misses'] += 1
+            return None
+        return json.loads(data)
+
+    def put(self, key, content):
+        """保存提取结果 (须在 create_slide 修改内容之前调用)"""
+        data = json.dumps(content, ensure_ascii=False)
+        self._remember(key, data)
+        if self.cache_dir:
+            self._write_disk(key, data.encode('utf-8'))
+
+    def extract(self, container, parser=''):
+        """带缓存的 extract_slide_content (键由容器序列化得到, 适用于已解析的容器)"""
+        key = self.key(str(container), parser)
+        content = self.get(key)
+        if content is None:
+            content = extract_slide_content(container)
+            self.put(key, content)
+        return content
+
+    def _write_disk(self, key, data):
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir)
+                                       if entry.name.endswith(".json"))
+            else:
+                self._disk_bytes += len(data)
+            over_limit = self._disk_bytes > self.max_bytes
+        if over_limit:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """按最近使用时间淘汰磁盘条目, 直到总大小不超过 max_bytes"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+
+        with self._lock:
+            self._disk_bytes = total
+            self._stats['disk_evictions'] += evicted
+
+    def stats(self):
+        """统计信息: hits (含 disk_hits)、misses、淘汰数、内存条目数和命中率"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._memory)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+# ============== 主转换函数 ==============
+
+def slide_image_sources(content):
+    """返回 create_slide 会用到的图片地址 (与布局逻辑保持一致)"""
+    layout = content['layout']
+    if layout == 'two-column':
+        return [img['src'] for img in content['images'][:1]]
+    if layout in ('tile-grid', 'cards') and content['cards']:
+        return [card['image'] for card in content['cards'][:4] if card['image']]
+    if layout == 'roadmap-grid' and content['cards']:
+        return []
+    return [img['src'] for img in content['images'][:2]]
+
+
+def _card_slots(content, start_y):
+    """卡片类布局中各卡片的位置 [(card, x, y, 宽, 高), ...]; 其他布局返回空列表"""
+    layout = content['layout']
+    cards = content['cards']
+    if layout in ('tile-grid', 'cards') and cards:
+        if len(cards) <= 2:
+            # 2 列布局
+            positions = [(0.8, start_y), (7.0, start_y)]
+            card_width, card_height = 5.5, 4.5
+        else:
+            # 2x2 布局
+            positions = [
+                (0.8, start_y), (6.9, start_y),
+                (0.8, start_y + 2.4), (6.9, start_y + 2.4)
+            ]
+            card_width, card_height = 5.8, 2.2
+    elif layout == 'roadmap-grid' and cards:
+        # 路线图网格
+        positions = [
+            (0.8, start_y), (6.9, start_y),
+            (0.8, start_y + 2.4), (6.9, start_y + 2.4)
+        ]
+        card_width, card_height = 5.8, 2.2
+    else:
+        return []
+    return [(card, x, y, card_width, card_height)
+            for card, (x, y) in zip(cards[:4], positions)]
+
+
+def create_slide(prs, content, temp_dir, base_url=None, theme=DEFAULT_THEME,
+                 images=None, template=None):
+    """创建单个幻灯片
 
-def create_slide(prs, content, temp_dir, base_url=None, theme=DEFAULT_THEME):
-    """创建单个幻灯片"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])  # 空白布局
+    images: 本次转换共用的 ImageRegistry; 图片已预下载时只做本地查找
+    template: SlideTemplate; 提供时标题、页脚和无图卡片使用版式上的装饰和占位符
 
-    # 添加标题和副标题
-    add_title_subtitle(slide, content['title'], content['subtitle'], theme)
+    表格接在正文下方, 放不下时在本页之后追加续页 (见 add_tables);
+    返回值始终是内容所在的第一页。
+    """
+    if images is None:
+        images = ImageRegistry(temp_dir, base_url)
+    get_image = images.get_path
 
     layout = content['layout']
     start_y = 2.0 if content['title'] else 0.8
+    card_slots = _card_slots(content, start_y)
+    # 正文 (列表、图片、卡片) 的下边界, 表格从这里开始
+    body_bottom = start_y
+
+    if template is None:
+        slide = prs.slides.add_slide(prs.slide_layouts[6])  # 空白布局
+
+        # 添加标题和副标题
+        add_title_subtitle(slide, content['title'], content['subtitle'], theme)
+        texts = None
+    else:
+        # 无图卡片 (路线图中的全部卡片) 的装饰在版式上, 这里只收集占位符文字
+        framed = [slot for slot in card_slots
+                  if layout == 'roadmap-grid' or not slot[0]['image']]
+        slide = template.add_slide(prs, content['subtitle'],
+                                   [(x, y, w, h) for _, x, y, w, h in framed])
+        texts = template.header_texts(content)
+        framed_index = {id(slot[0]): n for n, slot in enumerate(framed)}
+
+    def place_card(card, x, y, width, height):
+        if texts is None:
+            add_card(slide, x, y, width, height,
+                     card['title'], card['text'], card['icon'], theme)
+        else:
+            texts.update(template.card_texts(framed_index[id(card)], card))
 
     # 处理颜色映射
     for item in content['items']:
@@ -501,40 +2858,23 @@ def create_slide(prs, content, temp_dir, base_url=None, theme=DEFAULT_THEME):
     if layout == 'two-column':
         # 左侧列表
         if content['items']:
-            add_bullet_list(slide, content['items'], start_y, theme)
+            body_bottom = add_bullet_list(slide, content['items'], start_y, theme)
 
         # 右侧图片
         if content['images']:
             img_src = content['images'][0]['src']
-            img_path = download_image(img_src, temp_dir, base_url)
-            add_image(slide, img_path, 7.3, start_y, 5.2, 4.0)
+            img_path = get_image(img_src)
+            if add_image(slide, img_path, 7.3, start_y, 5.2, 4.0, images):
+                body_bottom = max(body_bottom, start_y + 4.0)
 
     elif layout in ('tile-grid', 'cards') and content['cards']:
         # 卡片网格布局
-        cards = content['cards']
-
-        if len(cards) <= 2:
-            # 2 列布局
-            positions = [(0.8, start_y), (7.0, start_y)]
-            card_width, card_height = 5.5, 4.5
-        else:
-            # 2x2 布局
-            positions = [
-                (0.8, start_y), (6.9, start_y),
-                (0.8, start_y + 2.4), (6.9, start_y + 2.4)
-            ]
-            card_width, card_height = 5.8, 2.2
-
-        for i, card in enumerate(cards[:4]):
-            if i >= len(positions):
-                break
-            x, y = positions[i]
-
+        for card, x, y, card_width, card_height in card_slots:
             # 如果卡片有图片，先添加图片
             if card['image']:
-                img_path = download_image(card['image'], temp_dir, base_url)
+                img_path = get_image(card['image'])
                 if img_path:
-                    add_image(slide, img_path, x, y, card_width, 2.5)
+                    add_image(slide, img_path, x, y, card_width, 2.5, images)
                     # 在图片下方添加标题和文字
                     add_text_box(slide, x, y + 2.6, card_width, 0.4, card['title'],
                                 font_size=16, color=theme.primary, bold=True,
@@ -542,24 +2882,17 @@ def create_slide(prs, content, temp_dir, base_url=None, theme=DEFAULT_THEME):
                     add_text_box(slide, x, y + 3.0, card_width, 1.0, card['text'],
                                 font_size=12, color=theme.muted,
                                 align=PP_ALIGN.CENTER, theme=theme)
+                    body_bottom = max(body_bottom, y + 4.0)
             else:
                 # 无图片的卡片样式
-                add_card(slide, x, y, card_width, card_height,
-                        card['title'], card['text'], card['icon'], theme)
+                place_card(card, x, y, card_width, card_height)
+                body_bottom = max(body_bottom, y + card_height)
 
     elif layout == 'roadmap-grid' and content['cards']:
         # 路线图网格
-        cards = content['cards']
-        positions = [
-            (0.8, start_y), (6.9, start_y),
-            (0.8, start_y + 2.4), (6.9, start_y + 2.4)
-        ]
-
-        for i, card in enumerate(cards[:4]):
-            if i >= len(positions):
-                break
-            x, y = positions[i]
-            add_card(slide, x, y, 5.8, 2.2, card['title'], card['text'], card['icon'], theme)
+        for card, x, y, card_width, card_height in card_slots:
+            place_card(card, x, y, card_width, card_height)
+            body_bottom = max(body_bottom, y + card_height)
 
     else:
         # 默认布局 - 列表 + 图片
@@ -569,70 +2902,673 @@ def create_slide(prs, content, temp_dir, base_url=None, theme=DEFAULT_THEME):
             y_pos = add_bullet_list(slide, content['items'], y_pos, theme)
 
         # 添加图片
+        body_bottom = y_pos
         for i, img_data in enumerate(content['images'][:2]):
-            img_path = download_image(img_data['src'], temp_dir, base_url)
-            if img_path:
-                add_image(slide, img_path, 0.8 + i * 6.2, y_pos, 5.5, 3.0)
+            img_path = get_image(img_data['src'])
+            if img_path and add_image(slide, img_path, 0.8 + i * 6.2, y_pos, 5.5, 3.0, images):
+                body_bottom = y_pos + 3.0
+
+    # 添加表格: 接在正文下方, 放不下表头和 TABLE_MIN_ROWS 行数据时从续页开始,
+    # 其余放不下的行分页到续页
+    if content['tables']:
+        top = body_bottom + TABLE_GAP if body_bottom > start_y else start_y
+        add_tables(prs, slide, content, top, theme, template)
 
     # 添加页脚
-    add_footer(slide, content['footer_left'], content['footer_right'], theme)
+    if texts is None:
+        add_footer(slide, content['footer_left'], content['footer_right'], theme)
+    else:
+        template.fill(slide, texts)
 
     return slide
 
 
-def convert_html_to_pptx(html_path, output_path, theme=None, progress_callback=None):
+def new_presentation():
+    """创建空白演示文稿 (16:9 宽屏)"""
+    prs = Presentation()
+    prs.slide_width = Inches(13.333)
+    prs.slide_height = Inches(7.5)
+    return prs
+
+
+def _read_html(html_path):
+    with open(html_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def extract_all_contents(html_content, parser=None, extract_workers=None,
+                         metrics=NO_INSTRUMENTATION, progress_callback=None,
+                         content_cache=None, boundaries=None):
+    """
+    解析 HTML 并提取全部幻灯片内容
+
+    并行提取, 或解析后端为 lxml 且提供 content_cache (ContentCache) 时, 先用 lxml
+    把文档切分成容器片段, 缓存命中的片段不再解析和提取; 其他后端的缓存按该后端
+    解析出的容器查找, 保证容器边界与不用缓存时相同。没有明确容器 (<hr> 分隔或
+    整页) 时回退到 find_slides。boundaries 为幻灯片容器的选择器规则。
+
+    Returns:
+        (contents, extract_seconds); 并行提取时 extract_seconds 为 None
+    """
+    parallel = bool(extract_workers and extract_workers > 1)
+    before = content_cache.stats() if content_cache is not None else None
+    if parallel or (content_cache is not None and resolve_parser(parser) == 'lxml'):
+        # 主进程只用 lxml 切分容器, 解析和提取交给进程池, 或只处理缓存未命中的容器
+        with metrics.phase('find_slides', parallel=parallel):
+            fragments = find_slide_fragments(html_content, boundaries)
+        if fragments:
+            if progress_callback:
+                progress_callback(0, len(fragments), "开始转换...")
+            with metrics.phase('extract', parallel=parallel):
+                result = extract_fragment_contents(fragments, parser, extract_workers,
+                                                   content_cache)
+            if content_cache is not None:
+                _emit_content_cache(metrics, content_cache, before)
+            return result
+
+    with metrics.phase('parse', parser=resolve_parser(parser)):
+        soup = parse_html(html_content, parser)
+
+    # 查找幻灯片
+    with metrics.phase('find_slides'):
+        slide_containers = find_slides(soup, boundaries)
+    if not slide_containers:
+        raise ValueError("HTML 中没有找到可转换的内容")
+
+    if progress_callback:
+        progress_callback(0, len(slide_containers), "开始转换...")
+
+    contents = []
+    extract_seconds = []
+    with metrics.phase('extract'):
+        for container in slide_containers:
+            start = time.perf_counter()
+            if content_cache is not None:
+                contents.append(content_cache.extract(container, resolve_parser(parser)))
+            else:
+                contents.append(extract_slide_content(container))
+            extract_seconds.append(time.perf_counter() - start)
+    if content_cache is not None:
+        _emit_content_cache(metrics, content_cache, before)
+    return contents, extract_seconds
+
+
+def _emit_content_cache(metrics, content_cache, before):
+    """发出本次转换的内容缓存命中情况 (content_cache 事件)"""
+    after = content_cache.stats()
+    hits = after['hits'] - before['hits']
+    misses = after['misses'] - before['misses']
+    metrics.emit('content_cache', hits=hits, misses=misses,
+                 disk_hits=after['disk_hits'] - before['disk_hits'],
+                 hit_rate=hits / (hits + misses) if hits + misses else 0.0)
+
+
+def save_presentation(prs, output):
+    """
+    保存演示文稿
+
+    output 为文件路径或可写的二进制流 (文件对象、socket.makefile('wb')、管道等,
+    不要求可 seek); 为 None 时不落盘, 直接返回 PPTX 字节。
+    """
+    if output is None:
+        buffer = io.BytesIO()
+        prs.save(buffer)
+        return buffer.getvalue()
+    prs.save(output)
+    return output
+
+
+def _output_label(output):
+    """埋点事件中的输出位置"""
+    if output is None:
+        return '<bytes>'
+    if isinstance(output, (str, os.PathLike)):
+        return os.fspath(output)
+    return '<stream>'
+
+
+def convert_html_to_pptx(html_path, output_path, theme=None, progress_callback=None,
+                         image_workers=8, image_cache=None, parser=None, stream=False,
+                         extract_workers=None, instrument=None, image_optimizer=None,
+                         http_client=None, image_deadline=None, template=False,
+                         incremental=False, content_cache=None, boundaries=None,
+                         image_root=None):
     """
     将 HTML 转换为 PowerPoint
 
     Args:
         html_path: HTML 文件路径或 HTML 内容字符串
-        output_path: 输出 PPTX 文件路径
+        output_path: 输出 PPTX 文件路径, 或可写的二进制流;
+                     为 None 时返回 PPTX 字节 (见 save_presentation)
         theme: 自定义主题颜色 (ThemeColors 实例)
         progress_callback: 进度回调函数 (current, total, message)
+        image_workers: 并发下载图片的线程数
+        image_cache: 图片磁盘缓存 (ImageCache 实例), 为 None 时不缓存
+        parser: HTML 解析后端 ('lxml', 'html5lib', 'html.parser'),
+                默认自动选择已安装的最快后端
+        stream: 为 True 时使用流式模式 (见 convert_html_to_pptx_streaming)
+        extract_workers: 大于 1 时用多进程并行解析和提取各页内容
+                         (需要 lxml), 建页仍在当前进程中按原顺序进行
+        instrument: 埋点事件接收者 (如 JsonLinesSink、EventCollector),
+                    见 Instrumentation
+        image_optimizer: 图片优化器 (ImageOptimizer 实例), 为 None 时按原图嵌入
+        http_client: 下载远程图片的 ImageHttpClient (连接池、超时、重试、熔断配置),
+                     默认使用进程内共享的 default_http_client()
+        image_deadline: 本次转换下载图片的总时限 (秒), 从转换开始计时;
+                        超时后未下载的图片按下载失败处理
+        template: 为 True 时使用模板模式 (该主题共用的 SlideTemplate), 标题、页脚和
+                  卡片装饰放在版式上; 也可直接传入 SlideTemplate 实例
+        incremental: 为 True 时使用增量模式, 只重建有变化的幻灯片
+                     (见 convert_html_to_pptx_incremental)
+        content_cache: 幻灯片内容缓存 (ContentCache 实例), 相同的容器只提取一次
+        boundaries: 幻灯片容器的选择器规则 (SlideBoundaries 或按优先级排列的
+                    CSS 选择器列表), 默认 div.slide-container → div.slide →
+                    section → article
+        image_root: 只读取该目录下的本地图片; 为 False 时不读取本地图片, 默认不限制
 
     Returns:
-        输出文件路径
+        输出文件路径或流; output_path 为 None 时返回 PPTX 字节
     """
+    if incremental:
+        ignored = [name for name, value in (('stream', stream),
+                                            ('extract_workers', extract_workers)) if value]
+        if ignored:
+            print(f"警告: 增量模式不支持 {', '.join(ignored)}, 已忽略")
+        return convert_html_to_pptx_incremental(
+            html_path, output_path, theme, progress_callback,
+            image_workers, image_cache, parser, instrument, image_optimizer,
+            http_client, image_deadline, template, boundaries=boundaries,
+            image_root=image_root, content_cache=content_cache
+        )
+
+    if stream:
+        return convert_html_to_pptx_streaming(
+            html_path, output_path, theme, progress_callback,
+            image_workers, image_cache, parser, instrument, image_optimizer,
+            http_client, image_deadline, template, content_cache, boundaries, image_root
+        )
+
     if theme is None:
         theme = DEFAULT_THEME
+    if template is True:
+        template = slide_template(theme)
+    template = template or None
+
+    run_start = time.perf_counter()
+    image_end = time.monotonic() + image_deadline if image_deadline else None
+    is_file = os.path.isfile(html_path)
+    metrics = Instrumentation(instrument, input=html_path if is_file else '<string>')
 
     # 读取 HTML
     base_url = None
-    if os.path.isfile(html_path):
-        base_url = f"file:///{os.path.dirname(os.path.abspath(html_path))}/"
-        with open(html_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+    if is_file:
+        base_url = file_base_url(html_path)
+        with metrics.phase('read'):
+            html_content = _read_html(html_path)
     else:
         html_content = html_path
 
-    soup = BeautifulSoup(html_content, 'html.parser')
-
     # 创建演示文稿 (16:9 宽屏)
-    prs = Presentation()
-    prs.slide_width = Inches(13.333)
-    prs.slide_height = Inches(7.5)
+    prs = new_presentation()
 
-    # 查找幻灯片
-    slide_containers = find_slides(soup)
-    total_slides = len(slide_containers)
+    # 先提取所有幻灯片内容
+    contents, extract_seconds = extract_all_contents(
+        html_content, parser, extract_workers, metrics, progress_callback, content_cache,
+        boundaries
+    )
+    total_slides = len(contents)
+
+    # 创建临时目录存放下载的图片
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 预下载所有图片, 建页时只做本地查找
+        sources = [src for content in contents for src in slide_image_sources(content)]
+        if sources and progress_callback:
+            progress_callback(0, total_slides, f"下载 {len(set(sources))} 张图片...")
+        images = ImageRegistry(temp_dir, base_url, image_cache, metrics, image_optimizer,
+                               http_client, image_end, image_root)
+        with metrics.phase('images', count=len(set(sources))):
+            images.prefetch(sources, image_workers)
+
+        with metrics.phase('build'):
+            for i, content in enumerate(contents):
+                if progress_callback:
+                    progress_callback(i, total_slides, f"处理第 {i+1}/{total_slides} 页...")
+
+                start = time.perf_counter()
+                slide = create_slide(prs, content, temp_dir, base_url, theme, images, template)
+                metrics.emit('slide', index=i, layout=content['layout'],
+                             build_seconds=time.perf_counter() - start,
+                             extract_seconds=extract_seconds[i] if extract_seconds else None,
+                             shapes=len(slide.shapes))
+        image_bytes_in, image_bytes_out = images.optimized_bytes()
+
+    # 保存文件
+    with metrics.phase('save'):
+        result = save_presentation(prs, output_path)
+
+    metrics.emit('run', output=_output_label(output_path), slides=total_slides,
+                 seconds=time.perf_counter() - run_start, peak_rss=peak_rss_bytes(),
+                 image_bytes_saved=image_bytes_in - image_bytes_out)
+
+    if progress_callback:
+        progress_callback(total_slides, total_slides, "转换完成!")
+
+    return result
+
+
+def convert_html_to_pptx_streaming(html_path, output_path, theme=None,
+                                   progress_callback=None, image_workers=8,
+                                   image_cache=None, parser=None, instrument=None,
+                                   image_optimizer=None, http_client=None,
+                                   image_deadline=None, template=False, content_cache=None,
+                                   boundaries=None, image_root=None):
+    """
+    流式转换超大 HTML 文件
+
+    用 iter_slide_fragments 边读边切分, 每个容器解析、提取内容、建页后即释放,
+    不会把整个文件、整棵文档树或全部容器同时留在内存中; 容器在 content_cache
+    中命中时不再解析和提取。
+    转换过程中的进度以已读字节数报告, 结束时报告总页数。
+    参数同 convert_html_to_pptx。
+    """
+    if theme is None:
+        theme = DEFAULT_THEME
+    if template is True:
+        template = slide_template(theme)
+    template = template or None
+
+    run_start = time.perf_counter()
+    image_end = time.monotonic() + image_deadline if image_deadline else None
+    base_url = None
+    is_file = isinstance(html_path, str) and os.path.isfile(html_path)
+    if is_file:
+        base_url = file_base_url(html_path)
+    metrics = Instrumentation(instrument, input=html_path if is_file else '<stream>')
+
+    prs = new_presentation()
+    slide_count = 0
+    bytes_progress = [0, 0]
+
+    def on_read(bytes_read, total_bytes):
+        bytes_progress[:] = [bytes_read, total_bytes]
+
+    if progress_callback:
+        progress_callback(0, 0, "开始转换...")
+
+    parser = resolve_parser(parser)
+    cache_before = content_cache.stats() if content_cache is not None else None
+    with tempfile.TemporaryDirectory() as temp_dir:
+        images = ImageRegistry(temp_dir, base_url, image_cache, metrics, image_optimizer,
+                               http_client, image_end, image_root)
+        fragments = iter_slide_fragments(html_path, progress_callback=on_read,
+                                         boundaries=boundaries)
+        while True:
+            # 流式模式中读取和解析交织进行, 以取得下一个容器 (并解析) 的耗时作为该页的解析耗时
+            start = time.perf_counter()
+            fragment = next(fragments, None)
+            if fragment is None:
+                break
+            name, html = fragment
+            key = content = None
+            if content_cache is not None:
+                key = content_cache.key(html, parser)
+                content = content_cache.get(key)
+
+            if progress_callback:
+                progress_callback(bytes_progress[0], bytes_progress[1],
+                                  f"处理第 {slide_count + 1} 页...")
+
+            if content is None:
+                soup = parse_html(html, parser)
+                container = soup.find(name) or soup
+                parse_seconds = time.perf_counter() - start
+
+                start = time.perf_counter()
+                content = extract_slide_content(container)
+                soup.decompose()
+                if content_cache is not None:
+                    content_cache.put(key, content)
+                extract_seconds = time.perf_counter() - start
+            else:
+                parse_seconds, extract_seconds = time.perf_counter() - start, 0.0
+
+            images.prefetch(slide_image_sources(content), image_workers)
 
-    if total_slides == 0:
+            start = time.perf_counter()
+            slide = create_slide(prs, content, temp_dir, base_url, theme, images, template)
+            metrics.emit('slide', index=slide_count, layout=content['layout'],
+                         parse_seconds=parse_seconds, extract_seconds=extract_seconds,
+                         build_seconds=time.perf_counter() - start,
+                         shapes=len(slide.shapes))
+            slide_count += 1
+        image_bytes_in, image_bytes_out = images.optimized_bytes()
+
+    if slide_count == 0:
         raise ValueError("HTML 中没有找到可转换的内容")
+    if content_cache is not None:
+        _emit_content_cache(metrics, content_cache, cache_before)
+
+    with metrics.phase('save'):
+        result = save_presentation(prs, output_path)
+
+    metrics.emit('run', output=_output_label(output_path), slides=slide_count, stream=True,
+                 seconds=time.perf_counter() - run_start, peak_rss=peak_rss_bytes(),
+                 image_bytes_saved=image_bytes_in - image_bytes_out)
+
+    if progress_callback:
+        progress_callback(slide_count, slide_count, "转换完成!")
+
+    return result
+
+
+# ============== 异步接口 ==============
+
+async def convert_html_to_pptx_async(html_path, output_path, theme=None,
+                                     progress_callback=None, image_workers=8,
+                                     image_cache=None, parser=None, extract_workers=None,
+                                     instrument=None, image_optimizer=None,
+                                     http_client=None, image_deadline=None, template=False,
+                                     content_cache=None, boundaries=None, image_root=None,
+                                     executor=None):
+    """
+    convert_html_to_pptx 的 asyncio 版本, 供异步 Web 服务直接 await
+
+    - 读取文件、解析提取和保存在 executor 中运行 (默认为事件循环的默认线程池)
+    - 图片在 executor 中并发下载, 最多同时 image_workers 个, 等待期间不阻塞事件循环
+    - 建页在事件循环线程中进行, 每建完一页让出一次控制权
+    - progress_callback 始终在事件循环线程中调用
+
+    除 executor 外参数同 convert_html_to_pptx (不支持 stream);
+    生成的文件与同步版本相同 (zip 内的时间戳除外)。
+    """
+    if theme is None:
+        theme = DEFAULT_THEME
+    if template is True:
+        template = slide_template(theme)
+    template = template or None
+
+    loop = asyncio.get_running_loop()
+    run_start = time.perf_counter()
+    image_end = time.monotonic() + image_deadline if image_deadline else None
+    is_file = os.path.isfile(html_path)
+    metrics = Instrumentation(instrument, input=html_path if is_file else '<string>')
 
+    base_url = None
+    if is_file:
+        base_url = file_base_url(html_path)
+        with metrics.phase('read'):
+            html_content = await loop.run_in_executor(executor, _read_html, html_path)
+    else:
+        html_content = html_path
+
+    prs = new_presentation()
+
+    contents, extract_seconds = await loop.run_in_executor(
+        executor, extract_all_contents, html_content, parser, extract_workers, metrics,
+        None, content_cache, boundaries
+    )
+    total_slides = len(contents)
     if progress_callback:
         progress_callback(0, total_slides, "开始转换...")
 
-    # 创建临时目录存放下载的图片
     with tempfile.TemporaryDirectory() as temp_dir:
-        for i, container in enumerate(slide_containers):
-            if progress_callback:
-                progress_callback(i, total_slides, f"处理第 {i+1}/{total_slides} 页...")
+        sources = [src for content in contents for src in slide_image_sources(content)]
+        if sources and progress_callback:
+            progress_callback(0, total_slides, f"下载 {len(set(sources))} 张图片...")
+        images = ImageRegistry(temp_dir, base_url, image_cache, metrics, image_optimizer,
+                               http_client, image_end, image_root)
+        with metrics.phase('images', count=len(set(sources))):
+            await images.prefetch_async(sources, image_workers, executor)
+
+        with metrics.phase('build'):
+            for i, content in enumerate(contents):
+                if progress_callback:
+                    progress_callback(i, total_slides, f"处理第 {i+1}/{total_slides} 页...")
+
+                start = time.perf_counter()
+                slide = create_slide(prs, content, temp_dir, base_url, theme, images, template)
+                metrics.emit('slide', index=i, layout=content['layout'],
+                             build_seconds=time.perf_counter() - start,
+                             extract_seconds=extract_seconds[i] if extract_seconds else None,
+                             shapes=len(slide.shapes))
+                await asyncio.sleep(0)
+        image_bytes_in, image_bytes_out = images.optimized_bytes()
+
+    with metrics.phase('save'):
+        result = await loop.run_in_executor(executor, save_presentation, prs, output_path)
+
+    metrics.emit('run', output=_output_label(output_path), slides=total_slides,
+                 asynchronous=True,
+                 seconds=time.perf_counter() - run_start, peak_rss=peak_rss_bytes(),
+                 image_bytes_saved=image_bytes_in - image_bytes_out)
 
-            content = extract_slide_content(container)
-            create_slide(prs, content, temp_dir, base_url, theme)
+    if progress_callback:
+        progress_callback(total_slides, total_slides, "转换完成!")
 
-    # 保存文件
-    prs.save(output_path)
+    return result
+
+
+# ============== 增量转换 ==============
+
+INCREMENTAL_MANIFEST_VERSION = 1
+
+
+def incremental_manifest_path(output_path):
+    """增量转换的清单文件路径 (与输出文件放在同一目录)"""
+    return os.fspath(output_path) + ".manifest.json"
+
+
+def container_fingerprint(container):
+    """幻灯片容器的指纹: 合并空白后的容器 HTML 的 SHA-256 (建页时空白同样会被合并)"""
+    html = ' '.join(str(container).split())
+    return hashlib.sha256(html.encode('utf-8')).hexdigest()
+
+
+def render_options_fingerprint(theme, template=None, image_optimizer=None, base_url=None,
+                               boundaries=None):
+    """
+    影响建页结果的选项摘要: 主题颜色、模板模式、图片优化参数、图片的基准地址和
+    幻灯片容器的选择器
+    """
+    options = {
+        'version': INCREMENTAL_MANIFEST_VERSION,
+        'theme': {name: str(color) for name, color in vars(theme).items()},
+        'template': bool(template),
+        'optimizer': ([image_optimizer.dpi, image_optimizer.jpeg_quality]
+                      if image_optimizer else None),
+        'base_url': base_url,
+    }
+    boundaries = slide_boundaries(boundaries)
+    if boundaries.selectors != DEFAULT_SLIDE_SELECTORS:
+        # 默认规则不写入, 以前生成的清单仍然有效
+        options['boundaries'] = list(boundaries.selectors)
+    return hashlib.sha256(json.dumps(options, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _load_incremental_manifest(output_path, manifest_path, options):
+    """读取上次的清单; 清单缺失、与输出文件不符或选项有变化时返回 None"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (manifest.get('version') != INCREMENTAL_MANIFEST_VERSION or
+            manifest.get('options') != options or
+            not os.path.isfile(output_path) or
+            file_digest(output_path) != manifest.get('pptx_sha256')):
+        return None
+    return manifest
+
+
+def _reusable_slides(output_path, manifest):
+    """
+    打开上次的输出, 按清单把幻灯片分回各容器
+
+    Returns:
+        (prs, {容器指纹: [[sldId 元素, ...], ...]}); 幻灯片数与清单不符时为 (None, {})
+    """
+    prs = Presentation(os.fspath(output_path))
+    sld_ids = list(prs.slides._sldIdLst)
+    entries = manifest.get('containers', [])
+    if sum(entry['slides'] for entry in entries) != len(sld_ids):
+        return None, {}
+
+    reusable = {}
+    position = 0
+    for entry in entries:
+        group = sld_ids[position:position + entry['slides']]
+        reusable.setdefault(entry['fingerprint'], []).append(group)
+        position += entry['slides']
+    return prs, reusable
+
+
+def convert_html_to_pptx_incremental(html_path, output_path, theme=None,
+                                     progress_callback=None, image_workers=8,
+                                     image_cache=None, parser=None, instrument=None,
+                                     image_optimizer=None, http_client=None,
+                                     image_deadline=None, template=False,
+                                     manifest_path=None, force=False, boundaries=None,
+                                     image_root=None, content_cache=None):
+    """
+    增量转换: 只重建内容有变化的幻灯片
+
+    find_slides 找到的每个容器按 container_fingerprint 计算指纹, 连同各容器生成的
+    幻灯片数记录在输出文件旁的清单 (incremental_manifest_path) 中。再次转换时打开
+    上次的输出, 指纹未变的容器直接沿用原有的幻灯片 (包括表格续页), 只有新增或有
+    变化的容器经过 extract_slide_content 和 create_slide, 最后按容器顺序重排。
+
+    清单缺失、输出文件被改动过、或主题/模板/图片优化等选项有变化时完整重建;
+    force 为 True 时也完整重建。图片内容不参与指纹, 只改图片文件而 HTML 不变时
+    需要 force。提供 content_cache 时, 需要重建的容器先查内容缓存。
+
+    output_path 必须是文件路径; 其他参数同 convert_html_to_pptx (不支持 stream
+    和 extract_workers)。
+
+    Returns:
+        输出文件路径
+    """
+    if not isinstance(output_path, (str, os.PathLike)):
+        raise ValueError("增量模式需要输出文件路径")
+    if theme is None:
+        theme = DEFAULT_THEME
+    if template is True:
+        template = slide_template(theme)
+    template = template or None
+
+    run_start = time.perf_counter()
+    image_end = time.monotonic() + image_deadline if image_deadline else None
+    is_file = os.path.isfile(html_path)
+    metrics = Instrumentation(instrument, input=html_path if is_file else '<string>')
+
+    base_url = None
+    if is_file:
+        base_url = file_base_url(html_path)
+        with metrics.phase('read'):
+            html_content = _read_html(html_path)
+    else:
+        html_content = html_path
+
+    with metrics.phase('parse', parser=resolve_parser(parser)):
+        soup = parse_html(html_content, parser)
+    with metrics.phase('find_slides'):
+        containers = find_slides(soup, boundaries)
+    if not containers:
+        raise ValueError("HTML 中没有找到可转换的内容")
+    fingerprints = [container_fingerprint(container) for container in containers]
+
+    manifest_path = manifest_path or incremental_manifest_path(output_path)
+    options = render_options_fingerprint(theme, template, image_optimizer, base_url, boundaries)
+    manifest = None if force else _load_incremental_manifest(output_path, manifest_path, options)
+    prs, reusable = _reusable_slides(output_path, manifest) if manifest else (None, {})
+    if prs is None:
+        prs = new_presentation()
+
+    # 每个容器沿用的幻灯片 (sldId 元素列表); None 表示需要重建
+    plan = []
+    for fingerprint in fingerprints:
+        groups = reusable.get(fingerprint)
+        plan.append(groups.pop(0) if groups else None)
+
+    # 删除不再使用的旧幻灯片, 只被它们引用的图片等部件保存时不会写出
+    sld_id_lst = prs.slides._sldIdLst
+    for groups in reusable.values():
+        for group in groups:
+            for sld_id in group:
+                sld_id_lst.remove(sld_id)
+                prs.part.drop_rel(sld_id.rId)
+    prs.part.rename_slide_parts([sld_id.rId for sld_id in sld_id_lst])
+
+    changed = [i for i, group in enumerate(plan) if group is None]
+    total_slides = len(containers)
+    if progress_callback:
+        progress_callback(0, total_slides,
+                          f"开始转换 (沿用 {total_slides - len(changed)} 页, 重建 {len(changed)} 页)...")
+
+    contents = {}
+    extract_seconds = {}
+    cache_before = content_cache.stats() if content_cache is not None else None
+    with metrics.phase('extract', count=len(changed)):
+        for i in changed:
+            start = time.perf_counter()
+            if content_cache is not None:
+                contents[i] = content_cache.extract(containers[i], resolve_parser(parser))
+            else:
+                contents[i] = extract_slide_content(containers[i])
+            extract_seconds[i] = time.perf_counter() - start
+    if content_cache is not None:
+        _emit_content_cache(metrics, content_cache, cache_before)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        sources = [src for content in contents.values() for src in slide_image_sources(content)]
+        images = ImageRegistry(temp_dir, base_url, image_cache, metrics, image_optimizer,
+                               http_client, image_end, image_root)
+        with metrics.phase('images', count=len(set(sources))):
+            images.prefetch(sources, image_workers)
+
+        with metrics.phase('build', count=len(changed)):
+            for n, i in enumerate(changed):
+                if progress_callback:
+                    progress_callback(n, len(changed), f"重建第 {i+1}/{total_slides} 页...")
+
+                start = time.perf_counter()
+                before = len(sld_id_lst)
+                slide = create_slide(prs, contents[i], temp_dir, base_url, theme, images,
+                                     template)
+                plan[i] = list(sld_id_lst)[before:]
+                metrics.emit('slide', index=i, layout=contents[i]['layout'],
+                             build_seconds=time.perf_counter() - start,
+                             extract_seconds=extract_seconds[i], shapes=len(slide.shapes))
+        image_bytes_in, image_bytes_out = images.optimized_bytes()
+
+    # 按容器顺序排列幻灯片, 部件名随之重新编号
+    sld_id_lst[:] = [sld_id for group in plan for sld_id in group]
+    prs.part.rename_slide_parts([sld_id.rId for sld_id in sld_id_lst])
+
+    with metrics.phase('save'):
+        output_path = os.fspath(output_path)
+        out_dir = os.path.dirname(os.path.abspath(output_path))
+        fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix=".pptx.tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                prs.save(f)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    _save_batch_state(manifest_path, {
+        'version': INCREMENTAL_MANIFEST_VERSION,
+        'options': options,
+        'pptx_sha256': file_digest(output_path),
+        'containers': [{'fingerprint': fingerprint, 'slides': len(group)}
+                       for fingerprint, group in zip(fingerprints, plan)],
+    })
+
+    metrics.emit('run', output=output_path, slides=total_slides, incremental=True,
+                 reused=total_slides - len(changed), rebuilt=len(changed),
+                 seconds=time.perf_counter() - run_start, peak_rss=peak_rss_bytes(),
+                 image_bytes_saved=image_bytes_in - image_bytes_out)
 
     if progress_callback:
         progress_callback(total_slides, total_slides, "转换完成!")
@@ -640,6 +3576,572 @@ def convert_html_to_pptx(html_path, output_path, theme=None, progress_callback=N
     return output_path
 
 
+# ============== 批量转换 ==============
+
+BATCH_STATE_FILE = ".html_to_pptx_batch.json"
+
+# 工作进程内共享的图片缓存、内容缓存、HTTP 客户端、图片优化器和埋点输出
+# (由 _init_batch_worker 创建, 同一进程转换的各个文件共用)
+_batch_image_cache = None
+_batch_content_cache = None
+_batch_http_client = None
+_batch_image_optimizer = None
+_batch_events = None
+
+
+def collect_batch_inputs(source, output_dir=None):
+    """
+    收集批量转换任务
+
+    source 可以是:
+    - 目录: 转换其中所有 .html / .htm 文件 (递归)
+    - glob 模式: 如 "reports/**/*.html"
+    - 清单文件: 每行 "输入文件 [输出文件]", 以 # 开头的行为注释
+
+    Returns:
+        [(输入路径, 输出路径), ...]
+    """
+    def output_for(path, rel_path):
+        if output_dir:
+            return os.path.join(output_dir, os.path.splitext(rel_path)[0] + '.pptx')
+        return os.path.splitext(path)[0] + '.pptx'
+
+    jobs = []
+    if os.path.isdir(source):
+        for root, _, files in os.walk(source):
+            for name in files:
+                if name.lower().endswith(('.html', '.htm')):
+                    path = os.path.join(root, name)
+                    jobs.append((path, output_for(path, os.path.relpath(path, source))))
+    elif glob.has_magic(source):
+        for path in glob.glob(source, recursive=True):
+            if os.path.isfile(path):
+                jobs.append((path, output_for(path, os.path.basename(path))))
+    elif os.path.isfile(source):
+        manifest_dir = os.path.dirname(os.path.abspath(source))
+        with open(source, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                parts = line.split(None, 1)
+                path = os.path.join(manifest_dir, parts[0])
+                if len(parts) > 1:
+                    jobs.append((path, os.path.join(manifest_dir, parts[1].strip())))
+                else:
+                    jobs.append((path, output_for(path, os.path.basename(path))))
+    else:
+        raise ValueError(f"找不到批量输入: {source}")
+
+    return sorted(jobs)
+
+
+def file_digest(path):
+    """计算文件的 SHA-256 摘要"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_up_to_date(input_path, output_path, check='mtime', state=None):
+    """判断输出是否已是最新 (check: 'mtime' 比较修改时间, 'hash' 比较内容摘要)"""
+    if not os.path.exists(output_path):
+        return False
+    if check == 'hash':
+        recorded = (state or {}).get(os.path.abspath(output_path))
+        return recorded is not None and recorded == file_digest(input_path)
+    return os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+
+
+def _load_batch_state(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_batch_state(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _init_batch_worker(cache_dir, events_path=None, content_cache=None, http_client=None,
+                       image_optimizer=None):
+    global _batch_image_cache, _batch_content_cache, _batch_events
+    global _batch_http_client, _batch_image_optimizer
+    _batch_image_cache = ImageCache(cache_dir) if cache_dir else None
+    # content_cache 传入时只带配置, 每个进程有自己的内存层, 磁盘层共享
+    _batch_content_cache = content_cache
+    # 同样只带配置; 每个进程只建立一次, 连接池、熔断状态和优化结果在该进程的各文件间保留
+    _batch_http_client = http_client
+    _batch_image_optimizer = image_optimizer
+    _batch_events = JsonLinesSink(events_path) if events_path else None
+
+
+def _convert_batch_item(input_path, output_path, theme, convert_options):
+    """工作进程中转换单个文件; 异常被捕获并作为结果返回, 不影响其他文件"""
+    start = time.perf_counter()
+    slides = [0]
+
+    def count_slides(current, total, message):
+        slides[0] = total
+
+    optimizer = _batch_image_optimizer
+    saved_before = optimizer.stats()['bytes_saved'] if optimizer else 0
+    cache_before = _batch_content_cache.stats() if _batch_content_cache else None
+    try:
+        out_dir = os.path.dirname(output_path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        convert_html_to_pptx(input_path, output_path, theme,
+                             progress_callback=count_slides,
+                             image_cache=_batch_image_cache,
+                             content_cache=_batch_content_cache,
+                             http_client=_batch_http_client,
+                             image_optimizer=_batch_image_optimizer,
+                             instrument=_batch_events, **convert_options)
+        status, error = 'ok', None
+    except Exception as e:
+        status, error = 'failed', f"{type(e).__name__}: {e}"
+    cache_after = _batch_content_cache.stats() if _batch_content_cache else None
+    return {
+        'input': input_path, 'output': output_path, 'status': status,
+        'slides': slides[0] if status == 'ok' else 0,
+        'seconds': time.perf_counter() - start, 'error': error,
+        'image_bytes_saved': (optimizer.stats()['bytes_saved'] - saved_before) if optimizer else 0,
+        'content_cache_hits': cache_after['hits'] - cache_before['hits'] if cache_after else 0,
+        'content_cache_misses': cache_after['misses'] - cache_before['misses'] if cache_after else 0,
+    }
+
+
+def convert_batch(jobs, workers=None, theme=None, check='mtime', force=False,
+                  cache_dir=None, state_path=None, progress_callback=None,
+                  events_path=None, content_cache=None, http_client=None,
+                  image_optimizer=None, **convert_options):
+    """
+    用进程池批量转换
+
+    Args:
+        jobs: [(输入路径, 输出路径), ...], 见 collect_batch_inputs
+        workers: 进程数 (默认 CPU 核数)
+        theme: 自定义主题颜色 (ThemeColors 实例)
+        check: 跳过已是最新输出的方式, 'mtime' 或 'hash'
+        force: 为 True 时忽略检查, 全部重新转换
+        cache_dir: 图片磁盘缓存目录 (各进程共享), 为 None 时不缓存
+        state_path: hash 模式下记录输入摘要的状态文件
+        progress_callback: 每完成一个文件回调一次 (done, total, result)
+        events_path: 埋点事件 JSON Lines 文件, 各进程追加写入
+        content_cache: 幻灯片内容缓存 (ContentCache 实例), 每个进程一份内存层,
+                       有 cache_dir 的磁盘层在各进程间共享
+        http_client: 下载图片的 ImageHttpClient; 每个进程建立一次, 连接池和熔断
+                     状态在该进程转换的各文件间保留
+        image_optimizer: 图片优化器 (ImageOptimizer 实例), 同样每个进程一份
+        convert_options: 传给 convert_html_to_pptx 的其他参数 (parser, stream,
+                         boundaries 等)
+
+    Returns:
+        汇总信息字典 (含每个文件的结果和吞吐量)
+    """
+    if state_path is None:
+        state_path = BATCH_STATE_FILE
+    state = _load_batch_state(state_path) if check == 'hash' else {}
+
+    results = []
+    pending = []
+    for input_path, output_path in jobs:
+        if not force and is_up_to_date(input_path, output_path, check, state):
+            results.append({'input': input_path, 'output': output_path,
+                            'status': 'skipped', 'slides': 0, 'seconds': 0.0,
+                            'error': None})
+        else:
+            pending.append((input_path, output_path))
+
+    total = len(jobs)
+    start = time.perf_counter()
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                 initargs=(cache_dir, events_path, content_cache, http_client,
+                                           image_optimizer)) as executor:
+            futures = {
+                executor.submit(_convert_batch_item, input_path, output_path, theme,
+                                convert_options):
+                    (input_path, output_path)
+                for input_path, output_path in pending
+            }
+            for future in as_completed(futures):
+                input_path, output_path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # 工作进程异常退出等情况
+                    result = {'input': input_path, 'output': output_path,
+                              'status': 'failed', 'slides': 0, 'seconds': 0.0,
+                              'error': f"{type(e).__name__}: {e}"}
+                if result['status'] == 'ok' and check == 'hash':
+                    state[os.path.abspath(output_path)] = file_digest(input_path)
+                    _save_batch_state(state_path, state)
+                results.append(result)
+                if progress_callback:
+                    progress_callback(len(results), total, result)
+    elapsed = time.perf_counter() - start
+
+    converted = [r for r in results if r['status'] == 'ok']
+    slides = sum(r['slides'] for r in converted)
+    cache_hits = sum(r.get('content_cache_hits', 0) for r in results)
+    cache_lookups = cache_hits + sum(r.get('content_cache_misses', 0) for r in results)
+    return {
+        'total': total,
+        'converted': len(converted),
+        'skipped': sum(1 for r in results if r['status'] == 'skipped'),
+        'failed': sum(1 for r in results if r['status'] == 'failed'),
+        'slides': slides,
+        'seconds': elapsed,
+        'files_per_second': len(converted) / elapsed if elapsed > 0 else 0.0,
+        'slides_per_second': slides / elapsed if elapsed > 0 else 0.0,
+        'image_bytes_saved': sum(r.get('image_bytes_saved', 0) for r in converted),
+        'content_cache_hit_rate': cache_hits / cache_lookups if cache_lookups else 0.0,
+        'results': results,
+    }
+
+
+# ============== 常驻服务 ==============
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_MAX_JOBS = 4
+SERVER_QUEUE_TIMEOUT = 30.0
+# 请求体上限 (内嵌 html 的任务也在此范围内)
+SERVER_MAX_REQUEST_BYTES = 64 * 1024 * 1024
+# 服务每次启动时生成的访问令牌写在这里 (仅当前用户可读), 客户端从这里读取
+SERVER_TOKEN_FILE = os.path.join(os.path.expanduser("~"), ".html_to_pptx_server.token")
+SERVER_TOKEN_HEADER = "X-Html-To-Pptx-Token"
+# Host 头只接受本机名称, 防止 DNS 重绑定
+SERVER_LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+PPTX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+# 请求中可以覆盖服务默认值的转换参数
+SERVER_JOB_OPTIONS = ('parser', 'stream', 'template', 'incremental', 'image_deadline',
+                      'boundaries')
+
+# 启动时预先转换一次, 把延迟加载的模块、解析后端、版式模板和正则等都准备好
+_WARMUP_HTML = """<html><body><div class="slide-container">
+<div class="slide-title">Warm up</div><div class="slide-subtitle">html_to_pptx</div>
+<ul class="text-list"><li class="strength"><strong>A</strong> <i class="fas fa-star"></i> a</li></ul>
+<table><tr><th>K</th><th>V</th></tr><tr><td>1</td><td>2</td></tr></table>
+</div></body></html>"""
+
+
+class ConversionServer:
+    """
+    常驻的本机转换服务, 省去每次转换的解释器启动、模块导入和初始化开销
+
+    在一个进程中保持已导入的模块、预热过的版式模板 (模板模式)、图片下载连接池
+    和各级缓存, 通过本机 HTTP 接收转换任务:
+
+    - POST /convert  请求体为 JSON: {"input": HTML 文件路径, "output": PPTX 路径}
+      或 {"html": HTML 字符串}, 另可带 SERVER_JOB_OPTIONS 中的参数。有 output 时
+      服务直接写文件并返回 JSON 结果; 没有时响应体就是 PPTX 字节
+    - GET /status    运行状态 (完成/失败/排队超时的任务数、进行中的任务、缓存命中率)
+
+    同时最多执行 max_jobs 个转换 (线程), 其余请求最多等待 queue_timeout 秒,
+    仍没有空闲名额时返回 503。路径按服务进程的工作目录解析, 客户端应传绝对路径。
+
+    访问控制 (防止浏览器中的网页或 DNS 重绑定调用本服务):
+    - 每个请求都要在 SERVER_TOKEN_HEADER 头中带上 token
+    - POST 的 Content-Type 必须是 application/json (浏览器跨域发送时必须先预检)
+    - Host 头必须是本机名称或监听地址, 带 Origin 头的请求一律拒绝
+    - 输入、输出文件和本地图片都必须位于 root 目录内; 没有 root 时只接受
+      html 任务并返回 PPTX 字节, 也不读取任何本地图片; output 必须是 .pptx 文件,
+      且不能是 input 本身
+    默认只监听 127.0.0.1。
+    """
+
+    def __init__(self, host=SERVER_HOST, port=SERVER_PORT, max_jobs=SERVER_MAX_JOBS,
+                 queue_timeout=SERVER_QUEUE_TIMEOUT, theme=None, on_result=None,
+                 root=None, token=None, **convert_options):
+        """
+        Args:
+            port: 监听端口, 0 表示由系统分配 (见 url)
+            max_jobs: 同时执行的转换数
+            queue_timeout: 等待空闲名额的最长秒数
+            theme: 主题颜色 (ThemeColors 实例), 所有任务共用
+            on_result: 每个请求处理完后回调 (job, 结果字典), 用于输出日志
+            root: 允许读写文件的目录, 为 None 时只接受 html 任务并返回字节
+            token: 访问令牌, 默认随机生成 (见 write_token_file)
+            convert_options: 传给 convert_html_to_pptx 的默认参数
+                             (image_cache、content_cache、http_client、template 等)
+        """
+        self.theme = theme or DEFAULT_THEME
+        self.root = os.path.realpath(root) if root else None
+        self.token = token or secrets.token_urlsafe(32)
+        self.allowed_hosts = set(SERVER_LOCAL_HOSTS) | {host}
+        self.on_result = on_result
+        self.max_jobs = max_jobs
+        self.queue_timeout = queue_timeout
+        self.convert_options = convert_options
+        self._slots = threading.BoundedSemaphore(max_jobs)
+        self._lock = threading.Lock()
+        self._stats = {'ok': 0, 'failed': 0, 'busy': 0, 'active': 0, 'slides': 0,
+                       'seconds': 0.0}
+        self._started = time.time()
+        self.httpd = ThreadingHTTPServer((host, port), _ConversionRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.conversion_server = self
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def write_token_file(self, path=SERVER_TOKEN_FILE):
+        """把令牌写入只有当前用户可读的文件, 供客户端读取"""
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(self.token)
+        if os.name != 'nt':
+            # 文件原先已存在时 os.open 不会修改权限
+            os.chmod(path, 0o600)
+        return path
+
+    def authorize(self, headers):
+        """
+        检查请求头, 通过时返回 None, 否则返回 (HTTP 状态码, 错误信息)
+        """
+        if headers.get('Origin') is not None:
+            return 403, "不接受来自浏览器页面的请求 (带有 Origin 头)"
+        host = (headers.get('Host') or '').strip()
+        if host.startswith('['):
+            host = host[1:host.find(']')]
+        elif host.count(':') == 1:
+            host = host.split(':')[0]
+        if host.lower() not in self.allowed_hosts:
+            return 403, f"Host 头不是本机地址: {headers.get('Host')}"
+        if not hmac.compare_digest(headers.get(SERVER_TOKEN_HEADER, ''), self.token):
+            return 401, f"缺少或错误的访问令牌 ({SERVER_TOKEN_HEADER} 头)"
+        return None
+
+    def _check_path(self, path, name):
+        """输入/输出路径必须位于 root 之内, 不符合时返回错误信息"""
+        if self.root is None:
+            return f"服务未设置 root 目录, 不接受 {name} 路径 (请改用 html 并接收返回的字节)"
+        if not isinstance(path, str) or not is_within(path, self.root):
+            return f"{name} 不在允许的目录 {self.root} 中: {path}"
+        return None
+
+    @staticmethod
+    def _check_options(job):
+        """检查任务中 SERVER_JOB_OPTIONS 参数的类型和取值, 不符合时返回错误信息"""
+        for name in ('stream', 'template', 'incremental'):
+            if name in job and not isinstance(job[name], bool):
+                return f"{name} 必须是 true 或 false"
+        parser = job.get('parser')
+        if parser is not None and parser not in ('auto',) + PARSER_BACKENDS:
+            return f"parser 必须是 auto 或 {', '.join(PARSER_BACKENDS)} 之一"
+        deadline = job.get('image_deadline')
+        if deadline is not None and (isinstance(deadline, bool)
+                                     or not isinstance(deadline, (int, float))
+                                     or not 0 < deadline < float('inf')):
+            return "image_deadline 必须是正数 (秒)"
+        boundaries = job.get('boundaries')
+        if boundaries is not None:
+            if isinstance(boundaries, str):
+                boundaries = [boundaries]
+            if (not isinstance(boundaries, list)
+                    or not all(isinstance(selector, str) for selector in boundaries)):
+                return "boundaries 必须是选择器字符串或字符串列表"
+            try:
+                slide_boundaries(boundaries)
+            except ValueError as e:
+                return f"boundaries 无效: {e}"
+        return None
+
+    def warm_up(self):
+        """转换一份内置的小文档 (不写文件、不计入统计), 返回耗时秒数"""
+        start = time.perf_counter()
+        options = {name: self.convert_options[name] for name in ('parser', 'template', 'boundaries')
+                   if name in self.convert_options}
+        convert_html_to_pptx(_WARMUP_HTML, None, self.theme, **options)
+        return time.perf_counter() - start
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def shutdown(self):
+        """停止接收请求 (可在其他线程中调用) 并关闭监听端口"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['max_jobs'] = self.max_jobs
+        stats['uptime'] = time.time() - self._started
+        content_cache = self.convert_options.get('content_cache')
+        if content_cache is not None:
+            stats['content_cache'] = content_cache.stats()
+        return stats
+
+    def _count(self, **changes):
+        with self._lock:
+            for name, change in changes.items():
+                self._stats[name] += change
+
+    def handle(self, job):
+        """
+        执行一个转换任务
+
+        Returns:
+            (HTTP 状态码, 结果字典, PPTX 字节或 None)
+        """
+        if not isinstance(job, dict) or ('input' in job) == ('html' in job):
+            return 400, {'status': 'failed', 'error': "请求需要 input (文件路径) 或 html 之一"}, None
+        unknown = set(job) - {'input', 'html', 'output'} - set(SERVER_JOB_OPTIONS)
+        if unknown:
+            return 400, {'status': 'failed',
+                         'error': f"不支持的参数: {', '.join(sorted(unknown))}"}, None
+        source = job.get('input')
+        output = job.get('output')
+        if 'html' in job and not isinstance(job['html'], str):
+            return 400, {'status': 'failed', 'error': "html 必须是字符串"}, None
+        error = self._check_options(job)
+        if error:
+            return 400, {'status': 'failed', 'error': error}, None
+        for name, path in (('input', source), ('output', output)):
+            error = self._check_path(path, name) if path is not None else None
+            if error:
+                return 403, {'status': 'failed', 'error': error}, None
+        if output is not None:
+            if not output.lower().endswith('.pptx'):
+                return 400, {'status': 'failed', 'error': f"output 必须是 .pptx 文件: {output}"}, None
+            if source is not None and os.path.realpath(output) == os.path.realpath(source):
+                return 400, {'status': 'failed', 'error': "output 不能与 input 是同一个文件"}, None
+        if source is not None and not os.path.isfile(source):
+            # convert_html_to_pptx 会把不存在的路径当作 HTML 字符串, 这里先拦下
+            return 400, {'status': 'failed', 'error': f"找不到输入文件: {source}"}, None
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self._count(busy=1)
+            return 503, {'status': 'busy',
+                         'error': f"{self.max_jobs} 个转换正在进行, "
+                                  f"等待 {self.queue_timeout:g}s 后仍无空位"}, None
+
+        self._count(active=1)
+        start = time.perf_counter()
+        slides = [0]
+
+        def count_slides(current, total, message):
+            slides[0] = total
+
+        options = dict(self.convert_options)
+        options.update((name, job[name]) for name in SERVER_JOB_OPTIONS if name in job)
+        options['image_root'] = self.root or False
+        try:
+            if output:
+                out_dir = os.path.dirname(output)
+                if out_dir:
+                    os.makedirs(out_dir, exist_ok=True)
+            data = convert_html_to_pptx(source if source is not None else job['html'],
+                                        output or None, self.theme,
+                                        progress_callback=count_slides, **options)
+            seconds = time.perf_counter() - start
+            self._count(ok=1, slides=slides[0], seconds=seconds)
+            result = {'status': 'ok', 'output': output, 'slides': slides[0], 'seconds': seconds}
+            return 200, result, None if output else data
+        except Exception as e:
+            self._count(failed=1)
+            return 500, {'status': 'failed', 'error': f"{type(e).__name__}: {e}"}, None
+        finally:
+            self._count(active=-1)
+            self._slots.release()
+
+
+class _ConversionRequestHandler(BaseHTTPRequestHandler):
+    """ConversionServer 的 HTTP 请求处理 (每个连接一个线程)"""
+
+    server_version = "html_to_pptx"
+    protocol_version = "HTTP/1.1"
+
+    def _authorized(self):
+        denied = self.server.conversion_server.authorize(self.headers)
+        if denied:
+            self._send_json(denied[0], {'status': 'failed', 'error': denied[1]})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path == '/status':
+            self._send_json(200, self.server.conversion_server.stats())
+        else:
+            self._send_json(404, {'status': 'failed', 'error': f"未知路径: {self.path}"})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if self.path != '/convert':
+            self._send_json(404, {'status': 'failed', 'error': f"未知路径: {self.path}"})
+            return
+        content_type = (self.headers.get('Content-Type') or '').split(';')[0].strip().lower()
+        if content_type != 'application/json':
+            self._send_json(415, {'status': 'failed',
+                                  'error': "Content-Type 必须是 application/json"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {'status': 'failed',
+                                  'error': "缺少或无效的 Content-Length"})
+            return
+        if length > SERVER_MAX_REQUEST_BYTES:
+            self._send_json(413, {'status': 'failed',
+                                  'error': f"请求体超过 {SERVER_MAX_REQUEST_BYTES} 字节"})
+            return
+        try:
+            job = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            self._send_json(400, {'status': 'failed', 'error': f"请求不是有效的 JSON: {e}"})
+            return
+
+        server = self.server.conversion_server
+        code, result, data = server.handle(job)
+        if server.on_result:
+            server.on_result(job, result)
+        if data is None:
+            self._send_json(code, result)
+            return
+        self.send_response(code)
+        self.send_header('Content-Type', PPTX_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('X-Slides', str(result['slides']))
+        self.send_header('X-Seconds', f"{result['seconds']:.4f}")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, code, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if code >= 400:
+            # 拒绝的请求可能没有读完请求体, 不再复用这个连接
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 每个请求的结果由 on_result 输出 (见 run_server), 不再打印 http.server 的访问日志
+        pass
+
+
 # ============== GUI 界面 ==============
 
 def create_gui():
@@ -831,17 +4333,196 @@ def create_gui():
 
 # ============== 入口点 ==============
 
+def run_batch(args, image_optimizer=None, http_client=None, content_cache=None,
+              boundaries=None):
+    """命令行批量模式"""
+    jobs = collect_batch_inputs(args.batch, args.output_dir)
+    if not jobs:
+        print(f"没有找到要转换的 HTML 文件: {args.batch}")
+        return 1
+
+    print(f"批量转换 {len(jobs)} 个文件...")
+
+    def progress(done, total, result):
+        if result['status'] == 'ok':
+            print(f"  [{done}/{total}] 完成 {result['input']} ({result['slides']} 页, "
+                  f"{result['seconds']:.2f}s)")
+        else:
+            print(f"  [{done}/{total}] 失败 {result['input']}: {result['error']}")
+
+    state_path = args.state or os.path.join(args.output_dir or ".", BATCH_STATE_FILE)
+    summary = convert_batch(jobs, workers=args.workers, check=args.check,
+                            force=args.force, cache_dir=args.cache_dir,
+                            state_path=state_path, progress_callback=progress,
+                            events_path=args.events, parser=args.parser,
+                            stream=args.stream, image_optimizer=image_optimizer,
+                            http_client=http_client, image_deadline=args.image_deadline,
+                            template=args.template, incremental=args.incremental,
+                            content_cache=content_cache, boundaries=boundaries)
+
+    print(f"\n共 {summary['total']} 个文件: 转换 {summary['converted']}, "
+          f"跳过 {summary['skipped']}, 失败 {summary['failed']}")
+    print(f"耗时 {summary['seconds']:.2f}s, {summary['files_per_second']:.2f} 文件/秒, "
+          f"{summary['slides_per_second']:.2f} 页/秒")
+    if image_optimizer:
+        print(f"图片优化节省 {summary['image_bytes_saved'] / 1024:.0f} KB")
+    if content_cache:
+        print(f"内容缓存命中率 {summary['content_cache_hit_rate']:.1%}")
+    return 1 if summary['failed'] else 0
+
+
+def run_server(args, image_optimizer=None, http_client=None, content_cache=None,
+               boundaries=None):
+    """命令行常驻服务模式 (--serve), Ctrl+C 停止"""
+    events = JsonLinesSink(args.events) if args.events else None
+
+    def log(job, result):
+        source = job.get('input') if isinstance(job, dict) else None
+        source = source or '<html>'
+        if result['status'] == 'ok':
+            print(f"  完成 {source} ({result['slides']} 页, {result['seconds']:.2f}s)")
+        else:
+            print(f"  {'繁忙' if result['status'] == 'busy' else '失败'} {source}: "
+                  f"{result['error']}")
+
+    try:
+        server = ConversionServer(
+            args.host, args.port, args.max_jobs, on_result=log, root=args.root,
+            image_cache=ImageCache(args.cache_dir) if args.cache_dir else None,
+            content_cache=content_cache, parser=args.parser, instrument=events,
+            image_optimizer=image_optimizer, http_client=http_client,
+            image_deadline=args.image_deadline, template=args.template,
+            boundaries=boundaries,
+        )
+    except OSError as e:
+        print(f"无法监听 {args.host}:{args.port}: {e}")
+        if events:
+            events.close()
+        return 1
+    print(f"预热完成 ({server.warm_up() * 1000:.0f} ms)")
+    print(f"访问令牌已写入 {server.write_token_file(args.token_file)}")
+    print(f"转换服务已启动: {server.url} (同时最多 {args.max_jobs} 个任务, "
+          f"允许读写的目录 {server.root}, Ctrl+C 停止)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        if events:
+            events.close()
+    stats = server.stats()
+    print(f"\n服务已停止: 完成 {stats['ok']}, 失败 {stats['failed']}, 繁忙拒绝 {stats['busy']}")
+    return 0
+
+
 if __name__ == "__main__":
-    import sys
+    import argparse
 
     if len(sys.argv) < 2:
         # 无参数时启动 GUI
         print("启动图形界面...")
         create_gui()
     else:
+        parser = argparse.ArgumentParser(description="HTML 转 PowerPoint 转换器")
+        parser.add_argument('input', nargs='?', help="输入 HTML 文件")
+        parser.add_argument('output', nargs='?', help="输出 PPTX 文件 (- 表示写到标准输出)")
+        parser.add_argument('--batch', metavar='SOURCE',
+                            help="批量模式: 目录、glob 模式或清单文件")
+        parser.add_argument('--serve', action='store_true',
+                            help="常驻服务模式: 保持模块和模板预热, 通过本机 HTTP 接收转换任务 "
+                                 "(客户端见 html_to_pptx_client.py)")
+        parser.add_argument('--host', default=SERVER_HOST,
+                            help=f"服务模式的监听地址 (默认 {SERVER_HOST})")
+        parser.add_argument('--port', type=int, default=SERVER_PORT,
+                            help=f"服务模式的监听端口 (默认 {SERVER_PORT})")
+        parser.add_argument('--max-jobs', type=int, default=SERVER_MAX_JOBS,
+                            help=f"服务模式同时执行的转换数 (默认 {SERVER_MAX_JOBS})")
+        parser.add_argument('--root', default=os.getcwd(),
+                            help="服务模式允许读写的目录, 输入、输出和本地图片都必须在其中 "
+                                 "(默认当前目录)")
+        parser.add_argument('--token-file', default=SERVER_TOKEN_FILE,
+                            help=f"服务模式写入访问令牌的文件 (默认 {SERVER_TOKEN_FILE})")
+        parser.add_argument('--output-dir', help="批量模式的输出目录 (默认与输入文件同目录)")
+        parser.add_argument('--workers', type=int, help="批量模式的进程数 (默认 CPU 核数)")
+        parser.add_argument('--check', choices=('mtime', 'hash'), default='mtime',
+                            help="批量模式跳过已是最新输出的方式")
+        parser.add_argument('--force', action='store_true', help="批量模式下全部重新转换")
+        parser.add_argument('--state', help="hash 模式的状态文件路径")
+        parser.add_argument('--cache-dir', help="图片磁盘缓存目录")
+        parser.add_argument('--parser', choices=('auto',) + PARSER_BACKENDS, default='auto',
+                            help="HTML 解析后端 (默认自动选择已安装的最快后端)")
+        parser.add_argument('--events', metavar='FILE',
+                            help="把各阶段耗时、图片下载、每页形状数等埋点事件追加写入 JSON Lines 文件")
+        parser.add_argument('--optimize-images', action='store_true',
+                            help="按显示尺寸缩小并重新压缩图片后再嵌入")
+        parser.add_argument('--image-dpi', type=int, default=150,
+                            help="图片优化的目标分辨率 (默认 150 dpi)")
+        parser.add_argument('--jpeg-quality', type=int, default=85,
+                            help="图片优化的 JPEG 质量 (默认 85)")
+        parser.add_argument('--http-timeout', type=float, default=HTTP_TIMEOUT,
+                            help=f"下载单张图片时每次请求的超时秒数 (默认 {HTTP_TIMEOUT:g})")
+        parser.add_argument('--http-retries', type=int, default=HTTP_RETRIES,
+                            help=f"图片下载遇到 5xx 或超时的重试次数 (默认 {HTTP_RETRIES})")
+        parser.add_argument('--per-host-limit', type=int, default=HTTP_PER_HOST_LIMIT,
+                            help=f"同一主机的最大并发下载数 (默认 {HTTP_PER_HOST_LIMIT})")
+        parser.add_argument('--image-deadline', type=float,
+                            help="每个文件下载图片的总时限秒数 (默认不限)")
+        parser.add_argument('--template', action='store_true',
+                            help="模板模式: 标题、页脚和卡片装饰放在版式上, 每页只填文字")
+        parser.add_argument('--content-cache', action='store_true',
+                            help="缓存各页提取出的内容, 重复的页 (免责声明、目录等) 只提取一次; "
+                                 "配合 --cache-dir 时跨运行保留")
+        parser.add_argument('--incremental', action='store_true',
+                            help="增量模式: 只重建内容有变化的幻灯片 (清单保存在输出文件旁)")
+        parser.add_argument('--slide-selector', action='append', metavar='SELECTOR',
+                            help="幻灯片容器的 CSS 选择器, 可重复指定, 先指定的优先; "
+                                 "同一级的多个选择器用逗号分隔 (默认 div.slide-container、"
+                                 "div.slide、section、article)")
+        parser.add_argument('--slide-selectors', metavar='FILE',
+                            help="从文件读取幻灯片容器的选择器 (每行一级, # 开头为注释)")
+        parser.add_argument('--extract-workers', type=int,
+                            help="并行提取幻灯片内容的进程数 (适合页数很多的单个文件)")
+        parser.add_argument('--stream', action='store_true',
+                            help="流式模式: 边读边转换, 适合超大 HTML 文件 (需要 lxml)")
+        args = parser.parse_args()
+
+        image_optimizer = None
+        if args.optimize_images:
+            optimizer_dir = os.path.join(args.cache_dir, "optimized") if args.cache_dir else None
+            image_optimizer = ImageOptimizer(args.image_dpi, args.jpeg_quality, optimizer_dir)
+        http_client = ImageHttpClient(timeout=args.http_timeout, retries=args.http_retries,
+                                      per_host_limit=args.per_host_limit)
+        content_cache = None
+        if args.content_cache:
+            content_dir = os.path.join(args.cache_dir, "content") if args.cache_dir else None
+            content_cache = ContentCache(cache_dir=content_dir)
+
+        boundaries = None
+        try:
+            if args.slide_selectors:
+                boundaries = SlideBoundaries.from_file(args.slide_selectors)
+            if args.slide_selector:
+                boundaries = SlideBoundaries(
+                    (boundaries.selectors if boundaries else ()) + tuple(args.slide_selector))
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+
+        if args.serve:
+            sys.exit(run_server(args, image_optimizer, http_client, content_cache, boundaries))
+        if args.batch:
+            sys.exit(run_batch(args, image_optimizer, http_client, content_cache, boundaries))
+        if not args.input:
+            parser.error("请指定输入 HTML 文件或 --batch")
+
         # 命令行模式
-        input_file = sys.argv[1]
-        output_file = sys.argv[2] if len(sys.argv) > 2 else input_file.replace('.html', '.pptx')
+        input_file = args.input
+        output_file = args.output or input_file.replace('.html', '.pptx')
+        output = output_file
+        if output_file == '-':
+            # PPTX 直接写到标准输出 (可接管道), 其余信息改写到标准错误
+            output = sys.stdout.buffer
+            sys.stdout = sys.stderr
 
         print(f"输入: {input_file}")
         print(f"输出: {output_file}")
@@ -849,9 +4530,29 @@ if __name__ == "__main__":
         def progress(current, total, msg):
             print(f"  [{current}/{total}] {msg}")
 
+        events = JsonLinesSink(args.events) if args.events else None
         try:
-            convert_html_to_pptx(input_file, output_file, progress_callback=progress)
+            image_cache = ImageCache(args.cache_dir) if args.cache_dir else None
+            convert_html_to_pptx(input_file, output, progress_callback=progress,
+                                 image_cache=image_cache, parser=args.parser,
+                                 stream=args.stream, extract_workers=args.extract_workers,
+                                 instrument=events, image_optimizer=image_optimizer,
+                                 http_client=http_client, image_deadline=args.image_deadline,
+                                 template=args.template, incremental=args.incremental,
+                                 content_cache=content_cache, boundaries=boundaries)
+            if image_optimizer:
+                stats = image_optimizer.stats()
+                print(f"\n图片优化: {stats['optimized']}/{stats['images']} 张, "
+                      f"{stats['bytes_in'] / 1024:.0f} KB -> {stats['bytes_out'] / 1024:.0f} KB, "
+                      f"节省 {stats['bytes_saved'] / 1024:.0f} KB")
+            if content_cache:
+                stats = content_cache.stats()
+                print(f"内容缓存: 命中 {stats['hits']}/{stats['hits'] + stats['misses']} "
+                      f"({stats['hit_rate']:.1%})")
             print(f"\n转换成功! 输出文件: {output_file}")
         except Exception as e:
             print(f"\n转换失败: {e}")
             sys.exit(1)
+        finally:
+            if events:
+                events.close()
@@ -0,0 +1,218 @@
+"""
+html_to_pptx 常驻服务的命令行客户端
+
+只依赖标准库, 启动时不导入 requests / bs4 / python-pptx / lxml, 把转换任务交给
+已在运行的 `python html_to_pptx.py --serve`。服务没有运行时默认改为在本进程内
+直接转换 (需要完整依赖), 可用 --no-fallback 关闭。
+
+访问令牌从环境变量 HTML_TO_PPTX_TOKEN 或服务启动时写入的令牌文件
+(默认 ~/.html_to_pptx_server.token) 读取; 输入和输出文件必须位于服务的 --root 目录内。
+
+Usage:
+    # 先启动服务 (只需一次)
+    python html_to_pptx.py --serve --cache-dir .cache --content-cache
+
+    # 转换单个文件
+    python html_to_pptx_client.py report.html report.pptx
+
+    # 批量提交, 同时 4 个请求
+    python html_to_pptx_client.py reports/*.html --output-dir out/ --jobs 4
+
+    # 查看服务状态
+    python html_to_pptx_client.py --status
+"""
+
+import os
+import sys
+import json
+import argparse
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_SERVER = os.environ.get('HTML_TO_PPTX_SERVER', "http://127.0.0.1:8765")
+DEFAULT_TOKEN_FILE = os.path.join(os.path.expanduser("~"), ".html_to_pptx_server.token")
+TOKEN_HEADER = "X-Html-To-Pptx-Token"
+REQUEST_TIMEOUT = 300.0
+
+
+class ServerUnavailable(Exception):
+    """连接不到转换服务"""
+
+
+def read_token(token_file=DEFAULT_TOKEN_FILE):
+    """访问令牌: 环境变量 HTML_TO_PPTX_TOKEN 优先, 其次是服务写入的令牌文件"""
+    token = os.environ.get('HTML_TO_PPTX_TOKEN')
+    if token:
+        return token
+    try:
+        with open(token_file, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    except OSError:
+        return ''
+
+
+def request(server, path, payload=None, timeout=REQUEST_TIMEOUT, token=''):
+    """
+    向服务发送请求
+
+    Returns:
+        (HTTP 状态码, 响应头, 响应体字节)
+    """
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    req = urllib.request.Request(server.rstrip('/') + path, data=data,
+                                 headers={'Content-Type': 'application/json',
+                                          TOKEN_HEADER: token})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+    except (urllib.error.URLError, ConnectionError) as e:
+        raise ServerUnavailable(f"无法连接转换服务 {server}: {getattr(e, 'reason', e)}")
+
+
+def convert_remote(server, input_path, output_path, options, timeout=REQUEST_TIMEOUT,
+                   token=''):
+    """
+    请求服务转换一个文件, 返回结果字典
+
+    路径转为绝对路径后发送 (服务的工作目录与客户端不同); output_path 为 '-' 时
+    由服务返回 PPTX 字节并写到标准输出。
+    """
+    job = dict(options, input=os.path.abspath(input_path))
+    if output_path != '-':
+        job['output'] = os.path.abspath(output_path)
+    code, headers, body = request(server, '/convert', job, timeout, token)
+    if code != 200:
+        try:
+            return json.loads(body)
+        except ValueError:
+            return {'status': 'failed', 'error': f"HTTP {code}"}
+    if output_path == '-':
+        sys.stdout.buffer.write(body)
+        sys.stdout.buffer.flush()
+        return {'status': 'ok', 'output': '-', 'slides': int(headers.get('X-Slides', 0)),
+                'seconds': float(headers.get('X-Seconds', 0))}
+    return json.loads(body)
+
+
+def convert_local(input_path, output_path, options):
+    """服务不可用时在本进程内转换 (导入完整的 html_to_pptx)"""
+    import time
+    import html_to_pptx
+
+    start = time.perf_counter()
+    slides = [0]
+
+    def count_slides(current, total, message):
+        slides[0] = total
+
+    output = output_path
+    if output_path == '-':
+        # 转换过程中的警告改写到标准错误, 以免混进 PPTX 字节
+        output = sys.stdout.buffer
+        sys.stdout = sys.stderr
+    try:
+        html_to_pptx.convert_html_to_pptx(input_path, output, progress_callback=count_slides,
+                                          **options)
+    except Exception as e:
+        return {'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+    return {'status': 'ok', 'output': output_path, 'slides': slides[0],
+            'seconds': time.perf_counter() - start}
+
+
+def output_for(input_path, output_dir=None):
+    """默认输出路径: 与输入同名的 .pptx, 指定 output_dir 时放在该目录下"""
+    name = os.path.splitext(os.path.basename(input_path))[0] + '.pptx'
+    if output_dir:
+        return os.path.join(output_dir, name)
+    return os.path.join(os.path.dirname(input_path), name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="html_to_pptx 常驻服务的客户端")
+    parser.add_argument('inputs', nargs='*', help="输入 HTML 文件")
+    parser.add_argument('-o', '--output',
+                        help="输出 PPTX 文件 (只有一个输入时可用, - 表示写到标准输出)")
+    parser.add_argument('--output-dir', help="输出目录 (默认与输入文件同目录)")
+    parser.add_argument('--server', default=DEFAULT_SERVER,
+                        help=f"服务地址 (默认 {DEFAULT_SERVER}, 可用环境变量 HTML_TO_PPTX_SERVER 设置)")
+    parser.add_argument('--token-file', default=DEFAULT_TOKEN_FILE,
+                        help="服务的访问令牌文件 (默认与服务相同; 环境变量 HTML_TO_PPTX_TOKEN 优先)")
+    parser.add_argument('--jobs', type=int, default=1, help="同时提交的请求数 (默认 1)")
+    parser.add_argument('--timeout', type=float, default=REQUEST_TIMEOUT,
+                        help=f"单个请求的超时秒数 (默认 {REQUEST_TIMEOUT:g})")
+    parser.add_argument('--no-fallback', action='store_true',
+                        help="服务不可用时直接失败, 不在本进程内转换")
+    parser.add_argument('--status', action='store_true', help="输出服务的运行状态")
+    # 以下参数只在指定时发送, 未指定时使用服务启动时的设置
+    parser.add_argument('--template', action='store_true', default=None,
+                        help="模板模式")
+    parser.add_argument('--incremental', action='store_true', default=None,
+                        help="增量模式")
+    parser.add_argument('--stream', action='store_true', default=None,
+                        help="流式模式")
+    parser.add_argument('--parser', help="HTML 解析后端")
+    parser.add_argument('--slide-selector', action='append', metavar='SELECTOR',
+                        help="幻灯片容器的 CSS 选择器, 可重复指定, 先指定的优先")
+    parser.add_argument('--image-deadline', type=float, help="下载图片的总时限秒数")
+    args = parser.parse_args(argv)
+    token = read_token(args.token_file)
+
+    if args.status:
+        try:
+            code, _, body = request(args.server, '/status', timeout=args.timeout, token=token)
+        except ServerUnavailable as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(json.dumps(json.loads(body), ensure_ascii=False, indent=1))
+        return 0 if code == 200 else 1
+
+    if not args.inputs:
+        parser.error("请指定输入 HTML 文件")
+    if (not args.output and len(args.inputs) == 2 and
+            (args.inputs[1] == '-' or args.inputs[1].lower().endswith('.pptx'))):
+        # 与 html_to_pptx.py 相同的 "输入 输出" 用法
+        args.output = args.inputs.pop()
+    if args.output and len(args.inputs) > 1:
+        parser.error("多个输入文件时请使用 --output-dir")
+
+    options = {name: value for name, value in (
+        ('template', args.template), ('incremental', args.incremental),
+        ('stream', args.stream), ('parser', args.parser),
+        ('boundaries', args.slide_selector), ('image_deadline', args.image_deadline),
+    ) if value is not None}
+    jobs = [(path, args.output or output_for(path, args.output_dir)) for path in args.inputs]
+    # PPTX 写到标准输出时, 其余信息改写到标准错误
+    log = sys.stderr if args.output == '-' else sys.stdout
+    fallback = [False]
+
+    def run(job):
+        input_path, output_path = job
+        if not fallback[0]:
+            try:
+                return convert_remote(args.server, input_path, output_path, options,
+                                      args.timeout, token)
+            except ServerUnavailable as e:
+                if args.no_fallback:
+                    return {'status': 'failed', 'error': str(e)}
+                if not fallback[0]:
+                    fallback[0] = True
+                    print(f"{e}, 改为在本进程内转换", file=log)
+        return convert_local(input_path, output_path, options)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        for (input_path, output_path), result in zip(jobs, executor.map(run, jobs)):
+            if result['status'] == 'ok':
+                print(f"完成 {input_path} -> {output_path} ({result['slides']} 页, "
+                      f"{result['seconds']:.2f}s)", file=log)
+            else:
+                failed += 1
+                print(f"失败 {input_path}: {result['error']}", file=log)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,406 @@
+"""
+html_to_pptx 的测试
+
+- 一致性: 各解析后端 find_slides / extract_slide_content 提取的内容应与 html.parser
+  相同, 流式、并行提取和内容缓存等转换模式生成的幻灯片 XML 应与默认模式相同
+- 图片缓存: 对本地 http.server 替身验证条件请求、LRU 淘汰和统计
+
+Usage:
+    python -m pytest -q test_html_to_pptx.py
+"""
+
+import http.server
+import json
+import os
+import threading
+import warnings
+
+import pytest
+from bs4 import XMLParsedAsHTMLWarning
+from bs4.builder import builder_registry
+from lxml import etree
+
+import html_to_pptx as h2p
+from bench_html_to_pptx import make_parity_documents, slide_xml
+
+DOCUMENTS = make_parity_documents()
+
+# 没有 div.slide-container / section / article 容器的文档不能用流式模式
+STREAM_DOCUMENTS = [name for name in DOCUMENTS if name not in ('hr', 'body')]
+
+
+@pytest.fixture(autouse=True)
+def _quiet_xhtml_warning():
+    # XHTML 文档带 XML 声明, BeautifulSoup 会提示改用 XML 解析器
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', XMLParsedAsHTMLWarning)
+        yield
+
+
+def contents_with(html, backend):
+    soup = h2p.parse_html(html, backend)
+    return [h2p.extract_slide_content(container) for container in h2p.find_slides(soup)]
+
+
+def convert(html, **options):
+    return slide_xml(h2p.convert_html_to_pptx(html, None, **options))
+
+
+# ============== 解析后端 ==============
+
+@pytest.mark.parametrize('backend', [
+    pytest.param(backend, marks=pytest.mark.skipif(
+        builder_registry.lookup(backend) is None, reason=f"{backend} 未安装"))
+    for backend in h2p.PARSER_BACKENDS if backend != 'html.parser'
+])
+@pytest.mark.parametrize('name', DOCUMENTS)
+def test_backend_content_matches_html_parser(backend, name):
+    html = DOCUMENTS[name]
+    assert contents_with(html, backend) == contents_with(html, 'html.parser')
+
+
+
+@pytest.mark.parametrize('name', STREAM_DOCUMENTS)
+def test_fragments_match_find_slides(name):
+    # 并行提取、内容缓存和流式模式用 lxml 切分出的片段, 提取结果应与整页解析相同
+    html = DOCUMENTS[name]
+    fragments = h2p.find_slide_fragments(html)
+    contents = [h2p._extract_from_html(fragment + ('lxml',)) for fragment in fragments]
+    assert contents == contents_with(html, 'lxml')
+    assert list(h2p.iter_slide_fragments(html)) == fragments
+
+
+# ============== 转换模式 ==============
+
+@pytest.mark.parametrize('name', STREAM_DOCUMENTS)
+def test_stream_matches_default(name):
+    html = DOCUMENTS[name]
+    assert convert(html, stream=True) == convert(html)
+
+
+@pytest.mark.parametrize('name', DOCUMENTS)
+def test_extract_workers_match_default(name):
+    html = DOCUMENTS[name]
+    assert convert(html, extract_workers=2) == convert(html)
+
+
+@pytest.mark.parametrize('name', DOCUMENTS)
+def test_content_cache_matches_default(name):
+    html = DOCUMENTS[name]
+    cache = h2p.ContentCache()
+    expected = convert(html)
+    assert convert(html, content_cache=cache) == expected
+    # 第二次全部命中缓存, 结果仍然相同
+    assert convert(html, content_cache=cache) == expected
+
+
+# ============== python-pptx 版本 ==============
+
+def test_check_pptx_version(monkeypatch, capsys):
+    assert h2p.check_pptx_version() == h2p.pptx.__version__.startswith('1.0.')
+    monkeypatch.setattr(h2p.pptx, '__version__', '2.0.0')
+    assert not h2p.check_pptx_version()
+    assert 'python-pptx==1.0.*' in capsys.readouterr().out
+
+
+# ============== 内容缓存 ==============
+
+# lxml 会自动闭合 <td>, html.parser 不会: 两个后端切分出的容器内容不同
+MALFORMED_TABLE = ('<body><section><h1>A</h1><table><tr><td>1<td>2<tr><td>3</table></section>'
+                   '<section><h1>B</h1></section></body>')
+
+
+@pytest.mark.parametrize('backend', ['html.parser', 'lxml'])
+def test_content_cache_uses_selected_parser(backend):
+    expected = convert(MALFORMED_TABLE, parser=backend)
+    cache = h2p.ContentCache()
+    assert convert(MALFORMED_TABLE, parser=backend, content_cache=cache) == expected
+    assert convert(MALFORMED_TABLE, parser=backend, content_cache=cache) == expected
+    assert cache.stats()['hits'] == 2
+
+
+def test_content_cache_key_ignores_only_inter_tag_space():
+    key = h2p.ContentCache.key
+    base = '<div class="slide">\n<h1>Title</h1>\n<img src="a b.png" alt="x"></div>'
+    indented = base.replace('\n', '\n        ')
+    assert key(indented, 'lxml') == key(base, 'lxml')
+    # 属性值和文字中的空白不同, 是不同的容器
+    assert key(base.replace('a b.png', 'a  b.png'), 'lxml') != key(base, 'lxml')
+    assert key(base.replace('Title', 'Ti  tle'), 'lxml') != key(base, 'lxml')
+    assert key(base, 'lxml') != key(base, 'html.parser')
+
+
+def test_content_cache_hits_across_indentation():
+    slide = ('<div class="slide-container">\n<div class="slide-title">Shared</div>\n'
+             '<img src="a  b.png"></div>')
+    cache = h2p.ContentCache()
+    first = h2p.extract_all_contents(f'<body>{slide}</body>', 'lxml', content_cache=cache)[0]
+    indented = slide.replace('\n', '\n      ')
+    second = h2p.extract_all_contents(f'<body>\n  {indented}\n</body>', 'lxml',
+                                      content_cache=cache)[0]
+    assert second == first
+    assert first[0]['images'][0]['src'] == 'a  b.png'
+    assert cache.stats()['hits'] == 1
+
+
+# ============== 模板模式 ==============
+
+def test_template_fill_inserts_before_ext_lst():
+    prs = h2p.new_presentation()
+    template = h2p.slide_template()
+    slide = template.add_slide(prs, has_subtitle=True)
+    sp_tree = slide.shapes._spTree
+    sp_tree.append(h2p.parse_xml('<p:extLst %s/>' % h2p.nsdecls('p')))
+
+    template.fill(slide, template.header_texts(
+        {'title': 'Title', 'subtitle': 'Subtitle', 'footer_left': '', 'footer_right': ''}))
+
+    # p:extLst 必须是 spTree 的最后一个子元素
+    assert etree.QName(sp_tree[-1]).localname == 'extLst'
+    assert len(slide.placeholders) == 2
+
+
+# ============== 表格 ==============
+
+def _table_html(rows):
+    body = ''.join(f'<tr><td>row {i}</td><td>value {i}</td></tr>' for i in range(rows))
+    return ('<div class="slide-container"><div class="slide-title">Report</div>'
+            '<ul><li>First point</li><li>Second point</li></ul>'
+            f'<table><tr><th>Name</th><th>Value</th></tr>{body}</table></div>')
+
+
+def _table_slides(html):
+    prs = h2p.Presentation(h2p.io.BytesIO(h2p.convert_html_to_pptx(html, None)))
+    return [[shape.has_table for shape in slide.shapes] for slide in prs.slides]
+
+
+def test_small_table_stays_below_body():
+    slides = _table_slides(_table_html(2))
+    assert len(slides) == 1
+    assert any(slides[0])
+
+
+def test_large_table_spills_to_continuation_slides():
+    slides = _table_slides(_table_html(60))
+    assert len(slides) > 1
+    assert all(any(shapes) for shapes in slides[1:])
+
+
+# ============== 图片缓存 ==============
+
+class _ValidatingHandler(http.server.BaseHTTPRequestHandler):
+    """按路径返回固定内容, 支持 If-None-Match / If-Modified-Since, 并记录收到的请求头"""
+
+    images = {}
+    etags = {}
+    last_modified = 'Wed, 21 Oct 2015 07:28:00 GMT'
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((self.path, dict(self.headers)))
+        data = self.images.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+        etag = self.etags[self.path]
+        if (self.headers.get('If-None-Match') == etag or
+                self.headers.get('If-Modified-Since') == self.last_modified):
+            # 304 可以带新的验证信息 (测试中用 etags 指定)
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', self.last_modified)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def image_server():
+    handler = type('Handler', (_ValidatingHandler,), {
+        'images': {f'/img{i}.png': bytes([i]) * 1000 for i in range(4)},
+        'etags': {f'/img{i}.png': f'"v1-{i}"' for i in range(4)},
+        'requests': [],
+    })
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    yield handler, f"http://{host}:{port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client():
+    return h2p.ImageHttpClient(retries=0)
+
+
+def test_image_cache_revalidates_with_etag(tmp_path, image_server, client):
+    handler, base = image_server
+    cache = h2p.ImageCache(str(tmp_path / 'cache'))
+    url = base + '/img1.png'
+
+    first = h2p.download_image(url, str(tmp_path), cache=cache, client=client)
+    second = h2p.download_image(url, str(tmp_path), cache=cache, client=client)
+
+    assert open(first, 'rb').read() == open(second, 'rb').read() == bytes([1]) * 1000
+    assert handler.requests[1][1].get('If-None-Match') == '"v1-1"'
+    stats = cache.stats()
+    assert (stats['misses'], stats['hits'], stats['revalidated']) == (1, 1, 1)
+    assert stats['bytes_downloaded'] == stats['bytes_saved'] == 1000
+
+
+def test_image_cache_updates_validators_on_304(tmp_path, image_server, client):
+    handler, base = image_server
+    cache = h2p.ImageCache(str(tmp_path / 'cache'))
+    url = base + '/img2.png'
+
+    h2p.download_image(url, str(tmp_path), cache=cache, client=client)
+    # 服务端改用新的 ETag, 但仍按 Last-Modified 返回 304
+    handler.etags['/img2.png'] = '"v2"'
+    h2p.download_image(url, str(tmp_path), cache=cache, client=client)
+    h2p.download_image(url, str(tmp_path), cache=cache, client=client)
+
+    assert cache.lookup(url)['etag'] == '"v2"'
+    assert handler.requests[2][1].get('If-None-Match') == '"v2"'
+    assert cache.stats()['misses'] == 1
+
+
+def test_image_cache_max_age_skips_request(tmp_path, image_server, client):
+    handler, base = image_server
+    cache = h2p.ImageCache(str(tmp_path / 'cache'), max_age=3600)
+    url = base + '/img0.png'
+
+    h2p.download_image(url, str(tmp_path), cache=cache, client=client)
+    h2p.download_image(url, str(tmp_path), cache=cache, client=client)
+
+    assert len(handler.requests) == 1
+    assert cache.stats()['hits'] == 1
+
+
+def test_image_cache_lru_eviction_removes_index(tmp_path, image_server, client):
+    handler, base = image_server
+    cache_dir = tmp_path / 'cache'
+    cache = h2p.ImageCache(str(cache_dir), max_bytes=2500)
+    urls = [f'{base}/img{i}.png' for i in range(3)]
+
+    h2p.download_image(urls[0], str(tmp_path), cache=cache, client=client)
+    h2p.download_image(urls[1], str(tmp_path), cache=cache, client=client)
+    # 把 img1 的使用时间调早, 使它成为最久未用的对象
+    os.utime(cache.lookup(urls[1])['path'], (1, 1))
+    h2p.download_image(urls[0], str(tmp_path), cache=cache, client=client)
+    h2p.download_image(urls[2], str(tmp_path), cache=cache, client=client)
+
+    assert cache.lookup(urls[1]) is None
+    assert cache.lookup(urls[0]) is not None and cache.lookup(urls[2]) is not None
+    assert cache.stats()['evictions'] == 1
+    # 被淘汰对象的 URL 索引一并删除
+    index = [json.load(open(entry, encoding='utf-8'))['url']
+             for entry in (cache_dir / 'index').iterdir()]
+    assert sorted(index) == [urls[0], urls[2]]
+
+
+def test_image_cache_checkout_survives_eviction(tmp_path, image_server, client):
+    _, base = image_server
+    cache = h2p.ImageCache(str(tmp_path / 'cache'))
+    run_dir = tmp_path / 'run'
+    run_dir.mkdir()
+
+    path = h2p.download_image(base + '/img3.png', str(run_dir), cache=cache, client=client)
+    assert os.path.dirname(path) == str(run_dir)
+
+    # 另一个进程淘汰了全部对象: 已 checkout 的图片仍可读取
+    other = h2p.ImageCache(str(tmp_path / 'cache'), max_bytes=0)
+    other.evict()
+    assert cache.lookup(base + '/img3.png') is None
+    assert open(path, 'rb').read() == bytes([3]) * 1000
+
+
+def test_download_image_scheme_is_case_insensitive(tmp_path, image_server, client):
+    _, base = image_server
+    url = base.replace('http://', 'HTTP://') + '/img1.png'
+    registry = h2p.ImageRegistry(str(tmp_path), base_url='file:///nonexistent/', http_client=client)
+    path = registry.get_path(url)
+    assert open(path, 'rb').read() == bytes([1]) * 1000
+
+
+def test_uppercase_data_url_is_decoded(tmp_path):
+    registry = h2p.ImageRegistry(str(tmp_path), base_url='file:///nonexistent/')
+    image = registry.get_path('DATA:image/png;BASE64,aGVsbG8=')
+    assert isinstance(image, h2p.InlineImage) and image.data == b'hello'
+
+
+# ============== 常驻服务 ==============
+
+SMALL_DOCUMENT = '<div class="slide"><h1>标题</h1><p>正文</p></div>'
+
+
+@pytest.fixture
+def conversion_server(tmp_path):
+    server = h2p.ConversionServer(port=0, root=str(tmp_path), max_jobs=1, queue_timeout=0)
+    yield server
+    server.httpd.server_close()
+
+
+@pytest.mark.parametrize('options', [
+    {'boundaries': 5},
+    {'boundaries': ['div.page', 3]},
+    {'boundaries': []},
+    {'boundaries': 'div > p'},
+    {'parser': []},
+    {'parser': 'xml'},
+    {'image_deadline': 'abc'},
+    {'image_deadline': 0},
+    {'image_deadline': True},
+    {'stream': 'yes'},
+    {'template': 1},
+])
+def test_server_rejects_bad_option_values(conversion_server, options):
+    # 名额已被占满: 参数错误必须在等待名额之前返回 400, 而不是 503 或 500
+    assert conversion_server._slots.acquire(timeout=0)
+    try:
+        status, result, data = conversion_server.handle(dict(options, html=SMALL_DOCUMENT))
+    finally:
+        conversion_server._slots.release()
+    assert status == 400, result
+    assert data is None
+
+
+def test_server_accepts_valid_options(conversion_server):
+    status, result, data = conversion_server.handle({
+        'html': SMALL_DOCUMENT, 'parser': 'auto', 'image_deadline': 5,
+        'boundaries': ['div.slide'], 'template': False,
+    })
+    assert status == 200, result
+    assert data.startswith(b'PK')
+
+
+def test_server_refuses_to_overwrite_input(conversion_server, tmp_path):
+    source = tmp_path / 'report.html'
+    source.write_text(SMALL_DOCUMENT, encoding='utf-8')
+    link = tmp_path / 'report.pptx'
+    link.symlink_to(source)
+    for output in (str(source), str(link)):
+        status, result, _ = conversion_server.handle({'input': str(source), 'output': output})
+        assert status == 400, result
+    assert source.read_text(encoding='utf-8') == SMALL_DOCUMENT
+
+
+def test_server_output_must_be_pptx(conversion_server, tmp_path):
+    source = tmp_path / 'report.html'
+    source.write_text(SMALL_DOCUMENT, encoding='utf-8')
+    status, _, _ = conversion_server.handle({'input': str(source),
+                                             'output': str(tmp_path / 'notes.txt')})
+    assert status == 400
+    assert not (tmp_path / 'notes.txt').exists()
+    status, result, _ = conversion_server.handle({'input': str(source),
+                                                  'output': str(tmp_path / 'out' / 'Report.PPTX')})
+    assert status == 200, result
+    assert (tmp_path / 'out' / 'Report.PPTX').is_file()